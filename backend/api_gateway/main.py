@@ -5,7 +5,9 @@ import os
 from dotenv import load_dotenv
 from api_gateway.routers import download
 from shared.models import DownloadRequest, DownloadResponse
-from shared.redis_client import check_redis_connection
+from shared.async_redis_client import close_async_redis
+from shared.redis_health import redis_health
+from shared.task_events import task_events
 
 # Load environment variables
 load_dotenv()
@@ -22,11 +24,11 @@ app = FastAPI(
 async def health_check():
     """Health check endpoint for Docker and load balancers"""
     try:
-        # Check if Redis is accessible
-        redis_status = check_redis_connection()
+        # Report the health monitor's cached Redis state (no PING per probe)
         return {
             "status": "healthy",
-            "redis": "connected" if redis_status else "disconnected",
+            "redis": "connected" if redis_health.is_healthy else "disconnected",
+            "redis_circuit": redis_health.snapshot(),
             "service": "api_gateway"
         }
     except Exception as e:
@@ -60,14 +62,22 @@ async def debug_env():
         "storage_dir": os.getenv('STORAGE_DIR', 'not set')
     }
 
-# Check Redis connection on startup
+# Check Redis connection and start the background health monitor on startup
 @app.on_event("startup")
 async def startup_event():
-    if not check_redis_connection():
+    await task_events.start()
+    if not await redis_health.start():
         print("WARNING: Redis connection failed. Make sure Redis is running.")
     else:
         print("Redis connection successful.")
 
+# Release pooled Redis connections on shutdown
+@app.on_event("shutdown")
+async def shutdown_event():
+    await redis_health.stop()
+    await task_events.stop()
+    await close_async_redis()
+
 # Configure CORS for frontend - ensure * is allowed during development
 app.add_middleware(
     CORSMiddleware,
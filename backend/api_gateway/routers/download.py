@@ -1,8 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 import uuid
 import os
 import time
-from typing import Optional
+import json
+import asyncio
+import logging
+import redis
+from typing import Optional, Dict, Any, List
 
 try:
     from dotenv import load_dotenv
@@ -13,24 +19,58 @@ except ImportError:
     # dotenv not available, which is fine for production Docker containers
     pass
 
-from shared.models import DownloadRequest, DownloadResponse, TaskStatusResponse
-from shared.redis_client import RedisTaskManager, TaskStatus, check_redis_connection
-from shared.youtube_api import validate_youtube_url
-from file_service.storage import serve_file, cleanup_temp_files, get_file_for_task, get_file_metadata
+from shared.models import (
+    DownloadRequest, DownloadResponse, TaskStatusResponse,
+    BatchDownloadRequest, BatchDownloadItem, BatchDownloadResponse, BulkStatusRequest
+)
+from shared.redis_client import TaskStatus, parse_task_data
+from shared.async_redis_client import AsyncRedisTaskManager
+from shared.redis_health import redis_health
+from shared.task_events import task_events
+from shared.youtube_api import validate_youtube_url_async, validate_youtube_urls_async
+from file_service.storage import serve_file, cleanup_temp_files
+from file_service.progressive import serve_progressive_file
 
 # Celery task imports
 try:
+    from celery import group
     from download_service.worker import download_audio_task
     CELERY_AVAILABLE = True
 except ImportError:
     CELERY_AVAILABLE = False
     download_audio_task = None
 
+# Maximum number of URLs accepted by the batch endpoint
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
+
+# Status stream settings
+STATUS_STREAM_HEARTBEAT = float(os.getenv("STATUS_STREAM_HEARTBEAT", "15"))  # seconds between keep-alives
+STATUS_STREAM_TIMEOUT = float(os.getenv("STATUS_STREAM_TIMEOUT", "1800"))  # max stream lifetime
+
+# Longest a status request may be held waiting for a change (?wait=N)
+LONG_POLL_MAX_WAIT = float(os.getenv("LONG_POLL_MAX_WAIT", "60"))
+
+# Statuses after which a task no longer changes
+FINAL_STATUSES = (TaskStatus.COMPLETED.value, TaskStatus.FAILED.value, TaskStatus.EXPIRED.value)
+
 router = APIRouter()
 
-# Check Redis connection on startup
-if not check_redis_connection():
-    print("WARNING: Redis connection failed. Make sure Redis is running.")
+# Errors that mean Redis itself is unreachable (as opposed to bad data)
+REDIS_ERRORS = (redis.ConnectionError, redis.TimeoutError)
+
+def ensure_redis_available() -> None:
+    """
+    Fail fast with 503 while the Redis circuit breaker is open.
+    Uses the health monitor's cached state instead of a PING per request.
+    """
+    if not redis_health.allow_request():
+        raise HTTPException(status_code=503, detail="Queue service unavailable")
+
+def redis_unavailable(task_id: str, error: Exception) -> HTTPException:
+    """Record a Redis failure with the circuit breaker and build the 503 response"""
+    redis_health.record_failure()
+    logging.error(f"Redis unavailable while handling {task_id}: {str(error)}")
+    return HTTPException(status_code=503, detail="Queue service unavailable")
 
 @router.post("/download", response_model=DownloadResponse)
 async def download_video(request: DownloadRequest):
@@ -39,11 +79,10 @@ async def download_video(request: DownloadRequest):
     Validates the URL using YouTube Data API and creates a task in Redis for processing.
     """
     # Make sure Redis is available
-    if not check_redis_connection():
-        raise HTTPException(status_code=503, detail="Queue service unavailable")
+    ensure_redis_available()
     
-    # Validate URL with YouTube Data API
-    is_valid, error_message, video_data = validate_youtube_url(request.url)
+    # Validate URL with YouTube Data API (off the event loop)
+    is_valid, error_message, video_data = await validate_youtube_url_async(request.url)
     
     if not is_valid:
         raise HTTPException(status_code=400, detail=error_message or "Invalid YouTube URL")
@@ -64,53 +103,320 @@ async def download_video(request: DownloadRequest):
         "created_at": int(time.time())  # Unix timestamp
     }
     
-    # Store task using RedisTaskManager with video metadata
-    RedisTaskManager.create_task(
-        task_id, 
-        request.url,
-        title=video_data.get("title", "Untitled Video"),
-        channel=video_data.get("channel", "Unknown Channel"),
-        thumbnail=video_data.get("thumbnail")
-    )
+    # Store task using AsyncRedisTaskManager with video metadata
+    try:
+        await AsyncRedisTaskManager.create_task(
+            task_id, 
+            request.url,
+            title=video_data.get("title", "Untitled Video"),
+            channel=video_data.get("channel", "Unknown Channel"),
+            thumbnail=video_data.get("thumbnail"),
+            video_id=video_data.get("id")
+        )
+        redis_health.record_success()
+    except REDIS_ERRORS as e:
+        raise redis_unavailable(task_id, e)
     
     # Start Celery task for processing if available
     if CELERY_AVAILABLE and download_audio_task:
         download_audio_task.delay(task_id, request.url)
     else:
         # Fallback message if Celery is not available
-        RedisTaskManager.update_task(
+        await AsyncRedisTaskManager.update_task(
             task_id,
             message="Task queued (Celery worker required for processing)"
         )
     
     return DownloadResponse(taskId=task_id, status=TaskStatus.PENDING.value)
 
+@router.post("/download/batch", response_model=BatchDownloadResponse)
+async def download_batch(request: BatchDownloadRequest):
+    """
+    Accepts a list of YouTube URLs and returns one task ID per valid URL.
+    Video lookups are coalesced into videos.list calls of up to 50 IDs, all
+    tasks are written in one Redis pipeline and queued as one Celery group.
+    """
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="At least one URL is required")
+    if len(request.urls) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {MAX_BATCH_SIZE} URLs")
+    
+    # Make sure Redis is available
+    ensure_redis_available()
+    
+    # Validate all URLs with coalesced YouTube Data API lookups
+    results = await validate_youtube_urls_async(request.urls)
+    
+    items = []
+    new_tasks = []
+    for url, (is_valid, error_message, video_data) in zip(request.urls, results):
+        if not is_valid:
+            items.append(BatchDownloadItem(
+                url=url,
+                status=TaskStatus.FAILED.value,
+                error=error_message or "Invalid YouTube URL"
+            ))
+            continue
+        
+        task_id = f"task-{uuid.uuid4().hex[:8]}"
+        new_tasks.append({
+            "task_id": task_id,
+            "youtube_url": url,
+            "title": video_data.get("title", "Untitled Video"),
+            "channel": video_data.get("channel", "Unknown Channel"),
+            "thumbnail": video_data.get("thumbnail"),
+            "video_id": video_data.get("id")
+        })
+        items.append(BatchDownloadItem(url=url, taskId=task_id, status=TaskStatus.PENDING.value))
+    
+    if not new_tasks:
+        return BatchDownloadResponse(tasks=items)
+    
+    # Store all tasks in a single pipelined round trip
+    try:
+        await AsyncRedisTaskManager.create_tasks(new_tasks)
+        redis_health.record_success()
+    except REDIS_ERRORS as e:
+        raise redis_unavailable("batch", e)
+    
+    # Publish all Celery messages together over one broker connection
+    if CELERY_AVAILABLE and download_audio_task:
+        job = group(download_audio_task.s(task["task_id"], task["youtube_url"]) for task in new_tasks)
+        await run_in_threadpool(job.apply_async)
+    
+    return BatchDownloadResponse(tasks=items)
+
+async def get_bulk_status(task_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Fetch and shape the status of many tasks with one pipelined Redis round trip.
+    
+    Args:
+        task_ids: Task identifiers
+        
+    Returns:
+        list: Status response fields for each task, in request order
+    """
+    if not task_ids:
+        raise HTTPException(status_code=400, detail="At least one task ID is required")
+    if len(task_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} task IDs may be requested at once")
+    
+    # Fail fast while Redis is known to be down
+    ensure_redis_available()
+    
+    try:
+        tasks = await AsyncRedisTaskManager.get_tasks(task_ids)
+        redis_health.record_success()
+    except REDIS_ERRORS as e:
+        raise redis_unavailable("bulk status", e)
+    
+    responses = []
+    for task_id, task_data in zip(task_ids, tasks):
+        if not task_data:
+            responses.append({"taskId": task_id, "status": "not_found", "error": f"Task {task_id} not found"})
+            continue
+        responses.append(await build_status_response(task_id, task_data))
+    
+    return responses
+
+@router.get("/status", response_model=List[TaskStatusResponse])
+async def get_task_statuses(ids: str = Query(..., description="Comma-separated task IDs")):
+    """
+    Check the status of several conversion tasks at once.
+    Unknown task IDs are returned with status "not_found".
+    """
+    task_ids = [task_id.strip() for task_id in ids.split(",") if task_id.strip()]
+    return await get_bulk_status(task_ids)
+
+@router.post("/status", response_model=List[TaskStatusResponse])
+async def post_task_statuses(request: BulkStatusRequest):
+    """
+    Check the status of several conversion tasks at once (IDs in the request body).
+    Unknown task IDs are returned with status "not_found".
+    """
+    return await get_bulk_status(request.ids)
+
+def task_etag(task_data: Dict[str, Any]) -> str:
+    """Weak ETag for a task record, derived from its version counter"""
+    return f'W/"{task_data.get("version", 0)}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+async def wait_for_task_change(task_id: str, version: Optional[int], timeout: float) -> Dict[str, Any]:
+    """
+    Hold until a task's version moves past the given one, or the timeout expires.
+    
+    Args:
+        task_id: Task identifier
+        version: Version the client already has
+        timeout: Maximum time to wait in seconds
+        
+    Returns:
+        dict: Latest task data (unchanged if nothing happened before the timeout)
+    """
+    # Subscribe before re-reading so no update falls in between
+    queue = task_events.subscribe(task_id)
+    try:
+        task_data = await AsyncRedisTaskManager.get_task(task_id)
+        deadline = time.monotonic() + timeout
+        
+        while task_data and task_data.get("version") == version:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            task_data = await AsyncRedisTaskManager.get_task(task_id)
+        
+        return task_data
+    finally:
+        task_events.unsubscribe(task_id, queue)
+
 @router.get("/status/{task_id}", response_model=TaskStatusResponse)
-async def get_task_status(task_id: str):
+async def get_task_status(
+    task_id: str,
+    response: Response,
+    wait: Optional[float] = Query(None, ge=0, description="Seconds to hold the request until the task changes"),
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Check the status of a conversion task.
     Retrieves task data from Redis.
+    
+    Responses carry an ETag derived from the task's version. A matching
+    If-None-Match is answered with 304; combined with ?wait=N the request
+    is held until the task changes or N seconds pass.
     """
+    # Fail fast while Redis is known to be down
+    ensure_redis_available()
+    
     try:
-        # Ensure Redis connection
-        if not check_redis_connection():
-            raise HTTPException(status_code=503, detail="Queue service unavailable")
-        
         # Get task from Redis
-        task_data = RedisTaskManager.get_task(task_id)
-        
-        # If task doesn't exist
-        if not task_data:
-            raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+        task_data = await AsyncRedisTaskManager.get_task(task_id)
+        redis_health.record_success()
+    except REDIS_ERRORS as e:
+        raise redis_unavailable(task_id, e)
     except Exception as e:
         # Handle and log any unexpected errors
-        import logging
         logging.error(f"Error retrieving task status for {task_id}: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Server error while retrieving task status: {str(e)}"
         )
     
+    # If task doesn't exist
+    if not task_data:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    
+    etag = task_etag(task_data)
+    
+    if etag_matches(if_none_match, etag):
+        # Long-poll: hold the request until the task changes
+        if wait and task_data.get("status") not in FINAL_STATUSES:
+            try:
+                task_data = await wait_for_task_change(task_id, task_data.get("version"), min(wait, LONG_POLL_MAX_WAIT))
+            except REDIS_ERRORS as e:
+                raise redis_unavailable(task_id, e)
+            
+            if not task_data:
+                raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+            etag = task_etag(task_data)
+        
+        # Client already has this version
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return await build_status_response(task_id, task_data)
+
+@router.get("/status/{task_id}/stream")
+async def stream_task_status(task_id: str):
+    """
+    Stream status updates for a conversion task as Server-Sent Events.
+    Sends the current status immediately, then one event per state change
+    published by the workers, and closes once the task is finished.
+    """
+    # Fail fast while Redis is known to be down
+    ensure_redis_available()
+    
+    # Subscribe before reading the task so no update falls in between
+    queue = task_events.subscribe(task_id)
+    
+    try:
+        task_data = await AsyncRedisTaskManager.get_task(task_id)
+        redis_health.record_success()
+    except REDIS_ERRORS as e:
+        task_events.unsubscribe(task_id, queue)
+        raise redis_unavailable(task_id, e)
+    
+    if not task_data:
+        task_events.unsubscribe(task_id, queue)
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    
+    async def event_stream():
+        nonlocal task_data
+        deadline = time.monotonic() + STATUS_STREAM_TIMEOUT
+        
+        try:
+            payload = await build_status_response(task_id, task_data)
+            yield f"data: {json.dumps(payload)}\n\n"
+            
+            while payload["status"] not in FINAL_STATUSES and time.monotonic() < deadline:
+                try:
+                    update = await asyncio.wait_for(queue.get(), timeout=STATUS_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Keep proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if update is None:
+                    # Updates may have been missed, re-read the whole task
+                    task_data = await AsyncRedisTaskManager.get_task(task_id)
+                    if not task_data:
+                        # Expired or deleted meanwhile; end the stream with a final status
+                        payload = {
+                            "taskId": task_id,
+                            "status": TaskStatus.FAILED.value,
+                            "error": f"Task {task_id} not found"
+                        }
+                        yield f"data: {json.dumps(payload)}\n\n"
+                        break
+                else:
+                    task_data.update(parse_task_data(update))
+                
+                payload = await build_status_response(task_id, task_data)
+                yield f"data: {json.dumps(payload)}\n\n"
+        finally:
+            task_events.unsubscribe(task_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable nginx response buffering
+        }
+    )
+
+async def build_status_response(task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shape task data from Redis into a TaskStatusResponse payload.
+    
+    Args:
+        task_id: Task identifier
+        task_data: Task data from AsyncRedisTaskManager.get_task
+        
+    Returns:
+        dict: Status response fields
+    """
     # Construct the response
     response = {
         "taskId": task_id,
@@ -119,26 +425,23 @@ async def get_task_status(task_id: str):
         "message": task_data.get("message", "Task is queued for processing"),
         "title": task_data.get("title"),
         "channel": task_data.get("channel"),
-        "thumbnail": task_data.get("thumbnail")
+        "thumbnail": task_data.get("thumbnail"),
+        "version": task_data.get("version")
     }
     
     # If task is completed, add file metadata
     if task_data.get("status") == TaskStatus.COMPLETED.value:
-        # Check if we already have file metadata
-        file_metadata = task_data.get("file_metadata", {})
-        
-        # If not, try to get it now
-        if not file_metadata:
-            file_path = get_file_for_task(task_id)
-            if file_path:
-                file_metadata = get_file_metadata(file_path)
-                # Save metadata for future requests
-                if file_metadata:
-                    RedisTaskManager.update_task(task_id, file_metadata=file_metadata)
+        # File metadata is recorded when the conversion completes, so status
+        # never touches the filesystem
+        file_metadata = task_data.get("file_metadata") or {}
         
         # Add file metadata to response
         response["fileSize"] = file_metadata.get("file_size", 0)
         response["fileSizeFormatted"] = file_metadata.get("file_size_formatted", "Unknown size")
+        response["duration"] = file_metadata.get("duration")
+        response["bitrate"] = file_metadata.get("bitrate")
+        response["codec"] = file_metadata.get("codec")
+        response["sampleRate"] = file_metadata.get("sample_rate")
         response["downloadUrl"] = f"/api/download/{task_id}"
         response["downloadCount"] = task_data.get("download_count", 0)
         
@@ -168,25 +471,38 @@ async def get_task_status(task_id: str):
     
     return response
 
-@router.get("/download/{task_id}")
-async def download_file(task_id: str):
+@router.api_route("/download/{task_id}", methods=["GET", "HEAD"])
+async def download_file(
+    task_id: str,
+    request: Request,
+    stream: bool = Query(False, description="Start sending the MP3 while it is still being converted")
+):
     """
     Download the converted MP3 file.
-    Uses file_service to retrieve and serve the MP3 file.
+    Uses file_service to retrieve and serve the MP3 file, with support for
+    Range requests (seeking, resumed downloads) and conditional requests.
+    
+    With ?stream=1 a task that is still in progress is streamed (chunked)
+    as the converter writes it, instead of failing until it completes.
     """
-    # Ensure Redis connection
-    if not check_redis_connection():
-        raise HTTPException(status_code=503, detail="Queue service unavailable")
+    # Fail fast while Redis is known to be down
+    ensure_redis_available()
     
     try:
         # Serve the file using file_service
-        return serve_file(task_id)
+        if stream:
+            response = await serve_progressive_file(task_id, request)
+        else:
+            response = await serve_file(task_id, request)
+        redis_health.record_success()
+        return response
     except HTTPException:
         # Re-raise HTTPException from file service
         raise
+    except REDIS_ERRORS as e:
+        raise redis_unavailable(task_id, e)
     except Exception as e:
         # Log and return error
-        import logging
         logging.error(f"Error serving file for task {task_id}: {str(e)}")
         raise HTTPException(
             status_code=500, 
@@ -13,6 +13,11 @@ import logging
 
 # Import Redis task manager
 from shared.redis_client import RedisTaskManager, TaskStatus
+from shared.storage_layout import incoming_path
+from shared.content_store import ContentStore, hash_file
+from shared.expiry_index import ExpiryIndex
+from shared.progress_reporter import ProgressReporter
+from shared.file_metadata import get_file_metadata, probe_audio
 
 # Load environment variables
 load_dotenv()
@@ -43,7 +48,31 @@ def check_ffmpeg_installed():
         logger.error("ffmpeg not found. Please install ffmpeg and make sure it's in your PATH.")
         return False
 
-def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str], Optional[str]]:
+def finalize_output(task_id: str, staging_path: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Describe a finished output and move it into the content store.
+    The metadata is stored on the task, so status and download requests
+    never need to stat or probe the file.
+    
+    Args:
+        task_id: Task ID
+        staging_path: Path to the finished output in the staging area
+        
+    Returns:
+        tuple: (stored location, file metadata)
+    """
+    file_metadata = get_file_metadata(staging_path)
+    file_metadata.update(probe_audio(staging_path))
+    
+    digest = hash_file(staging_path)
+    location = ContentStore.ingest(task_id, staging_path, digest=digest)
+    ExpiryIndex.schedule(ExpiryIndex.OUTPUTS, location)
+    
+    file_metadata["sha256"] = digest
+    file_metadata["filename"] = os.path.basename(location)
+    return location, file_metadata
+
+def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str], Optional[str], Optional[Dict[str, Any]]]:
     """
     Convert audio file to MP3 format using ffmpeg.
     
@@ -52,7 +81,7 @@ def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str],
         input_file: Path to the input audio file
         
     Returns:
-        tuple: (success, output_path, error_message)
+        tuple: (success, output_path, error_message, file_metadata)
     """
     try:
         # Check if ffmpeg is installed
@@ -67,10 +96,10 @@ def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str],
             message="Initializing conversion..."
         )
         
-        # Generate output filename
-        input_filename = os.path.basename(input_file)
-        output_filename = os.path.splitext(input_filename)[0] + ".mp3"
-        output_path = os.path.join(STORAGE_DIR, output_filename)
+        # Write to a per-task staging file; it moves into the content store when done
+        output_path = incoming_path(task_id)
+        # Left behind only if the conversion fails
+        ExpiryIndex.schedule(ExpiryIndex.TEMP, output_path)
         
         # Make sure output directory exists
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -80,14 +109,19 @@ def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str],
             logger.info(f"Input file is already MP3, copying to output: {output_path}")
             shutil.copy2(input_file, output_path)
             
+            # Store under the content hash, sharing identical outputs
+            output_path, file_metadata = finalize_output(task_id, output_path)
+            
             RedisTaskManager.update_task(
                 task_id,
                 status=TaskStatus.COMPLETED.value,
                 progress=100,
-                message="File copied successfully (already MP3)"
+                message="File copied successfully (already MP3)",
+                file_path=output_path,
+                file_metadata=file_metadata
             )
             
-            return True, output_path, None
+            return True, output_path, None, file_metadata
         
         # Start time for progress calculation
         start_time = time.time()
@@ -123,7 +157,6 @@ def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str],
             "-i", input_file,
             "-codec:a", "libmp3lame",  # Use MP3 codec
             "-q:a", "2",               # VBR quality setting (0-9, lower is better)
-            "-metadata", f"task_id={task_id}",
             "-y",                      # Overwrite output file if it exists
             output_path
         ]
@@ -138,9 +171,10 @@ def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str],
             universal_newlines=True
         )
         
-        # Track progress
+        # Track progress; ffmpeg prints several lines a second, the reporter
+        # writes at most one update per PROGRESS_FLUSH_INTERVAL_MS
         current_time = 0
-        progress_updates = 0
+        reporter = ProgressReporter(task_id)
         
         # Process ffmpeg output to track progress
         while True:
@@ -164,16 +198,12 @@ def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str],
                 else:
                     progress = 50  # Default to 50% if we don't know the duration
                     
-                # Only update Redis every 5% or at most every 3 seconds
-                if progress_updates % 3 == 0 or progress >= 100:
-                    RedisTaskManager.update_task(
-                        task_id,
-                        status=TaskStatus.CONVERTING.value,
-                        progress=progress,
-                        message=f"Converting to MP3... {progress:.1f}%"
-                    )
-                    
-                progress_updates += 1
+                reporter.report(
+                    status=TaskStatus.CONVERTING.value,
+                    progress=progress,
+                    message=f"Converting to MP3... {progress:.1f}%",
+                    force=progress >= 100
+                )
         
         # Wait for process to complete
         process.wait()
@@ -186,13 +216,17 @@ def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str],
         # Calculate total conversion time
         elapsed = time.time() - start_time
         
+        # Store under the content hash, sharing identical outputs
+        output_path, file_metadata = finalize_output(task_id, output_path)
+        
         # Update task status
         RedisTaskManager.update_task(
             task_id,
             status=TaskStatus.COMPLETED.value,
             progress=100,
             message=f"Conversion completed in {elapsed:.1f} seconds",
-            file_path=output_path
+            file_path=output_path,
+            file_metadata=file_metadata
         )
         
         # Remove the input file to save space
@@ -201,7 +235,7 @@ def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str],
         except Exception as e:
             logger.warning(f"Failed to remove input file {input_file}: {str(e)}")
         
-        return True, output_path, None
+        return True, output_path, None, file_metadata
     
     except Exception as e:
         error_message = f"Conversion error: {str(e)}"
@@ -214,4 +248,4 @@ def convert_to_mp3(task_id: str, input_file: str) -> Tuple[bool, Optional[str],
             error=error_message
         )
         
-        return False, None, error_message
+        return False, None, error_message, None
@@ -8,6 +8,8 @@ import logging
 from celery import current_task
 from shared.celery_app import celery_app
 from shared.redis_client import RedisTaskManager, TaskStatus
+from shared.result_index import finish_leader, fail_leader
+from shared.file_index import TaskFileIndex
 from conversion_service.converter import convert_to_mp3
 
 # Configure logging
@@ -38,7 +40,7 @@ def convert_to_mp3_task(self, task_id: str, audio_file: str):
         )
         
         # Perform the conversion
-        success, mp3_file, error = convert_to_mp3(task_id, audio_file)
+        success, mp3_file, error, file_metadata = convert_to_mp3(task_id, audio_file)
         
         if not success or not mp3_file:
             error_msg = error or "Conversion failed"
@@ -50,6 +52,7 @@ def convert_to_mp3_task(self, task_id: str, audio_file: str):
                 status=TaskStatus.FAILED.value,
                 error=error_msg
             )
+            fail_leader(task_id, error_msg)
             
             return {"success": False, "error": error_msg}
         
@@ -63,6 +66,10 @@ def convert_to_mp3_task(self, task_id: str, audio_file: str):
             message="Conversion completed successfully!",
             file_path=mp3_file
         )
+        TaskFileIndex.record(task_id, mp3_file)
+        
+        # Index the output for reuse and complete tasks waiting on this video (sharing its metadata)
+        finish_leader(task_id, mp3_file, file_metadata)
         
         # Chain to cleanup task to remove temporary files
         from file_service.cleanup import cleanup_task
@@ -80,6 +87,7 @@ def convert_to_mp3_task(self, task_id: str, audio_file: str):
             status=TaskStatus.FAILED.value,
             error=error_msg
         )
+        fail_leader(task_id, error_msg)
         
         return {"success": False, "error": error_msg}
 
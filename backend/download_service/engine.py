@@ -0,0 +1,317 @@
+"""
+yt-dlp download engine.
+Runs yt-dlp in the worker process instead of spawning the CLI per download:
+yt_dlp is imported once per worker process (before the Celery pool forks),
+and every download gets its own YoutubeDL instance built from the same
+argument list the CLI would receive, so options, headers, output templates
+and hooks never leak between tasks. In-process runs are cut off at their
+timeout by SIGALRM wherever they block, so they only run on the main thread;
+elsewhere the CLI, which can be killed, is used. The CLI remains available
+as a fallback when the library is missing, crashes or hits one of the
+extraction errors the embedded copy is known for (e.g. "Precondition check
+failed"). Other download errors (private or removed videos, blocked clients)
+are returned as they are, since the CLI would only repeat them.
+"""
+
+import os
+import json
+import time
+import signal
+import logging
+import threading
+import subprocess
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List, NamedTuple, Optional
+from dotenv import load_dotenv
+
+# The library is optional: without it every download uses the CLI
+try:
+    import yt_dlp
+    from yt_dlp.utils import DownloadCancelled, DownloadError
+    YTDLP_AVAILABLE = True
+except ImportError:
+    YTDLP_AVAILABLE = False
+
+# Load environment variables
+load_dotenv()
+
+# "library" (in-process, falling back to the CLI) or "cli" (always spawn yt-dlp)
+YTDLP_ENGINE = os.getenv("YTDLP_ENGINE", "library").lower()
+
+# Retry a download with the CLI when the in-process library crashes or hits a library error
+YTDLP_CLI_FALLBACK = os.getenv("YTDLP_CLI_FALLBACK", "true").lower() == "true"
+
+# After the CLI succeeds where the library failed, use the CLI for this long
+YTDLP_LIBRARY_COOLDOWN = int(os.getenv("YTDLP_LIBRARY_COOLDOWN", "600"))
+
+# Seconds an in-process download waits on a silent connection (unless --socket-timeout is given)
+YTDLP_SOCKET_TIMEOUT = float(os.getenv("YTDLP_SOCKET_TIMEOUT", "30"))
+
+# Extraction errors of the embedded library that the CLI is known to get past (lowercase)
+LIBRARY_ERROR_MARKERS = (
+    "precondition check failed",
+    "signature extraction failed",
+    "nsig extraction failed",
+)
+
+# Lines of CLI output kept for the error message (the rest is discarded as it is read)
+CLI_OUTPUT_TAIL_LINES = 50
+
+# Progress lines the CLI prints for each progress hook call, one JSON object per line
+CLI_PROGRESS_PREFIX = "ytmp3-progress "
+CLI_PROGRESS_TEMPLATE = (
+    f"download:{CLI_PROGRESS_PREFIX}"
+    "%(progress.{status,downloaded_bytes,total_bytes,total_bytes_estimate,speed,eta,elapsed})j"
+)
+
+logger = logging.getLogger("ytdlp_engine")
+
+# Monotonic time until which this process skips the library
+_library_disabled_until = 0.0
+
+class YtdlpResult(NamedTuple):
+    """Outcome of one yt-dlp run"""
+    success: bool
+    error: Optional[str]
+    engine: str
+
+class _CollectingLogger:
+    """yt-dlp logger that keeps error messages for the caller"""
+
+    def __init__(self):
+        self.errors: List[str] = []
+
+    def debug(self, msg: str) -> None:
+        logger.debug(msg)
+
+    def info(self, msg: str) -> None:
+        logger.debug(msg)
+
+    def warning(self, msg: str) -> None:
+        logger.warning(msg)
+
+    def error(self, msg: str) -> None:
+        self.errors.append(msg)
+        logger.error(msg)
+
+class _LibraryDeadline(BaseException):
+    """Raised into an in-process run at its deadline; not an Exception, so yt-dlp cannot swallow it"""
+
+def _can_interrupt() -> bool:
+    """Whether _deadline works here: signals only reach the main thread (where prefork Celery workers run tasks)"""
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+@contextmanager
+def _deadline(timeout: float):
+    """
+    Interrupt the enclosed code after timeout seconds, wherever it is blocked
+
+    Raises:
+        _LibraryDeadline: When the deadline passes
+    """
+    def on_alarm(signum, frame):
+        raise _LibraryDeadline()
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def is_library_error(error: Optional[str]) -> bool:
+    """
+    Whether a failed in-process download is worth retrying with the CLI
+
+    Args:
+        error: yt-dlp error output
+
+    Returns:
+        bool: True for the library-specific extraction errors in LIBRARY_ERROR_MARKERS
+    """
+    if not error:
+        return False
+    error = error.lower()
+    return any(marker in error for marker in LIBRARY_ERROR_MARKERS)
+
+def library_enabled() -> bool:
+    """Whether the next download runs in-process (only where it can be cut off at its timeout)"""
+    return (
+        YTDLP_ENGINE != "cli"
+        and YTDLP_AVAILABLE
+        and _can_interrupt()
+        and time.monotonic() >= _library_disabled_until
+    )
+
+def _run_library(args: List[str], url: str, cwd: str, timeout: float,
+                 progress_hooks: List[Callable[[Dict[str, Any]], None]]) -> YtdlpResult:
+    """
+    Run one download with the in-process library
+
+    Raises:
+        subprocess.TimeoutExpired: If the download runs past the timeout
+    """
+    deadline = time.monotonic() + timeout
+
+    def enforce_timeout(d: Dict[str, Any]) -> None:
+        # Cancels cleanly between chunks; _deadline covers everything else
+        if time.monotonic() > deadline:
+            raise DownloadCancelled(f"Download took longer than {timeout:.0f} seconds")
+
+    # Same option parsing as the CLI, into fresh dicts for this task only
+    ydl_opts = yt_dlp.parse_options([*args, url]).ydl_opts
+    collector = _CollectingLogger()
+    ydl_opts.update({
+        "logger": collector,
+        "quiet": True,
+        "noprogress": True,
+        "progress_hooks": [enforce_timeout, *progress_hooks],
+        # Relative output templates resolve against the task directory, as with cwd= for the CLI
+        "paths": {**(ydl_opts.get("paths") or {}), "home": cwd},
+    })
+    # A stalled connection must fail instead of blocking the worker
+    if not ydl_opts.get("socket_timeout"):
+        ydl_opts["socket_timeout"] = YTDLP_SOCKET_TIMEOUT
+
+    try:
+        # Bounds the whole run, including extraction before the first progress event
+        with _deadline(timeout):
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                retcode = ydl.download([url])
+    except (DownloadCancelled, _LibraryDeadline):
+        raise subprocess.TimeoutExpired(["yt-dlp", url], timeout)
+    except DownloadError as e:
+        return YtdlpResult(False, str(e), "library")
+
+    if retcode != 0:
+        return YtdlpResult(False, "\n".join(collector.errors) or f"yt-dlp exited with code {retcode}", "library")
+    return YtdlpResult(True, None, "library")
+
+def _parse_progress_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Turn a CLI progress line into a progress hook dict
+
+    Args:
+        line: Line of CLI output
+
+    Returns:
+        dict: Progress fields (missing ones left out), or None for other output
+    """
+    if not line.startswith(CLI_PROGRESS_PREFIX):
+        return None
+    try:
+        progress = json.loads(line[len(CLI_PROGRESS_PREFIX):])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(progress, dict) or "status" not in progress:
+        return None
+    return {key: value for key, value in progress.items() if value is not None}
+
+def _run_cli(args: List[str], url: str, cwd: str, timeout: float,
+             progress_hooks: List[Callable[[Dict[str, Any]], None]]) -> YtdlpResult:
+    """
+    Run one download with the yt-dlp CLI, feeding its progress to the hooks as it runs
+
+    Raises:
+        subprocess.TimeoutExpired: If the process runs past the timeout
+    """
+    cmd = ["yt-dlp", "--newline", "--progress-template", CLI_PROGRESS_TEMPLATE, *args, url]
+    process = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,  # one pipe, read line by line, so neither can fill up
+        text=True,
+        errors="replace",
+        bufsize=1
+    )
+
+    timed_out = threading.Event()
+
+    def kill_on_timeout():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill_on_timeout)
+    timer.daemon = True
+    timer.start()
+
+    # Only the end of the output is kept, for the error message
+    output_tail = deque(maxlen=CLI_OUTPUT_TAIL_LINES)
+    try:
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            progress = _parse_progress_line(line)
+            if progress is None:
+                output_tail.append(line)
+                continue
+            for hook in progress_hooks:
+                try:
+                    hook(progress)
+                except Exception as e:
+                    logger.error(f"Progress hook failed: {str(e)}")
+        process.wait()
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    if process.returncode != 0:
+        return YtdlpResult(False, "\n".join(output_tail), "cli")
+    return YtdlpResult(True, None, "cli")
+
+def run_ytdlp(args: List[str], url: str, cwd: str, timeout: float = 300,
+              progress_hooks: Optional[List[Callable[[Dict[str, Any]], None]]] = None) -> YtdlpResult:
+    """
+    Download a URL with yt-dlp
+
+    Args:
+        args: yt-dlp command line options (without the program name and URL)
+        url: URL to download
+        cwd: Task directory the download runs in
+        timeout: Maximum download time in seconds
+        progress_hooks: yt-dlp progress hooks (CLI downloads call them with
+                        status, byte counts, speed and ETA parsed from its output)
+
+    Returns:
+        YtdlpResult: Whether the download succeeded, the error output, and the engine used
+
+    Raises:
+        subprocess.TimeoutExpired: If the download runs past the timeout
+    """
+    global _library_disabled_until
+
+    progress_hooks = progress_hooks or []
+
+    if not library_enabled():
+        return _run_cli(args, url, cwd, timeout, progress_hooks)
+
+    try:
+        result = _run_library(args, url, cwd, timeout, progress_hooks)
+    except subprocess.TimeoutExpired:
+        raise
+    except Exception as e:
+        # Anything else is a problem of the embedded library, not of the download
+        logger.error(f"In-process yt-dlp crashed: {str(e)}")
+        result = YtdlpResult(False, str(e), "library")
+    else:
+        # Other download errors (video unavailable, client blocked) would fail the same way in the CLI
+        if result.success or not is_library_error(result.error):
+            return result
+
+    if not YTDLP_CLI_FALLBACK:
+        return result
+
+    logger.warning(f"In-process yt-dlp failed, retrying with the CLI: {(result.error or '')[:200]}")
+    cli_result = _run_cli(args, url, cwd, timeout, progress_hooks)
+    if cli_result.success:
+        # The library copy is the problem (e.g. older than the CLI); stop paying for failed attempts
+        _library_disabled_until = time.monotonic() + YTDLP_LIBRARY_COOLDOWN
+        logger.warning(f"yt-dlp CLI succeeded where the library failed, using the CLI for {YTDLP_LIBRARY_COOLDOWN} seconds")
+    return cli_result
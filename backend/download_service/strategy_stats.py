@@ -0,0 +1,221 @@
+"""
+Adaptive ordering of yt-dlp client strategies.
+Every attempt records its outcome and duration per strategy in Redis
+(ytdlp_strategy:{name}), with counts decaying by half every
+STRATEGY_STATS_HALF_LIFE seconds so the ranking follows what YouTube
+currently allows. Each download tries strategies in order of success
+probability per second of expected attempt time. A strategy that keeps
+failing is skipped until STRATEGY_PROBE_INTERVAL has passed, after which a
+single download probes it first to find out whether it works again.
+"""
+
+import os
+import time
+import logging
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+from shared.redis_client import redis_client
+
+# Load environment variables
+load_dotenv()
+
+# Seconds after which past outcomes count half as much
+STRATEGY_STATS_HALF_LIFE = float(os.getenv("STRATEGY_STATS_HALF_LIFE", "3600"))
+
+# Consecutive failures after which a strategy is skipped
+STRATEGY_SKIP_AFTER = int(os.getenv("STRATEGY_SKIP_AFTER", "3"))
+
+# Seconds between probes of a skipped strategy
+STRATEGY_PROBE_INTERVAL = int(os.getenv("STRATEGY_PROBE_INTERVAL", "300"))
+
+# Attempt time assumed for strategies without measurements
+DEFAULT_ATTEMPT_SECONDS = 30.0
+
+# Weight of the newest attempt in the latency average
+LATENCY_ALPHA = 0.3
+
+# yt-dlp errors caused by the video itself, not by the client strategy (lowercase)
+VIDEO_ERROR_MARKERS = (
+    "private video",
+    "video unavailable",
+    "this video has been removed",
+    "sign in to confirm your age",
+    "available in your country",
+    "members-only",
+    "join this channel",
+    "premieres in",
+    "this live event will begin",
+)
+
+STATS_PREFIX = "ytdlp_strategy:"
+PROBE_PREFIX = "ytdlp_strategy_probe:"
+STATS_TTL = 7 * 24 * 3600
+
+logger = logging.getLogger("strategy_stats")
+
+# Decay the counts to now, then add one attempt - atomically across workers
+_RECORD_SCRIPT = redis_client.register_script("""
+local now = tonumber(ARGV[1])
+local ok = ARGV[2] == '1'
+local latency = tonumber(ARGV[3])
+local stats = redis.call('HMGET', KEYS[1], 'success', 'failure', 'latency', 'updated_at')
+local success = tonumber(stats[1]) or 0
+local failure = tonumber(stats[2]) or 0
+local updated_at = tonumber(stats[4]) or now
+local decay = 0.5 ^ (math.max(0, now - updated_at) / tonumber(ARGV[4]))
+success = success * decay
+failure = failure * decay
+if ok then
+    success = success + 1
+    redis.call('HSET', KEYS[1], 'consecutive_failures', 0)
+else
+    failure = failure + 1
+    -- Once failing, the next probe waits a full interval (also after a failed probe)
+    if redis.call('HINCRBY', KEYS[1], 'consecutive_failures', 1) >= tonumber(ARGV[7]) then
+        redis.call('SET', KEYS[2], 1, 'EX', ARGV[8])
+    end
+end
+local average = tonumber(stats[3])
+if average then
+    average = average + tonumber(ARGV[5]) * (latency - average)
+else
+    average = latency
+end
+redis.call('HSET', KEYS[1], 'success', tostring(success), 'failure', tostring(failure),
+           'latency', tostring(average), 'updated_at', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return 1
+""")
+
+class StrategyStats:
+    """Decayed per-strategy outcome and latency statistics"""
+
+    @staticmethod
+    def record(name: str, success: bool, latency: float) -> None:
+        """
+        Record one attempt of a strategy
+
+        Args:
+            name: Strategy name
+            success: Whether the download succeeded
+            latency: Duration of the attempt in seconds
+        """
+        _RECORD_SCRIPT(
+            keys=[f"{STATS_PREFIX}{name}", f"{PROBE_PREFIX}{name}"],
+            args=[time.time(), 1 if success else 0, latency, STRATEGY_STATS_HALF_LIFE, LATENCY_ALPHA, STATS_TTL,
+                  STRATEGY_SKIP_AFTER, STRATEGY_PROBE_INTERVAL]
+        )
+
+    @staticmethod
+    def load(names: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Read the statistics of several strategies in one round trip
+
+        Args:
+            names: Strategy names
+
+        Returns:
+            dict: Statistics by strategy name (empty for strategies never tried)
+        """
+        with redis_client.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.hgetall(f"{STATS_PREFIX}{name}")
+            results = pipe.execute()
+        return {
+            name: {field: float(value) for field, value in stats.items()}
+            for name, stats in zip(names, results)
+        }
+
+def is_video_error(error: Optional[str]) -> bool:
+    """
+    Whether a download error comes from the video (private, removed, age- or
+    geo-restricted) rather than from the strategy
+
+    Args:
+        error: yt-dlp error output
+
+    Returns:
+        bool: True if no strategy could have downloaded the video
+    """
+    if not error:
+        return False
+    error = error.lower()
+    return any(marker in error for marker in VIDEO_ERROR_MARKERS)
+
+def record_attempt(name: str, success: bool, latency: float, error: Optional[str] = None) -> None:
+    """
+    Record one attempt of a strategy, never failing the download over it
+
+    Args:
+        name: Strategy name
+        success: Whether the download succeeded
+        latency: Duration of the attempt in seconds
+        error: Error of a failed attempt; failures caused by the video are not recorded
+    """
+    if not success and is_video_error(error):
+        # Says nothing about the strategy, and must not get it skipped for everyone
+        return
+    try:
+        StrategyStats.record(name, success, latency)
+    except Exception as e:
+        logger.warning(f"Could not record attempt of strategy {name}: {str(e)}")
+
+def strategy_score(stats: Dict[str, float], now: float) -> float:
+    """
+    Expected successes per second of attempt time
+
+    Args:
+        stats: Statistics of one strategy
+        now: Current Unix time
+
+    Returns:
+        float: Score; higher is tried first
+    """
+    decay = 0.5 ** (max(0.0, now - stats.get("updated_at", now)) / STRATEGY_STATS_HALF_LIFE)
+    success = stats.get("success", 0.0) * decay
+    failure = stats.get("failure", 0.0) * decay
+    # One imagined success and failure keep untried and long-idle strategies near 50%
+    probability = (success + 1) / (success + failure + 2)
+    return probability / max(stats.get("latency", DEFAULT_ATTEMPT_SECONDS), 1.0)
+
+def _claim_probe(name: str) -> bool:
+    """Let one download per probe interval retry a skipped strategy"""
+    return bool(redis_client.set(f"{PROBE_PREFIX}{name}", 1, nx=True, ex=STRATEGY_PROBE_INTERVAL))
+
+def order_strategies(strategies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Order strategies best-first and drop the ones that are failing
+
+    Args:
+        strategies: Strategies with a 'name', in the configured order
+
+    Returns:
+        list: Strategies to try, in order (the configured order if Redis is unavailable)
+    """
+    try:
+        all_stats = StrategyStats.load([strategy['name'] for strategy in strategies])
+    except Exception as e:
+        logger.warning(f"Strategy statistics unavailable, using the configured order: {str(e)}")
+        return list(strategies)
+
+    now = time.time()
+    probes, ranked, skipped = [], [], []
+    for strategy in strategies:
+        stats = all_stats.get(strategy['name'], {})
+        if stats.get("consecutive_failures", 0) < STRATEGY_SKIP_AFTER:
+            ranked.append(strategy)
+        elif _claim_probe(strategy['name']):
+            probes.append(strategy)
+        else:
+            skipped.append(strategy)
+
+    # Stable sort: ties keep the configured order
+    ranked.sort(key=lambda strategy: strategy_score(all_stats.get(strategy['name'], {}), now), reverse=True)
+
+    if skipped:
+        logger.info(f"Skipping failing strategies: {', '.join(strategy['name'] for strategy in skipped)}")
+    if not probes and not ranked:
+        # Everything is failing: still try all of them rather than fail without trying
+        return list(strategies)
+    return probes + ranked
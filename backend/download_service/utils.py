@@ -1,5 +1,5 @@
 """
-Download utilities using yt-dlp CLI to extract audio from YouTube videos.
+Download utilities using yt-dlp to extract audio from YouTube videos.
 """
 
 import os
@@ -14,6 +14,9 @@ from dotenv import load_dotenv
 
 # Import Redis task manager
 from shared.redis_client import RedisTaskManager, TaskStatus
+from shared.expiry_index import ExpiryIndex
+from shared.progress_reporter import ProgressReporter
+from download_service.engine import run_ytdlp
 
 # Load environment variables
 load_dotenv()
@@ -99,18 +102,22 @@ def is_valid_audio_file(file_path: str) -> bool:
 class ProgressHook:
     """Progress hook for yt-dlp to update Redis task status"""
     
-    def __init__(self, task_id: str, celery_task=None):
+    def __init__(self, task_id: str, celery_task=None, start: float = 10, end: float = 50):
         self.task_id = task_id
         self.start_time = time.time()
-        self.celery_task = celery_task  # Celery task instance for progress updates
+        # Share of the total task progress the download fills
+        self.start = start
+        self.end = end
+        # Coalesces per-chunk progress into rate-limited writes (Redis and Celery state)
+        self.reporter = ProgressReporter(task_id, celery_task)
     
     def __call__(self, d: Dict[str, Any]):
         if d['status'] == 'downloading':
-            # Calculate download progress
-            if 'downloaded_bytes' in d and 'total_bytes' in d and d['total_bytes'] > 0:
-                progress = (d['downloaded_bytes'] / d['total_bytes']) * 100
-            elif 'downloaded_bytes' in d and 'total_bytes_estimate' in d and d['total_bytes_estimate'] > 0:
-                progress = (d['downloaded_bytes'] / d['total_bytes_estimate']) * 100
+            # Calculate download progress (sizes are missing or None when unknown)
+            downloaded = d.get('downloaded_bytes') or 0
+            total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+            if total > 0:
+                progress = min(downloaded / total, 1) * 100
             else:
                 progress = 0
                 
@@ -128,62 +135,40 @@ class ProgressHook:
             else:
                 eta_str = "calculating..."
             
-            # Scale progress to 10-50% of total task progress
-            scaled_progress = 10 + (progress * 0.4)
+            # Scale progress to the hook's share of total task progress
+            scaled_progress = self.start + progress * (self.end - self.start) / 100
             
-            # Update Redis with progress
+            # Buffer the update; it is written at most every PROGRESS_FLUSH_INTERVAL_MS
             message = f"Downloading... {progress:.1f}% at {speed_str}, ETA: {eta_str}"
-            RedisTaskManager.update_task(
-                self.task_id,
+            self.reporter.report(
                 status=TaskStatus.DOWNLOADING.value,
                 progress=int(scaled_progress),
                 message=message
             )
-            
-            # Update Celery task progress if available
-            if self.celery_task:
-                self.celery_task.update_state(
-                    state='PROGRESS',
-                    meta={'current': int(scaled_progress), 'total': 100, 'status': message}
-                )
         
         elif d['status'] == 'finished':
-            # Download completed, update Redis
+            # Download completed, write it right away
             elapsed = time.time() - self.start_time
-            RedisTaskManager.update_task(
-                self.task_id,
+            self.reporter.report(
                 status=TaskStatus.DOWNLOADING.value,
-                progress=50,
-                message=f"Download completed in {elapsed:.1f} seconds. Preparing for conversion..."
+                progress=self.end,
+                message=f"Download completed in {elapsed:.1f} seconds. Preparing for conversion...",
+                force=True
             )
-            
-            # Update Celery task progress if available
-            if self.celery_task:
-                self.celery_task.update_state(
-                    state='PROGRESS',
-                    meta={'current': 50, 'total': 100, 'status': 'Download completed'}
-                )
         
         elif d['status'] == 'error':
-            # Download error, update Redis
+            # Download error, write it right away
             error_msg = d.get('error', 'Unknown download error')
-            RedisTaskManager.update_task(
-                self.task_id,
+            self.reporter.report(
                 status=TaskStatus.FAILED.value,
-                error=error_msg
+                error=error_msg,
+                force=True
             )
-            
-            # Update Celery task if available
-            if self.celery_task:
-                self.celery_task.update_state(
-                    state='FAILURE',
-                    meta={'error': error_msg}
-                )
 
 
 def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Optional[str], Optional[str]]:
     """
-    Download audio from a YouTube URL using yt-dlp CLI.
+    Download audio from a YouTube URL using yt-dlp (in-process, or the CLI).
     
     Args:
         task_id: Task ID for progress tracking
@@ -205,13 +190,14 @@ def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Opti
         # Create a unique directory for this download
         task_dir = os.path.join(TEMP_DIR, task_id)
         os.makedirs(task_dir, exist_ok=True)
+        ExpiryIndex.schedule(ExpiryIndex.TEMP, task_dir)
         
         # Set up output filename template
         output_template = os.path.join(task_dir, "%(title)s.%(ext)s")
         
-        # Use yt-dlp CLI instead of Python library to avoid "Precondition check failed" errors
-        cmd = [
-            'yt-dlp',
+        # CLI options; the engine falls back to the CLI itself if the in-process
+        # library crashes or hits errors like "Precondition check failed"
+        ytdlp_args = [
             '--format', 'bestaudio/best',
             '--output', output_template,
             '--restrict-filenames',  # Restrict filenames to ASCII
@@ -224,7 +210,6 @@ def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Opti
             '--no-check-certificates',  # Skip SSL certificate checks
             '--user-agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             '--referer', 'https://www.youtube.com/',
-            url
         ]
         
         # Update progress
@@ -235,17 +220,17 @@ def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Opti
             message="Starting download with yt-dlp..."
         )
         
-        # Run yt-dlp command
-        process = subprocess.run(
-            cmd,
+        # Run yt-dlp
+        result = run_ytdlp(
+            ytdlp_args,
+            url,
             cwd=task_dir,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
+            timeout=300,  # 5 minute timeout
+            progress_hooks=[ProgressHook(task_id, celery_task, start=20, end=40)]
         )
         
-        if process.returncode != 0:
-            error_msg = f"yt-dlp failed: {process.stderr}"
+        if not result.success:
+            error_msg = f"yt-dlp failed: {result.error}"
             raise Exception(error_msg)
         
         # Update progress
@@ -1,5 +1,5 @@
 """
-Download utilities using yt-dlp CLI to extract audio from YouTube videos.
+Download utilities using yt-dlp to extract audio from YouTube videos.
 Optimized for VPS deployment with anti-bot detection measures.
 """
 
@@ -21,6 +21,10 @@ except ImportError:
 
 # Import Redis task manager
 from shared.redis_client import RedisTaskManager, TaskStatus
+from shared.expiry_index import ExpiryIndex
+from shared.progress_reporter import ProgressReporter
+from download_service.engine import run_ytdlp
+from download_service.strategy_stats import order_strategies, record_attempt, is_video_error
 
 # Configure temporary directory for downloads
 TEMP_DIR = os.getenv("TEMP_DIR", "/tmp/yt-mp3")
@@ -81,18 +85,23 @@ def is_valid_audio_file(file_path: str) -> bool:
 class ProgressHook:
     """Progress hook for yt-dlp to update Redis task status"""
     
-    def __init__(self, task_id: str, celery_task=None):
+    def __init__(self, task_id: str, celery_task=None, start: float = 10, end: float = 50,
+                 reporter: Optional[ProgressReporter] = None):
         self.task_id = task_id
         self.start_time = time.time()
-        self.celery_task = celery_task  # Celery task instance for progress updates
+        # Share of the total task progress the download fills
+        self.start = start
+        self.end = end
+        # Coalesces per-chunk progress into rate-limited writes (Redis and Celery state)
+        self.reporter = reporter or ProgressReporter(task_id, celery_task)
     
     def __call__(self, d: Dict[str, Any]):
         if d['status'] == 'downloading':
-            # Calculate download progress
-            if 'downloaded_bytes' in d and 'total_bytes' in d and d['total_bytes'] > 0:
-                progress = (d['downloaded_bytes'] / d['total_bytes']) * 100
-            elif 'downloaded_bytes' in d and 'total_bytes_estimate' in d and d['total_bytes_estimate'] > 0:
-                progress = (d['downloaded_bytes'] / d['total_bytes_estimate']) * 100
+            # Calculate download progress (sizes are missing or None when unknown)
+            downloaded = d.get('downloaded_bytes') or 0
+            total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+            if total > 0:
+                progress = min(downloaded / total, 1) * 100
             else:
                 progress = 0
                 
@@ -110,66 +119,44 @@ class ProgressHook:
             else:
                 eta_str = "calculating..."
             
-            # Scale progress to 10-50% of total task progress
-            scaled_progress = 10 + (progress * 0.4)
+            # Scale progress to the hook's share of total task progress
+            scaled_progress = self.start + progress * (self.end - self.start) / 100
             
-            # Update Redis with progress
+            # Buffer the update; it is written at most every PROGRESS_FLUSH_INTERVAL_MS
             message = f"Downloading... {progress:.1f}% at {speed_str}, ETA: {eta_str}"
-            RedisTaskManager.update_task(
-                self.task_id,
+            self.reporter.report(
                 status=TaskStatus.DOWNLOADING.value,
                 progress=int(scaled_progress),
                 message=message
             )
-            
-            # Update Celery task progress if available
-            if self.celery_task:
-                self.celery_task.update_state(
-                    state='PROGRESS',
-                    meta={'current': int(scaled_progress), 'total': 100, 'status': message}
-                )
         
         elif d['status'] == 'finished':
-            # Update Redis when download finishes
-            RedisTaskManager.update_task(
-                self.task_id,
+            # Update Redis when download finishes, right away
+            self.reporter.report(
                 status=TaskStatus.DOWNLOADING.value,
-                progress=50,
-                message="Download completed, processing..."
+                progress=self.end,
+                message="Download completed, processing...",
+                force=True
             )
-            
-            # Update Celery task progress if available
-            if self.celery_task:
-                self.celery_task.update_state(
-                    state='PROGRESS',
-                    meta={'current': 50, 'total': 100, 'status': 'Download completed, processing...'}
-                )
         
         elif d['status'] == 'error':
             # Handle download errors
             error_msg = d.get('error', 'Unknown download error')
             print(f"Download error: {error_msg}")
             
-            # Update Redis with error
-            RedisTaskManager.update_task(
-                self.task_id,
+            # Update Redis with error, right away
+            self.reporter.report(
                 status=TaskStatus.FAILED.value,
                 progress=0,
                 message=f"Download failed: {error_msg}",
-                error=error_msg
+                error=error_msg,
+                force=True
             )
-            
-            # Update Celery task with error if available
-            if self.celery_task:
-                self.celery_task.update_state(
-                    state='FAILURE',
-                    meta={'error': error_msg}
-                )
 
 
 def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Optional[str], Optional[str]]:
     """
-    Download audio from a YouTube URL using yt-dlp CLI with VPS-optimized anti-bot strategies.
+    Download audio from a YouTube URL using yt-dlp with VPS-optimized anti-bot strategies.
     
     Args:
         task_id: Task ID for progress tracking
@@ -191,13 +178,13 @@ def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Opti
         # Create a unique directory for this download
         task_dir = os.path.join(TEMP_DIR, task_id)
         os.makedirs(task_dir, exist_ok=True)
+        ExpiryIndex.schedule(ExpiryIndex.TEMP, task_dir)
         
         # Set up output filename template
         output_template = os.path.join(task_dir, "%(title)s.%(ext)s")
         
-        # Base command for all strategies
-        base_cmd = [
-            'yt-dlp',
+        # Base options for all strategies
+        base_args = [
             '--extract-flat', 'never',
             '--no-playlist',
             '--format', 'bestaudio[ext=webm]/bestaudio[ext=m4a]/bestaudio',
@@ -208,7 +195,7 @@ def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Opti
             '--no-check-certificates',
         ]
         
-        # VPS-specific anti-bot strategies (ordered by effectiveness for data center IPs)
+        # VPS-specific anti-bot strategies (configured order; tried best-first by observed success and latency)
         vps_strategies = [
             # Strategy 1: iOS client emulation (most effective for VPS/data center IPs)
             {
@@ -267,40 +254,51 @@ def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Opti
             message="Starting VPS-optimized download..."
         )
 
-        # Try each strategy until one succeeds
+        # Try each strategy until one succeeds, best-first, skipping ones that keep failing
+        strategies = order_strategies(vps_strategies)
+        # One reporter for all attempts, so a retry never moves the bar backwards
+        reporter = ProgressReporter(task_id, celery_task)
         download_success = False
+        video_error = False
         last_error = None
         
-        for strategy_num, strategy in enumerate(vps_strategies, 1):
+        for strategy_num, strategy in enumerate(strategies, 1):
+            attempt_started = time.monotonic()
+            succeeded = False
             try:
-                # Build command with current strategy
-                cmd = base_cmd + strategy['args'] + [url]
+                # Build options with current strategy
+                ytdlp_args = base_args + strategy['args']
                 
-                # Update progress
-                RedisTaskManager.update_task(
-                    task_id,
+                # Announce the strategy, keeping the progress reached so far
+                reporter.report(
                     status=TaskStatus.DOWNLOADING.value,
-                    progress=15 + (strategy_num * 8),
-                    message=f"Trying {strategy['name']} strategy ({strategy_num}/4)..."
+                    message=f"Trying {strategy['name']} strategy ({strategy_num}/{len(strategies)})...",
+                    force=True
                 )
                 
                 print(f"VPS Strategy {strategy_num} ({strategy['name']}): Starting download...")
                 
-                process = subprocess.run(
-                    cmd,
+                result = run_ytdlp(
+                    ytdlp_args,
+                    url,
                     cwd=task_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # 5 minute timeout
+                    timeout=300,  # 5 minute timeout
+                    progress_hooks=[ProgressHook(task_id, celery_task, start=20, end=40, reporter=reporter)]
                 )
                 
-                if process.returncode == 0:
-                    print(f"VPS Strategy {strategy_num} ({strategy['name']}) succeeded!")
+                if result.success:
+                    print(f"VPS Strategy {strategy_num} ({strategy['name']}) succeeded ({result.engine})!")
                     download_success = True
+                    succeeded = True
                     break
                 else:
-                    last_error = process.stderr
-                    print(f"VPS Strategy {strategy_num} ({strategy['name']}) failed: {process.stderr[:200]}...")
+                    last_error = result.error
+                    print(f"VPS Strategy {strategy_num} ({strategy['name']}) failed: {(result.error or '')[:200]}...")
+                    
+                    # Private, removed or restricted videos fail the same way with every client
+                    if is_video_error(result.error):
+                        video_error = True
+                        break
                     
             except subprocess.TimeoutExpired:
                 last_error = f"Strategy {strategy_num} timed out after 5 minutes"
@@ -310,6 +308,21 @@ def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Opti
                 last_error = str(e)
                 print(f"VPS Strategy {strategy_num} ({strategy['name']}) exception: {e}")
                 continue
+            finally:
+                record_attempt(strategy['name'], succeeded, time.monotonic() - attempt_started,
+                               error=None if succeeded else last_error)
+        
+        if video_error:
+            error_msg = f"Video cannot be downloaded: {last_error}"
+            print(error_msg)
+            RedisTaskManager.update_task(
+                task_id,
+                status=TaskStatus.FAILED.value,
+                progress=0,
+                message="Download failed: Video is unavailable",
+                error=error_msg
+            )
+            return False, None, error_msg
         
         if not download_success:
             error_msg = f"All VPS download strategies failed. YouTube may be blocking this video for data center IPs. Last error: {last_error}"
@@ -327,7 +340,7 @@ def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Opti
         RedisTaskManager.update_task(
             task_id,
             status=TaskStatus.DOWNLOADING.value,
-            progress=60,
+            progress=40,
             message="Download completed, locating file..."
         )
         
@@ -390,7 +403,7 @@ def download_audio(task_id: str, url: str, celery_task=None) -> Tuple[bool, Opti
         RedisTaskManager.update_task(
             task_id,
             status=TaskStatus.DOWNLOADING.value,
-            progress=80,
+            progress=50,
             message="Download completed successfully!"
         )
         
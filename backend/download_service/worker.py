@@ -9,6 +9,8 @@ import time
 from celery import current_task
 from shared.celery_app import celery_app
 from shared.redis_client import RedisTaskManager, TaskStatus
+from shared.result_index import VideoResultIndex, INFLIGHT_TTL, complete_reused_task, fail_leader
+from shared.youtube_api import extract_video_id
 from download_service.utils import download_audio
 
 # Configure logging
@@ -30,6 +32,29 @@ def download_audio_task(self, task_id: str, youtube_url: str):
     try:
         logger.info(f"Starting download task {task_id} for URL: {youtube_url}")
         
+        # Reuse a finished file or attach to a job already running for this video
+        video_id = extract_video_id(youtube_url)
+        if video_id:
+            role, value = VideoResultIndex.claim(video_id, task_id)
+            
+            if role == "done":
+                logger.info(f"Reusing existing output for task {task_id}: {value}")
+                complete_reused_task(task_id, value, "Conversion completed successfully!")
+                return {"success": True, "mp3_file": value, "reused": True}
+            
+            if role == "follower":
+                logger.info(f"Task {task_id} attached to in-flight task {value} for video {video_id}")
+                RedisTaskManager.update_task(
+                    task_id,
+                    status=TaskStatus.DOWNLOADING.value,
+                    progress=10,
+                    message="Waiting for an identical conversion already in progress..."
+                )
+                # The leader completes or fails this task; if its worker dies first,
+                # the re-check takes over once the leader's claim has lapsed
+                recheck_waiting_task.apply_async(args=[task_id, youtube_url, value], countdown=INFLIGHT_TTL)
+                return {"success": True, "waiting_on": value}
+        
         # Update task status to downloading
         RedisTaskManager.update_task(
             task_id,
@@ -51,6 +76,7 @@ def download_audio_task(self, task_id: str, youtube_url: str):
                 status=TaskStatus.FAILED.value,
                 error=error_msg
             )
+            fail_leader(task_id, error_msg)
             
             return {"success": False, "error": error_msg}
         
@@ -79,9 +105,41 @@ def download_audio_task(self, task_id: str, youtube_url: str):
             status=TaskStatus.FAILED.value,
             error=error_msg
         )
+        fail_leader(task_id, error_msg)
         
         return {"success": False, "error": error_msg}
 
+@celery_app.task(name="download_service.worker.recheck_waiting_task")
+def recheck_waiting_task(task_id: str, youtube_url: str, leader_id: str):
+    """
+    Celery task that resolves a task still waiting on another task's job.
+    
+    Args:
+        task_id: Waiting task identifier
+        youtube_url: YouTube URL of the task
+        leader_id: Task the waiting task was attached to
+        
+    Returns:
+        dict: What happened to the waiting task
+    """
+    task_data = RedisTaskManager.get_task(task_id)
+    if not task_data or task_data.get("status") != TaskStatus.DOWNLOADING.value:
+        # Completed or failed by its leader (or expired) in the meantime
+        return {"success": True, "resolved": True}
+    
+    video_id = extract_video_id(youtube_url)
+    leader, remaining = VideoResultIndex.inflight_claim(video_id)
+    if leader == leader_id:
+        # Still within the leader's time budget
+        recheck_waiting_task.apply_async(args=[task_id, youtube_url, leader_id], countdown=max(remaining, 1))
+        return {"success": True, "waiting_on": leader_id}
+    
+    # The leader went away without publishing or failing; claim the video again,
+    # reusing a result, attaching to a newer leader or taking over the work
+    logger.warning(f"Task {leader_id} never finished video {video_id}, re-dispatching waiting task {task_id}")
+    download_audio_task.delay(task_id, youtube_url)
+    return {"success": True, "redispatched": True}
+
 @celery_app.task(bind=True, name="download_service.worker.download_progress_callback")
 def download_progress_callback(self, task_id: str, progress_data: dict):
     """
@@ -24,7 +24,13 @@ except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "schedule"])
     import schedule
 
-from file_service.storage import cleanup_temp_files, scheduled_cleanup
+from file_service.storage import (
+    cleanup_temp_files,
+    scheduled_cleanup,
+    expire_due_temp_files,
+    expire_due_outputs,
+)
+from file_service.eviction import STORAGE_BUDGET_BYTES, evict_to_budget
 from shared.redis_client import check_redis_connection
 
 # Celery imports (conditional)
@@ -73,43 +79,58 @@ if CELERY_AVAILABLE:
             return {"success": False, "error": error_msg}
 
     @celery_app.task(name="file_service.cleanup.scheduled_cleanup_task")
-    def scheduled_cleanup_task():
+    def scheduled_cleanup_task(full: bool = False):
         """
         Celery task for scheduled cleanup operations.
         Can be run periodically using Celery beat.
+        
+        Args:
+            full: Walk every file instead of only the expired ones
         """
         try:
             logger.info("Running scheduled cleanup via Celery task")
-            result = run_scheduled_cleanup()
+            result = run_scheduled_cleanup(full=full)
             return result
         except Exception as e:
             error_msg = f"Error in scheduled cleanup task: {str(e)}"
             logger.error(error_msg)
             return {"success": False, "error": error_msg}
 
-def run_scheduled_cleanup() -> Dict[str, Any]:
+def run_scheduled_cleanup(full: bool = False) -> Dict[str, Any]:
     """
     Run scheduled cleanup of files
     
+    Args:
+        full: Walk TEMP_DIR and every stored output instead of only taking
+              the expired entries from the expiry index. Needed occasionally
+              for files that are not in the index.
+    
     Returns:
         dict: Results of cleanup operations
     """
-    logger.info("Running scheduled file cleanup...")
+    logger.info(f"Running scheduled file cleanup ({'full' if full else 'incremental'})...")
     
     # Make sure Redis is available
     if not check_redis_connection():
         logger.warning("Redis connection failed, cannot update task statuses")
     
-    # Run both cleanups
-    temp_results = cleanup_temp_files()
-    output_results = scheduled_cleanup()
+    # Run both cleanups; with a storage budget, old files that live tasks
+    # still point at are left to capacity eviction instead of the age rule
+    if full:
+        temp_results = cleanup_temp_files()
+        output_results = scheduled_cleanup(keep_live=STORAGE_BUDGET_BYTES > 0)
+    else:
+        temp_results = expire_due_temp_files()
+        output_results = expire_due_outputs(keep_live=STORAGE_BUDGET_BYTES > 0)
+    eviction_results = evict_to_budget(force=full)
     
     # Combine results
     results = {
         "temp_files_removed": temp_results[0],
         "temp_bytes_freed": temp_results[1],
-        "output_files_removed": output_results[0],
-        "output_bytes_freed": output_results[1],
+        "output_files_removed": output_results[0] + eviction_results["files_evicted"],
+        "output_bytes_freed": output_results[1] + eviction_results["bytes_evicted"],
+        "storage_bytes_used": eviction_results["bytes_used"],
     }
     
     # Log results
@@ -139,24 +160,37 @@ if __name__ == "__main__":
         "--interval",
         type=int,
         default=24,
-        help="Cleanup interval in hours (default: 24)"
+        help="Full cleanup interval in hours (default: 24)"
+    )
+    parser.add_argument(
+        "--incremental-interval",
+        type=int,
+        default=1,
+        help="Incremental cleanup interval in minutes (default: 1)"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Walk every file instead of only the expired ones (single run)"
     )
     args = parser.parse_args()
     
     if args.daemon:
         # Run as a scheduled service
-        logger.info(f"Starting scheduled cleanup service (interval: {args.interval} hours)")
+        logger.info(f"Starting scheduled cleanup service (full: every {args.interval} hours, "
+                    f"incremental: every {args.incremental_interval} minutes)")
         
-        # Schedule cleanup
-        schedule.every(args.interval).hours.do(run_scheduled_cleanup)
+        # Schedule cleanup: cheap expiry-index passes often, full sweeps rarely
+        schedule.every(args.incremental_interval).minutes.do(run_scheduled_cleanup)
+        schedule.every(args.interval).hours.do(run_scheduled_cleanup, full=True)
         
         # Run scheduler in a separate thread
         scheduler_thread = threading.Thread(target=run_scheduler)
         scheduler_thread.daemon = True
         scheduler_thread.start()
         
-        # Run once at start
-        run_scheduled_cleanup()
+        # Run once at start, registering files that predate the expiry index
+        run_scheduled_cleanup(full=True)
         
         try:
             # Keep main thread alive
@@ -167,7 +201,7 @@ if __name__ == "__main__":
             sys.exit(0)
     else:
         # Run once
-        results = run_scheduled_cleanup()
+        results = run_scheduled_cleanup(full=args.full)
         
         # Print results in a readable format
         print(f"Cleanup results:")
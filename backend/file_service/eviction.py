@@ -0,0 +1,181 @@
+"""
+Capacity-based eviction of output files.
+When STORAGE_BUDGET_BYTES is set, outputs are kept as long as they fit in the
+budget instead of for a fixed age. Once stored outputs exceed the budget, the
+least valuable ones are evicted until usage drops below the low watermark.
+Value combines recency (last download or access) and frequency (downloads
+across every task sharing the file), and the tasks of evicted files are
+marked expired.
+"""
+
+import os
+import math
+import time
+import logging
+from typing import Dict, Any, List, NamedTuple
+from dotenv import load_dotenv
+
+from shared.redis_client import redis_client
+from shared.file_index import FILE_TASKS_PREFIX
+from shared.storage_layout import INCOMING_DIR
+from shared.storage_backend import iter_stored_files
+from file_service.storage import remove_output_file
+
+# Load environment variables
+load_dotenv()
+
+# Byte budget for stored outputs (0 disables eviction and keeps the 7-day age rule)
+STORAGE_BUDGET_BYTES = int(os.getenv("STORAGE_BUDGET_BYTES", "0"))
+
+# Evict down to this fraction of the budget, so each run frees some headroom
+EVICTION_LOW_WATERMARK = float(os.getenv("EVICTION_LOW_WATERMARK", "0.9"))
+
+# lru: recency only; lfu: downloads first, recency breaks ties;
+# hybrid: recency credited with EVICTION_FREQUENCY_WEIGHT seconds per doubling of downloads
+EVICTION_POLICY = os.getenv("EVICTION_POLICY", "hybrid").lower()
+EVICTION_FREQUENCY_WEIGHT = float(os.getenv("EVICTION_FREQUENCY_WEIGHT", str(24 * 3600)))
+
+# Measuring usage lists every stored file, so do it at most this often
+EVICTION_INTERVAL = int(os.getenv("EVICTION_INTERVAL", "3600"))
+
+# Redis round trips are batched this many files at a time
+EVICTION_BATCH_SIZE = 1000
+
+EVICTION_LOCK_KEY = "eviction:last_run"
+
+logger = logging.getLogger("eviction")
+
+class EvictionCandidate(NamedTuple):
+    """A stored output with its usage statistics"""
+    location: str
+    size: int
+    last_access: float
+    downloads: int
+
+def eviction_score(candidate: EvictionCandidate, policy: str = EVICTION_POLICY) -> tuple:
+    """
+    Rank an output for eviction; lower scores are evicted first
+
+    Args:
+        candidate: Output with its usage statistics
+        policy: lru, lfu or hybrid
+
+    Returns:
+        tuple: Sort key
+    """
+    if policy == "lru":
+        return (candidate.last_access,)
+    if policy == "lfu":
+        return (candidate.downloads, candidate.last_access)
+    return (candidate.last_access + EVICTION_FREQUENCY_WEIGHT * math.log2(1 + candidate.downloads),)
+
+def _usage_stats(locations: List[str]) -> List[Dict[str, float]]:
+    """
+    Sum download counts and find the latest download over each file's tasks
+
+    Args:
+        locations: Output locations
+
+    Returns:
+        list: {"downloads", "last_downloaded_at"} per location, in order
+    """
+    with redis_client.pipeline(transaction=False) as pipe:
+        for location in locations:
+            pipe.smembers(f"{FILE_TASKS_PREFIX}{location}")
+        task_sets = pipe.execute()
+
+    with redis_client.pipeline(transaction=False) as pipe:
+        for task_ids in task_sets:
+            for task_id in task_ids:
+                pipe.hmget(f"task:{task_id}", "download_count", "last_downloaded_at")
+        task_stats = iter(pipe.execute())
+
+    stats = []
+    for task_ids in task_sets:
+        downloads = 0
+        last_downloaded_at = 0.0
+        for _ in task_ids:
+            count, downloaded_at = next(task_stats)
+            downloads += int(count or 0)
+            last_downloaded_at = max(last_downloaded_at, float(downloaded_at or 0))
+        stats.append({"downloads": downloads, "last_downloaded_at": last_downloaded_at})
+    return stats
+
+def collect_candidates() -> List[EvictionCandidate]:
+    """
+    Gather every stored output with its usage statistics
+
+    Returns:
+        list: Eviction candidates (outputs still being staged are left out)
+    """
+    candidates = []
+    batch = []
+
+    def flush():
+        for stored, usage in zip(batch, _usage_stats([s.location for s in batch])):
+            candidates.append(EvictionCandidate(
+                stored.location,
+                stored.size,
+                max(stored.last_access, usage["last_downloaded_at"]),
+                usage["downloads"]
+            ))
+        batch.clear()
+
+    for stored in iter_stored_files():
+        if stored.location.startswith(INCOMING_DIR + os.sep):
+            continue
+        batch.append(stored)
+        if len(batch) >= EVICTION_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    return candidates
+
+def evict_to_budget(budget: int = STORAGE_BUDGET_BYTES, force: bool = False) -> Dict[str, Any]:
+    """
+    Evict outputs until stored bytes fit within the budget
+
+    Args:
+        budget: Byte budget (0 disables eviction)
+        force: Run even if another run happened within EVICTION_INTERVAL
+
+    Returns:
+        dict: Bytes used before eviction (0 if it did not run) and what was evicted
+    """
+    results = {"bytes_used": 0, "files_evicted": 0, "bytes_evicted": 0}
+    if budget <= 0:
+        return results
+
+    # Shared across cleanup processes, so frequent cleanup runs stay cheap
+    if not force and not redis_client.set(EVICTION_LOCK_KEY, time.time(), nx=True, ex=EVICTION_INTERVAL):
+        return results
+
+    candidates = collect_candidates()
+    used = sum(candidate.size for candidate in candidates)
+    results["bytes_used"] = used
+
+    if used <= budget:
+        return results
+
+    target = int(budget * EVICTION_LOW_WATERMARK)
+    logger.info(f"Storage at {used} of {budget} bytes, evicting down to {target} ({EVICTION_POLICY})")
+
+    for candidate in sorted(candidates, key=eviction_score):
+        if used <= target:
+            break
+        try:
+            remove_output_file(candidate.location, "File was removed to free storage space")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error evicting {candidate.location}: {str(e)}")
+            continue
+
+        used -= candidate.size
+        results["files_evicted"] += 1
+        results["bytes_evicted"] += candidate.size
+        logger.info(f"Evicted {candidate.location} ({candidate.size} bytes, "
+                    f"{candidate.downloads} downloads, last used {time.ctime(candidate.last_access)})")
+
+    return results
@@ -0,0 +1,169 @@
+"""
+Online migration of a flat STORAGE_DIR into the sharded layout.
+Each file is hard-linked into its shard directory, the tasks pointing at it are
+re-pointed in Redis, and only then is the flat name removed, so the file stays
+reachable under one of its paths the whole time. Safe to run while the API and
+workers are serving traffic, and safe to re-run.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from typing import Dict, Any
+
+# Add the parent directory to the path so we can import shared modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.redis_client import RedisTaskManager
+from shared.file_index import TaskFileIndex
+from shared.expiry_index import ExpiryIndex, OUTPUT_RETENTION_SECONDS
+from shared.storage_layout import STORAGE_DIR, sharded_path
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("migrate_storage")
+
+# Files younger than this may still be written by a converter running the old layout
+DEFAULT_MIN_AGE = int(os.getenv("MAX_CONVERSION_TIME", "900"))
+
+def migrate_file(src: str, dry_run: bool = False) -> bool:
+    """
+    Move one flat output into its shard directory
+
+    Args:
+        src: Path of the file in the flat layout
+        dry_run: Only log what would be done
+
+    Returns:
+        bool: True if the file was migrated
+    """
+    if dry_run:
+        logger.info(f"Would migrate {src}")
+        return True
+
+    dst = sharded_path(os.path.basename(src))
+    if dst == src:
+        # STORAGE_SHARD_DEPTH=0 keeps the flat layout
+        return False
+
+    if os.path.exists(dst):
+        if not os.path.samefile(src, dst):
+            logger.warning(f"Skipping {src}: a different file already exists at {dst}")
+            return False
+    else:
+        try:
+            # Hard link first so the flat path keeps working until Redis is updated
+            os.link(src, dst)
+        except OSError:
+            # No hard links on this filesystem: fall back to an atomic rename,
+            # readers resolve the new location from the file name meanwhile
+            os.rename(src, dst)
+
+    # Re-point every task that used the flat path
+    for task_id in TaskFileIndex.move_file(src, dst):
+        RedisTaskManager.update_task(task_id, file_path=dst)
+
+    # Carry the file's expiry over to the new path (mtime is kept by link and rename)
+    expires_at = ExpiryIndex.expires_at(ExpiryIndex.OUTPUTS, src)
+    if expires_at is None:
+        expires_at = os.stat(dst).st_mtime + OUTPUT_RETENTION_SECONDS
+    ExpiryIndex.schedule(ExpiryIndex.OUTPUTS, dst, expires_at)
+    ExpiryIndex.cancel(ExpiryIndex.OUTPUTS, src)
+
+    if os.path.exists(src):
+        os.unlink(src)
+
+    logger.info(f"Migrated {src} -> {dst}")
+    return True
+
+def migrate_storage(batch_size: int = 500, pause: float = 1.0,
+                    min_age: int = DEFAULT_MIN_AGE, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Re-shard every flat output file in STORAGE_DIR
+
+    Args:
+        batch_size: Files migrated between pauses
+        pause: Seconds to sleep between batches, to limit I/O and Redis load
+        min_age: Skip files modified within this many seconds
+        dry_run: Only log what would be done
+
+    Returns:
+        dict: Migration counts
+    """
+    results = {"migrated": 0, "skipped": 0, "failed": 0}
+    cutoff_time = time.time() - min_age
+    in_batch = 0
+
+    # scandir streams entries instead of building the whole listing in memory
+    with os.scandir(STORAGE_DIR) as entries:
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+
+            try:
+                stat_info = entry.stat(follow_symlinks=False)
+                if max(stat_info.st_ctime, stat_info.st_mtime) > cutoff_time:
+                    results["skipped"] += 1
+                    continue
+
+                if migrate_file(entry.path, dry_run=dry_run):
+                    results["migrated"] += 1
+                else:
+                    results["skipped"] += 1
+            except FileNotFoundError:
+                # Removed by cleanup or another migration run meanwhile
+                results["skipped"] += 1
+            except Exception as e:
+                logger.error(f"Error migrating {entry.path}: {str(e)}")
+                results["failed"] += 1
+
+            in_batch += 1
+            if in_batch >= batch_size:
+                in_batch = 0
+                time.sleep(pause)
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move flat output files into the sharded storage layout")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="Files migrated between pauses (default: 500)"
+    )
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=1.0,
+        help="Seconds to sleep between batches (default: 1)"
+    )
+    parser.add_argument(
+        "--min-age",
+        type=int,
+        default=DEFAULT_MIN_AGE,
+        help=f"Skip files modified within this many seconds (default: {DEFAULT_MIN_AGE})"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only list the files that would be migrated"
+    )
+    args = parser.parse_args()
+
+    results = migrate_storage(
+        batch_size=args.batch_size,
+        pause=args.pause,
+        min_age=args.min_age,
+        dry_run=args.dry_run
+    )
+
+    print(f"Migration results:")
+    print(f"- Migrated {results['migrated']} files")
+    print(f"- Skipped {results['skipped']} files")
+    print(f"- Failed {results['failed']} files")
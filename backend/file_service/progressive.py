@@ -0,0 +1,240 @@
+"""
+Progressive downloads of outputs that are still being converted.
+With /api/download/{task_id}?stream=1 the MP3 is sent while ffmpeg is still
+writing it to the task's staging file, following the file as it grows until
+the converter marks the task completed. The response is chunked (no
+Content-Length, no ranges). If the conversion fails the response ends without
+its final chunk, so the server closes the connection and clients see an
+incomplete transfer instead of a silently truncated file. ffmpeg rewrites the VBR header in the first frame
+once it finishes, which the stream has already sent, so players may show an
+estimated duration for streamed files.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+import anyio
+from fastapi import HTTPException, Request
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Send
+from dotenv import load_dotenv
+
+from shared.redis_client import TaskStatus
+from shared.async_redis_client import AsyncRedisTaskManager, async_redis_client
+from shared.task_events import task_events
+from shared.result_index import VideoResultIndex
+from shared.storage_layout import incoming_path
+from file_service.storage import serve_file, build_content_disposition
+
+# Load environment variables
+load_dotenv()
+
+# Seconds to wait for news before checking a staging file that stopped growing
+PROGRESSIVE_POLL_INTERVAL = float(os.getenv("PROGRESSIVE_POLL_INTERVAL", "0.5"))
+
+# Longest a stream request waits for the conversion to start writing
+PROGRESSIVE_START_TIMEOUT = float(os.getenv("PROGRESSIVE_START_TIMEOUT", os.getenv("DOWNLOAD_TIMEOUT", "600")))
+
+# Abort a stream whose file stops growing for this long without the task completing
+PROGRESSIVE_IDLE_TIMEOUT = float(os.getenv("PROGRESSIVE_IDLE_TIMEOUT", "120"))
+
+CHUNK_SIZE = 64 * 1024
+
+# Statuses of tasks whose output may still appear
+IN_PROGRESS_STATUSES = (TaskStatus.PENDING.value, TaskStatus.DOWNLOADING.value, TaskStatus.CONVERTING.value)
+
+logger = logging.getLogger("file_service")
+
+class StreamAborted(Exception):
+    """The output being streamed will not be completed"""
+
+class ProgressiveStreamingResponse(StreamingResponse):
+    """Streaming response that can end without its final chunk"""
+
+    async def stream_response(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        try:
+            async for chunk in self.body_iterator:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        except StreamAborted:
+            # Returning without the final body message makes the server close
+            # the connection mid-transfer; an expected outcome, not an app error
+            return
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+async def get_task_status(task_id: str) -> Optional[str]:
+    """Read only the status field of a task"""
+    return await async_redis_client.hget(f"task:{task_id}", "status")
+
+class TaskWatch:
+    """Follows a task's status via the update fan-out, re-reading it from Redis"""
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.queue = task_events.subscribe(task_id)
+
+    async def next_status(self, timeout: float) -> Optional[str]:
+        """
+        Wait up to timeout for an update, then read the current status
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            str: Task status, or None if the task no longer exists
+        """
+        try:
+            await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return await get_task_status(self.task_id)
+
+    def close(self) -> None:
+        task_events.unsubscribe(self.task_id, self.queue)
+
+async def open_staging_file(task_id: str, task_data: Dict[str, Any], watch: TaskWatch):
+    """
+    Wait until the output of a task is being written and open it
+
+    Tasks attached to another task converting the same video follow that
+    task's staging file.
+
+    Args:
+        task_id: Task identifier
+        task_data: Task data from Redis
+        watch: Status watch of the task
+
+    Returns:
+        file: Unbuffered reader at the start of the file, or None if the task
+              stopped being in progress first
+
+    Raises:
+        HTTPException: If the conversion does not start in time
+    """
+    deadline = time.monotonic() + PROGRESSIVE_START_TIMEOUT
+    status = task_data.get("status")
+    video_id = task_data.get("video_id")
+
+    while status in IN_PROGRESS_STATUSES:
+        # Only a converting task's staging file is current; one left by an
+        # earlier failed attempt must not be streamed
+        writer = task_id if status == TaskStatus.CONVERTING.value else None
+        if writer is None and video_id:
+            leader = await VideoResultIndex.inflight_leader_async(video_id)
+            if leader and leader != task_id and await get_task_status(leader) == TaskStatus.CONVERTING.value:
+                writer = leader
+
+        if writer is not None:
+            try:
+                return open(incoming_path(writer), "rb", buffering=0)
+            except FileNotFoundError:
+                pass
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HTTPException(status_code=504, detail=f"Conversion of task {task_id} did not start in time")
+        status = await watch.next_status(min(PROGRESSIVE_POLL_INTERVAL, remaining))
+
+    return None
+
+async def follow_growing_file(file, task_id: str, watch: TaskWatch) -> AsyncIterator[bytes]:
+    """
+    Yield a file's content as it is written, until its task completes
+
+    Args:
+        file: Reader opened by open_staging_file
+        task_id: Task identifier
+        watch: Status watch of the task
+
+    Yields:
+        bytes: File content
+
+    Raises:
+        StreamAborted: If the task fails or the file stalls, to abort the response
+    """
+    finished = False
+    last_growth = time.monotonic()
+    try:
+        while True:
+            chunk = await anyio.to_thread.run_sync(file.read, CHUNK_SIZE)
+            if chunk:
+                last_growth = time.monotonic()
+                yield chunk
+                continue
+
+            if finished:
+                # Everything the converter wrote has been sent
+                return
+
+            status = await watch.next_status(PROGRESSIVE_POLL_INTERVAL)
+            if status == TaskStatus.COMPLETED.value:
+                # The file was moved into the store, but this handle still
+                # reads it; drain what was written last
+                finished = True
+            elif status not in IN_PROGRESS_STATUSES:
+                logger.warning(f"Aborting progressive download: task {task_id} ended with status {status}")
+                raise StreamAborted()
+            elif time.monotonic() - last_growth > PROGRESSIVE_IDLE_TIMEOUT:
+                logger.warning(f"Aborting progressive download: output of task {task_id} stopped growing")
+                raise StreamAborted()
+    finally:
+        file.close()
+        watch.close()
+
+async def serve_progressive_file(task_id: str, request: Optional[Request] = None) -> Response:
+    """
+    Serve a task's output while it is still being converted
+
+    Completed tasks are served normally (ranges, conditional requests).
+
+    Args:
+        task_id: Task identifier
+        request: Incoming request
+
+    Returns:
+        Response: Chunked stream of the growing file, or the normal file response
+
+    Raises:
+        HTTPException: If the task is not found, failed or never starts converting
+    """
+    task_data = await AsyncRedisTaskManager.get_task(task_id)
+    if not task_data:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+
+    if task_data.get("status") not in IN_PROGRESS_STATUSES:
+        return await serve_file(task_id, request)
+
+    _, content_disposition = build_content_disposition(task_id, task_data, f"audio_{task_id}.mp3")
+    headers = {
+        "Content-Disposition": content_disposition,
+        "X-Content-Type-Options": "nosniff",
+        "Cache-Control": "no-store",
+        "Accept-Ranges": "none",
+        "Access-Control-Allow-Origin": "*",
+    }
+
+    if request is not None and request.method == "HEAD":
+        # The headers do not depend on the conversion, so don't wait for it
+        return Response(status_code=200, headers=headers, media_type="audio/mpeg")
+
+    # Subscribe before looking for the file so no status change falls in between
+    watch = TaskWatch(task_id)
+    try:
+        file = await open_staging_file(task_id, task_data, watch)
+    except BaseException:
+        watch.close()
+        raise
+
+    if file is None:
+        # Finished (or failed) before the conversion was seen
+        watch.close()
+        return await serve_file(task_id, request)
+
+    try:
+        await AsyncRedisTaskManager.record_download(task_id)
+    except Exception as e:
+        logger.error(f"Error recording download for task {task_id}: {str(e)}")
+
+    return ProgressiveStreamingResponse(follow_growing_file(file, task_id, watch), media_type="audio/mpeg", headers=headers)
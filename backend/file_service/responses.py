@@ -0,0 +1,317 @@
+"""
+File responses with HTTP range and conditional request support.
+Handles single and multi-range (206) requests, If-None-Match /
+If-Modified-Since (304) and If-Range, and streams file bodies with the ASGI
+zero-copy sendfile extension when the server offers it. Can also hand the
+body off to the reverse proxy (X-Accel-Redirect / X-Sendfile).
+"""
+
+import os
+import stat
+import secrets
+import logging
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+from typing import Dict, List, Optional, Tuple, Mapping
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger("file_service")
+
+# Read size when the server has no zero-copy support
+CHUNK_SIZE = 256 * 1024
+
+# Requests asking for more ranges than this get the whole file instead
+MAX_RANGES = 16
+
+# ASGI extension for handing a file descriptor straight to the server
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+# Reverse proxy offload headers
+OFFLOAD_MODES = ("x-accel-redirect", "x-sendfile")
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """Strong ETag derived from a file's modification time and size"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+def _etag_in(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    """Whether a file is unchanged since an If-Modified-Since date"""
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+def _if_range_matches(header: str, etag: str, mtime: float) -> bool:
+    """Whether an If-Range validator still describes the current file"""
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        # If-Range requires a strong match
+        return header == etag
+    try:
+        return int(mtime) == int(parsedate_to_datetime(header).timestamp())
+    except (TypeError, ValueError):
+        return False
+
+def parse_range_header(header: str, file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse a Range header into inclusive byte ranges.
+
+    Args:
+        header: Range header value
+        file_size: Size of the file in bytes
+
+    Returns:
+        list: Sorted, merged (start, end) ranges; an empty list if none is
+              satisfiable; None if the header should be ignored
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start_str, sep, end_str = part.partition("-")
+        if not sep:
+            return None
+        try:
+            if start_str == "":
+                # Suffix range: the last N bytes
+                length = int(end_str)
+                if length <= 0:
+                    continue
+                start, end = max(0, file_size - length), file_size - 1
+            else:
+                start = int(start_str)
+                end = int(end_str) if end_str else file_size - 1
+        except ValueError:
+            return None
+
+        if start < 0 or (end_str and end < start):
+            return None
+        if start >= file_size:
+            continue
+        ranges.append((start, min(end, file_size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    # Merge overlapping and adjacent ranges
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+class RangeFileResponse(Response):
+    """Streams a whole file, one byte range, or several ranges as multipart/byteranges"""
+
+    def __init__(self, path: str, file_size: int, ranges: Optional[List[Tuple[int, int]]],
+                 headers: Dict[str, str], media_type: str, send_body: bool = True):
+        self.path = path
+        self.file_size = file_size
+        self.send_body = send_body
+        self.media_type = media_type
+        self.background = None
+        self.parts: List[Tuple[bytes, int, int]] = []
+        headers = dict(headers)
+
+        if not ranges:
+            # Whole file
+            self.status_code = 200
+            self.parts = [(b"", 0, file_size)]
+            content_length = file_size
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.status_code = 206
+            self.parts = [(b"", start, end - start + 1)]
+            headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+            content_length = end - start + 1
+        else:
+            self.status_code = 206
+            boundary = secrets.token_hex(13)
+            content_length = 0
+            for start, end in ranges:
+                preamble = (
+                    f"--{boundary}\r\n"
+                    f"Content-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+                ).encode("latin-1")
+                # Each part after the first is separated by a CRLF before its boundary
+                if self.parts:
+                    preamble = b"\r\n" + preamble
+                self.parts.append((preamble, start, end - start + 1))
+                content_length += len(preamble) + end - start + 1
+            self.epilogue = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            content_length += len(self.epilogue)
+            self.media_type = f"multipart/byteranges; boundary={boundary}"
+
+        headers["Content-Length"] = str(content_length)
+        self.init_headers(headers)
+
+    async def _send_range(self, send: Send, file, offset: int, count: int, zerocopy: bool) -> None:
+        """Send count bytes of the file starting at offset"""
+        if zerocopy:
+            await send({
+                "type": ZEROCOPY_EXTENSION,
+                "file": file.fileno(),
+                "offset": offset,
+                "count": count,
+                "more_body": True,
+            })
+            return
+
+        remaining = count
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(os.pread, file.fileno(), min(CHUNK_SIZE, remaining), offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+
+        with open(self.path, "rb") as file:
+            for preamble, offset, count in self.parts:
+                if preamble:
+                    await send({"type": "http.response.body", "body": preamble, "more_body": True})
+                await self._send_range(send, file, offset, count, zerocopy)
+
+        await send({
+            "type": "http.response.body",
+            "body": getattr(self, "epilogue", b""),
+            "more_body": False,
+        })
+
+def build_file_response(path: str, request_headers: Mapping[str, str], method: str = "GET",
+                        media_type: str = "application/octet-stream",
+                        headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Build the response for a file, honouring conditional and range headers.
+
+    Args:
+        path: Path to the file
+        request_headers: Incoming request headers
+        method: Request method (HEAD sends headers only)
+        media_type: Content type of the file
+        headers: Extra response headers
+
+    Returns:
+        Response: 200, 206, 304 or 416 response
+    """
+    stat_result = os.stat(path)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise RuntimeError(f"{path} is not a regular file")
+
+    file_size = stat_result.st_size
+    etag = file_etag(stat_result)
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+
+    response_headers = dict(headers or {})
+    response_headers.update({
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": last_modified,
+    })
+
+    # Conditional GET: If-None-Match takes precedence over If-Modified-Since
+    if_none_match = request_headers.get("if-none-match")
+    if_modified_since = request_headers.get("if-modified-since")
+    if (if_none_match and _etag_in(if_none_match, etag)) or \
+            (not if_none_match and if_modified_since and _not_modified_since(if_modified_since, stat_result.st_mtime)):
+        not_modified_headers = {k: v for k, v in response_headers.items() if k != "Content-Disposition"}
+        return Response(status_code=304, headers=not_modified_headers)
+
+    # Range requests, ignored when If-Range no longer matches the file
+    ranges = None
+    range_header = request_headers.get("range")
+    if range_header:
+        if_range = request_headers.get("if-range")
+        if not if_range or _if_range_matches(if_range, etag, stat_result.st_mtime):
+            ranges = parse_range_header(range_header, file_size)
+            if ranges == []:
+                return Response(status_code=416, headers={
+                    "Content-Range": f"bytes */{file_size}",
+                    "Accept-Ranges": "bytes",
+                })
+
+    return RangeFileResponse(
+        path,
+        file_size,
+        ranges,
+        response_headers,
+        media_type,
+        send_body=method != "HEAD"
+    )
+
+def is_new_download_request(request_headers: Mapping[str, str], method: str = "GET") -> bool:
+    """
+    Whether a request fetches the file from the start, judged from its headers
+    alone (for responses whose status is decided elsewhere)
+
+    Args:
+        request_headers: Incoming request headers
+        method: Request method
+
+    Returns:
+        bool: False for HEAD, revalidations and ranges that do not start at byte 0
+    """
+    if method != "GET":
+        return False
+    if request_headers.get("if-none-match") or request_headers.get("if-modified-since"):
+        return False
+    range_header = request_headers.get("range")
+    return not range_header or range_header.replace(" ", "").lower().startswith("bytes=0-")
+
+def build_offload_response(path: str, root: str, mode: str, internal_prefix: str,
+                           media_type: str = "application/octet-stream",
+                           headers: Optional[Dict[str, str]] = None) -> Optional[Response]:
+    """
+    Build an empty response telling the reverse proxy to send the file itself.
+    The proxy then handles Range, conditional requests and the byte transfer.
+
+    Args:
+        path: Path to the file
+        root: Directory the proxy's internal location maps to
+        mode: "x-accel-redirect" (nginx) or "x-sendfile" (Apache, lighttpd)
+        internal_prefix: URI prefix of the internal location (x-accel-redirect)
+        media_type: Content type of the file
+        headers: Extra response headers
+
+    Returns:
+        Response: Offload response, or None if the file lies outside root
+    """
+    relative_path = os.path.relpath(os.path.realpath(path), os.path.realpath(root))
+    if relative_path.startswith(".."):
+        logger.warning(f"{path} is outside {root}, serving it directly")
+        return None
+
+    response_headers = dict(headers or {})
+    if mode == "x-accel-redirect":
+        response_headers["X-Accel-Redirect"] = internal_prefix.rstrip("/") + "/" + quote(relative_path)
+    else:
+        response_headers["X-Sendfile"] = os.path.realpath(path)
+
+    return Response(status_code=200, media_type=media_type, headers=response_headers)
@@ -9,13 +9,24 @@ import shutil
 import logging
 from pathlib import Path
 from typing import Optional, List, Tuple, Dict, Any
-from fastapi import HTTPException
-from fastapi.responses import FileResponse
+from fastapi import HTTPException, Request
+from starlette.responses import Response, RedirectResponse
 from dotenv import load_dotenv
-import datetime
 
-# Import Redis task manager
+# Import Redis task managers (async variant for the API gateway request path)
 from shared.redis_client import RedisTaskManager, TaskStatus
+from shared.async_redis_client import AsyncRedisTaskManager
+from shared.file_index import TaskFileIndex
+from shared.content_store import ContentStore
+from shared.expiry_index import ExpiryIndex, TEMP_RETENTION_SECONDS, OUTPUT_RETENTION_SECONDS
+from shared.storage_layout import resolve_output_path
+from shared.storage_backend import backend_for, is_remote_location, iter_stored_files
+from file_service.responses import (
+    OFFLOAD_MODES,
+    build_file_response,
+    build_offload_response,
+    is_new_download_request,
+)
 
 # Load environment variables
 load_dotenv()
@@ -24,6 +35,19 @@ load_dotenv()
 STORAGE_DIR = os.getenv("STORAGE_DIR", "/tmp/yt-mp3/output")
 TEMP_DIR = os.getenv("TEMP_DIR", "/tmp/yt-mp3")
 
+# Reverse proxy offload for downloads: off, x-accel-redirect (nginx) or x-sendfile
+FILE_OFFLOAD_MODE = os.getenv("FILE_OFFLOAD_MODE", "off").lower()
+# Internal nginx location that maps to STORAGE_DIR (x-accel-redirect only)
+FILE_OFFLOAD_PREFIX = os.getenv("FILE_OFFLOAD_PREFIX", "/internal-downloads/")
+
+# Incremental cleanup handles at most CLEANUP_BATCH_SIZE * CLEANUP_MAX_BATCHES
+# expired artifacts of each kind per run; the rest are picked up by the next run
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", "500"))
+CLEANUP_MAX_BATCHES = int(os.getenv("CLEANUP_MAX_BATCHES", "20"))
+
+# Expired outputs that live tasks still hold are checked again after this long
+LIVE_RECHECK_SECONDS = 24 * 3600
+
 # Create directories if they don't exist
 os.makedirs(STORAGE_DIR, exist_ok=True)
 os.makedirs(TEMP_DIR, exist_ok=True)
@@ -32,18 +56,20 @@ os.makedirs(TEMP_DIR, exist_ok=True)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("file_service")
 
-def get_file_for_task(task_id: str) -> Optional[str]:
+async def get_file_for_task(task_id: str, task_data: Optional[Dict[str, Any]] = None) -> Optional[str]:
     """
     Get the file path for a task
     
     Args:
         task_id: Task identifier
+        task_data: Task data if the caller already read it from Redis
         
     Returns:
         str: File path or None if not found
     """
     # Get task data from Redis
-    task_data = RedisTaskManager.get_task(task_id)
+    if task_data is None:
+        task_data = await AsyncRedisTaskManager.get_task(task_id)
     
     if not task_data:
         return None
@@ -51,99 +77,51 @@ def get_file_for_task(task_id: str) -> Optional[str]:
     # Check if file path is stored in task data
     file_path = task_data.get("file_path")
     
+    # Object store outputs are only removed by cleanup, which expires their tasks
+    if is_remote_location(file_path):
+        return file_path
+    
     if not file_path or not os.path.exists(file_path):
-        # If not, try to find in storage directory
-        logger.info(f"File path not found in task data, searching in storage directory")
+        # If not, look it up in the task -> file index (O(1), no directory scan)
+        logger.info(f"File path not found in task data, checking file index")
+        
+        indexed_path = await TaskFileIndex.lookup_async(task_id)
         
-        # Look for files with task_id in name
-        potential_files = [
-            os.path.join(STORAGE_DIR, f) for f in os.listdir(STORAGE_DIR)
-            if task_id in f and f.endswith(".mp3")
-        ]
+        # The file may have moved between the flat and sharded layouts
+        resolved_path = resolve_output_path(indexed_path) or resolve_output_path(file_path)
         
-        if potential_files:
-            file_path = potential_files[0]
+        if resolved_path and resolved_path != file_path:
+            file_path = resolved_path
             
             # Update task data with file path
-            RedisTaskManager.update_task(task_id, file_path=file_path)
+            await AsyncRedisTaskManager.update_task(task_id, file_path=file_path)
     
     return file_path if file_path and os.path.exists(file_path) else None
 
-def get_file_metadata(file_path: str) -> Dict[str, Any]:
+def mark_file_accessed(file_path: str) -> None:
     """
-    Get metadata for a file
+    Record an access for cleanup tracking without changing the file's mtime,
+    so ETag and Last-Modified stay stable across downloads
     
     Args:
         file_path: Path to file
-        
-    Returns:
-        dict: File metadata including size, creation time, etc.
     """
-    if not file_path or not os.path.exists(file_path):
-        return {}
-    
-    try:
-        stat_info = os.stat(file_path)
-        file_size = stat_info.st_size
-        created_time = datetime.datetime.fromtimestamp(stat_info.st_ctime)
-        
-        # Format file size for human readability
-        size_kb = file_size / 1024
-        size_mb = size_kb / 1024
-        
-        if size_mb >= 1:
-            size_str = f"{size_mb:.2f} MB"
-        else:
-            size_str = f"{size_kb:.2f} KB"
-        
-        metadata = {
-            "file_size": file_size,
-            "file_size_formatted": size_str,
-            "created_at": created_time.isoformat(),
-            "filename": os.path.basename(file_path),
-        }
-        
-        return metadata
-    except Exception as e:
-        logger.error(f"Error getting file metadata: {str(e)}")
-        return {}
+    stat_info = os.stat(file_path)
+    # Touching atime also bumps ctime, which cleanup uses as the last access
+    os.utime(file_path, ns=(time.time_ns(), stat_info.st_mtime_ns))
 
-def serve_file(task_id: str) -> FileResponse:
+def build_content_disposition(task_id: str, task_data: Dict[str, Any], filename: str) -> Tuple[str, str]:
     """
-    Serve a file for a task
+    Build the download filename and Content-Disposition header for a task
     
     Args:
         task_id: Task identifier
+        task_data: Task data from Redis
+        filename: Stored filename, used when the task has no title
         
     Returns:
-        FileResponse: FastAPI file response
-    
-    Raises:
-        HTTPException: If task or file not found
+        tuple: (download filename, Content-Disposition header value)
     """
-    # Get task data from Redis
-    task_data = RedisTaskManager.get_task(task_id)
-    
-    if not task_data:
-        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
-    
-    # Check task status
-    status = task_data.get("status")
-    if status != TaskStatus.COMPLETED.value:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Task {task_id} is not completed (status: {status})"
-        )
-    
-    # Get file path
-    file_path = get_file_for_task(task_id)
-    
-    if not file_path or not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail=f"File not found for task {task_id}")
-    
-    # Get filename for download
-    filename = os.path.basename(file_path)
-    
     # Use video title if available, fallback to filename
     title = task_data.get("title", "").strip()
     if title:
@@ -174,21 +152,6 @@ def serve_file(task_id: str) -> FileResponse:
     else:
         download_filename = filename
     
-    # Get file metadata to update task in Redis
-    file_metadata = get_file_metadata(file_path)
-    if file_metadata:
-        RedisTaskManager.update_task(task_id, file_metadata=file_metadata)
-    
-    # Mark file as accessed (for cleanup tracking)
-    try:
-        # Update last access time
-        os.utime(file_path, None)
-        # Record download in Redis
-        download_count = task_data.get("download_count", 0) + 1
-        RedisTaskManager.update_task(task_id, download_count=download_count)
-    except Exception as e:
-        logger.error(f"Error updating file access time: {str(e)}")
-    
     # Prepare safe Content-Disposition header with filename
     try:
         import urllib.parse
@@ -200,21 +163,121 @@ def serve_file(task_id: str) -> FileResponse:
         # Fallback to a simple ASCII filename
         content_disposition = f'attachment; filename="audio_{task_id}.mp3"'
     
-    # Serve file with appropriate headers
-    return FileResponse(
-        path=file_path,
-        media_type="audio/mpeg",
-        # Don't use the filename parameter as it doesn't handle encoding properly
-        # We'll set Content-Disposition ourselves
-        headers={
-            "Content-Disposition": content_disposition,
-            "X-Content-Type-Options": "nosniff",
-            "Cache-Control": "public, max-age=31536000",  # Cache for 1 year
-            "Access-Control-Allow-Origin": "*",  # Allow cross-origin requests
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "*"
-        }
+    return download_filename, content_disposition
+
+async def serve_file(task_id: str, request: Optional[Request] = None) -> Response:
+    """
+    Serve a file for a task
+    
+    Supports HEAD, single and multi-range requests (206) and conditional
+    requests (304) when the incoming request is given.
+    
+    Args:
+        task_id: Task identifier
+        request: Incoming request, used for Range and conditional headers
+        
+    Returns:
+        Response: File response (200, 206, 304 or 416)
+    
+    Raises:
+        HTTPException: If task or file not found
+    """
+    # Get task data from Redis
+    task_data = await AsyncRedisTaskManager.get_task(task_id)
+    
+    if not task_data:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    
+    # Check task status
+    status = task_data.get("status")
+    if status != TaskStatus.COMPLETED.value:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Task {task_id} is not completed (status: {status})"
+        )
+    
+    # Get file path (reusing the task data read above)
+    file_path = await get_file_for_task(task_id, task_data)
+    
+    if not file_path or not (is_remote_location(file_path) or os.path.exists(file_path)):
+        raise HTTPException(status_code=404, detail=f"File not found for task {task_id}")
+    
+    download_filename, content_disposition = build_content_disposition(
+        task_id, task_data, os.path.basename(file_path)
     )
+    
+    method = request.method if request is not None else "GET"
+    request_headers = request.headers if request is not None else {}
+    response_headers = {
+        "Content-Disposition": content_disposition,
+        "X-Content-Type-Options": "nosniff",
+        "Cache-Control": "public, max-age=31536000",  # Cache for 1 year
+        "Access-Control-Allow-Origin": "*",  # Allow cross-origin requests
+        "Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
+        "Access-Control-Allow-Headers": "*",
+        "Access-Control-Expose-Headers": "Accept-Ranges, Content-Range, Content-Length, ETag, Last-Modified"
+    }
+    
+    # Object store outputs: redirect to a short-lived presigned URL so the
+    # store serves the bytes (ranges included) instead of this worker
+    if is_remote_location(file_path):
+        presigned_url = backend_for(file_path).presigned_url(file_path, download_filename)
+        if is_new_download_request(request_headers, method):
+            try:
+                await AsyncRedisTaskManager.record_download(task_id)
+            except Exception as e:
+                logger.error(f"Error recording download for task {task_id}: {str(e)}")
+        return RedirectResponse(presigned_url, status_code=307, headers={"Cache-Control": "no-store"})
+    
+    # Offload mode: the reverse proxy streams the file from its internal location
+    response = None
+    if FILE_OFFLOAD_MODE in OFFLOAD_MODES:
+        response = build_offload_response(
+            file_path,
+            STORAGE_DIR,
+            FILE_OFFLOAD_MODE,
+            FILE_OFFLOAD_PREFIX,
+            media_type="audio/mpeg",
+            headers=response_headers
+        )
+        is_new_download = is_new_download_request(request_headers, method)
+    
+    if response is None:
+        # Build the response first: conditional and range handling decide whether
+        # this request counts as a download
+        response = build_file_response(
+            file_path,
+            request_headers,
+            method=method,
+            media_type="audio/mpeg",
+            headers=response_headers
+        )
+        
+        # Only full downloads and ranges starting at byte 0 count; seeks, HEAD
+        # and revalidations do not
+        is_new_download = method == "GET" and (
+            response.status_code == 200
+            or response.headers.get("content-range", "").startswith("bytes 0-")
+        )
+    
+    if not is_new_download:
+        return response
+    
+    # File metadata is recorded once when the conversion completes, so a
+    # download only needs to mark the file as accessed and count itself
+    try:
+        # Update last access time (for cleanup tracking)
+        mark_file_accessed(file_path)
+    except Exception as e:
+        logger.error(f"Error updating file access time: {str(e)}")
+    
+    # Record download in Redis with a single atomic increment
+    try:
+        await AsyncRedisTaskManager.record_download(task_id)
+    except Exception as e:
+        logger.error(f"Error recording download for task {task_id}: {str(e)}")
+    
+    return response
 
 def cleanup_temp_files(task_id: str = None) -> Tuple[int, int]:
     """
@@ -250,9 +313,9 @@ def cleanup_temp_files(task_id: str = None) -> Tuple[int, int]:
             except Exception as e:
                 logger.error(f"Error cleaning up temp directory for task {task_id}: {str(e)}")
     else:
-        # Clean up all files older than 24 hours
+        # Clean up all files older than the temp retention
         current_time = time.time()
-        cutoff_time = current_time - (24 * 3600)  # 24 hours ago
+        cutoff_time = current_time - TEMP_RETENTION_SECONDS
         
         for root, dirs, files in os.walk(TEMP_DIR):
             for file in files:
@@ -277,9 +340,47 @@ def cleanup_temp_files(task_id: str = None) -> Tuple[int, int]:
     
     return files_removed, bytes_freed
 
-def scheduled_cleanup() -> Tuple[int, int]:
+def remove_output_file(file_path: str, message: str) -> None:
     """
-    Run scheduled cleanup of output files
+    Delete a stored output and expire every task that pointed at it
+    
+    Args:
+        file_path: Location of the output
+        message: Status message for the expired tasks
+    """
+    file = os.path.basename(file_path)
+    digest = ContentStore.digest_for_path(file_path)
+    
+    # Remove file
+    backend_for(file_path).delete(file_path)
+    
+    # Expire every task that pointed at the file
+    try:
+        ExpiryIndex.cancel(ExpiryIndex.OUTPUTS, file_path)
+        task_ids = TaskFileIndex.forget_file(file_path)
+        if digest:
+            ContentStore.drop(digest)
+    except Exception:
+        task_ids = []
+    
+    # Older outputs may only carry the task_id in their name
+    if not task_ids and file.startswith("task-") and "_" in file:
+        task_ids = [file.split("_")[0]]
+    
+    for task_id in task_ids:
+        try:
+            RedisTaskManager.update_task(task_id, status=TaskStatus.EXPIRED.value, message=message)
+        except Exception:
+            pass
+
+def scheduled_cleanup(keep_live: bool = False) -> Tuple[int, int]:
+    """
+    Run a full sweep of output files, registering the files it keeps
+    in the expiry index (outputs stored before the index existed)
+    
+    Args:
+        keep_live: Only remove old files that no live task points at
+                   (capacity eviction takes care of the rest)
     
     Returns:
         tuple: (number of files deleted, number of bytes freed)
@@ -288,46 +389,34 @@ def scheduled_cleanup() -> Tuple[int, int]:
     bytes_freed = 0
     
     try:
-        # Clean up output files older than 7 days
+        # Clean up output files older than the output retention
         current_time = time.time()
-        cutoff_time = current_time - (7 * 24 * 3600)  # 7 days ago
+        cutoff_time = current_time - OUTPUT_RETENTION_SECONDS
         
-        for file in os.listdir(STORAGE_DIR):
-            file_path = os.path.join(STORAGE_DIR, file)
-            
-            if not os.path.isfile(file_path):
-                continue
+        # Walk local (flat and sharded) and object store outputs
+        for stored in iter_stored_files():
+            file_path = stored.location
                 
             try:
-                # Use the most recent of creation or modification time
-                file_ctime = os.path.getctime(file_path)
-                file_mtime = os.path.getmtime(file_path)
-                last_access = max(file_ctime, file_mtime)
-                
-                if last_access < cutoff_time:
-                    # Get file size before deletion
-                    file_size = os.path.getsize(file_path)
+                # Most recent of creation or modification time (object stores: upload time)
+                if stored.last_access >= cutoff_time:
+                    ExpiryIndex.backfill(ExpiryIndex.OUTPUTS, file_path,
+                                         stored.last_access + OUTPUT_RETENTION_SECONDS)
+                else:
+                    if _output_in_use(file_path, keep_live):
+                        ExpiryIndex.backfill(ExpiryIndex.OUTPUTS, file_path,
+                                             current_time + LIVE_RECHECK_SECONDS)
+                        continue
                     
-                    # Extract task_id from filename if possible
-                    task_id = None
-                    if file.startswith("task-") and "_" in file:
-                        task_id = file.split("_")[0]
+                    # Get file size before deletion
+                    file_size = stored.size
                     
-                    # Remove file
-                    os.remove(file_path)
+                    remove_output_file(file_path, "File expired and was removed from server")
                     
                     files_removed += 1
                     bytes_freed += file_size
                     
                     logger.info(f"Removed old output file {file_path}, freed {file_size} bytes")
-                    
-                    # Update task status if task_id was found
-                    if task_id:
-                        try:
-                            RedisTaskManager.update_task(task_id, status=TaskStatus.EXPIRED.value, 
-                                                       message="File expired and was removed from server")
-                        except Exception:
-                            pass
                         
             except Exception as e:
                 logger.error(f"Error cleaning up file {file_path}: {str(e)}")
@@ -336,3 +425,146 @@ def scheduled_cleanup() -> Tuple[int, int]:
         logger.error(f"Error during scheduled cleanup: {str(e)}")
         
     return files_removed, bytes_freed
+
+def _output_in_use(file_path: str, keep_live: bool) -> bool:
+    """
+    Whether an expired output must stay because tasks still hold it
+    
+    Args:
+        file_path: Location of the output
+        keep_live: Also keep files that any live task points at
+    
+    Returns:
+        bool: True if the file must be kept
+    """
+    # Content-addressed blobs go only with their last referencing task
+    digest = ContentStore.digest_for_path(file_path)
+    if digest and ContentStore.live_refs(digest) > 0:
+        return True
+    return keep_live and bool(TaskFileIndex.live_tasks_for_file(file_path))
+
+def _tree_size(path: str) -> Tuple[int, int]:
+    """
+    Count the files and bytes under a path
+    
+    Args:
+        path: File or directory
+    
+    Returns:
+        tuple: (number of files, number of bytes)
+    """
+    if not os.path.isdir(path):
+        return 1, os.path.getsize(path)
+    
+    files, size = 0, 0
+    for root, dirs, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+                files += 1
+            except OSError:
+                pass
+    return files, size
+
+def expire_due_temp_files(batch_size: int = CLEANUP_BATCH_SIZE,
+                          max_batches: int = CLEANUP_MAX_BATCHES) -> Tuple[int, int]:
+    """
+    Remove the temporary artifacts whose expiry has passed, using the expiry index
+    
+    Args:
+        batch_size: Artifacts taken from the index at a time
+        max_batches: Batches handled before leaving the rest to the next run
+    
+    Returns:
+        tuple: (number of files deleted, number of bytes freed)
+    """
+    files_removed = 0
+    bytes_freed = 0
+    
+    for _ in range(max_batches):
+        due = ExpiryIndex.pop_due(ExpiryIndex.TEMP, batch_size)
+        
+        for path in due:
+            try:
+                # Still written to recently: wait until it has been idle long enough
+                expires_at = os.path.getmtime(path) + TEMP_RETENTION_SECONDS
+                if expires_at > time.time():
+                    ExpiryIndex.schedule(ExpiryIndex.TEMP, path, expires_at)
+                    continue
+                
+                files, size = _tree_size(path)
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+                
+                files_removed += files
+                bytes_freed += size
+                
+                logger.info(f"Removed expired temp artifact {path}, freed {size} bytes")
+                
+            except FileNotFoundError:
+                # Already cleaned up after its task
+                pass
+            except Exception as e:
+                logger.error(f"Error cleaning up temp artifact {path}: {str(e)}")
+        
+        if len(due) < batch_size:
+            break
+    
+    return files_removed, bytes_freed
+
+def expire_due_outputs(keep_live: bool = False, batch_size: int = CLEANUP_BATCH_SIZE,
+                       max_batches: int = CLEANUP_MAX_BATCHES) -> Tuple[int, int]:
+    """
+    Remove the output files whose expiry has passed, using the expiry index
+    
+    Args:
+        keep_live: Only remove files that no live task points at
+                   (capacity eviction takes care of the rest)
+        batch_size: Files taken from the index at a time
+        max_batches: Batches handled before leaving the rest to the next run
+    
+    Returns:
+        tuple: (number of files deleted, number of bytes freed)
+    """
+    files_removed = 0
+    bytes_freed = 0
+    
+    for _ in range(max_batches):
+        due = ExpiryIndex.pop_due(ExpiryIndex.OUTPUTS, batch_size)
+        
+        for file_path in due:
+            try:
+                stored = backend_for(file_path).stat(file_path)
+                if stored is None:
+                    # Already removed (evicted or deleted by a full sweep)
+                    continue
+                
+                # Downloads and re-ingests push the last access, and with it the expiry, back
+                current_time = time.time()
+                expires_at = stored.last_access + OUTPUT_RETENTION_SECONDS
+                if expires_at > current_time:
+                    ExpiryIndex.schedule(ExpiryIndex.OUTPUTS, file_path, expires_at)
+                    continue
+                
+                if _output_in_use(file_path, keep_live):
+                    ExpiryIndex.schedule(ExpiryIndex.OUTPUTS, file_path, current_time + LIVE_RECHECK_SECONDS)
+                    continue
+                
+                remove_output_file(file_path, "File expired and was removed from server")
+                
+                files_removed += 1
+                bytes_freed += stored.size
+                
+                logger.info(f"Removed expired output file {file_path}, freed {stored.size} bytes")
+                
+            except Exception as e:
+                logger.error(f"Error cleaning up file {file_path}: {str(e)}")
+                # Keep it in the index so a later run tries again
+                ExpiryIndex.schedule(ExpiryIndex.OUTPUTS, file_path, time.time() + LIVE_RECHECK_SECONDS)
+        
+        if len(due) < batch_size:
+            break
+    
+    return files_removed, bytes_freed
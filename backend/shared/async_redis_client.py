@@ -0,0 +1,227 @@
+"""
+Asyncio Redis client for the API gateway request path.
+Provides a bounded connection pool and an async variant of RedisTaskManager so
+request handlers never block the event loop on Redis round trips.
+Celery workers keep using the synchronous client in shared.redis_client.
+"""
+
+import os
+import time
+from typing import Dict, Any, Optional, List
+import redis
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+
+from shared.redis_client import (
+    TASK_TTL_SECONDS,
+    TASK_EVENTS_PREFIX,
+    UPDATE_TASK_SCRIPT,
+    build_task_data,
+    build_update_data,
+    build_update_args,
+    parse_task_data,
+)
+
+# Load environment variables
+load_dotenv()
+
+# Connection pool settings
+redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+
+# Bounded pool: when all connections are busy, callers wait up to
+# REDIS_POOL_TIMEOUT seconds for a free one instead of opening more sockets
+async_redis_pool = aioredis.BlockingConnectionPool.from_url(
+    redis_url,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+    decode_responses=True,
+)
+async_redis_client = aioredis.Redis(connection_pool=async_redis_pool)
+
+# Same update as RedisTaskManager.update_task
+_UPDATE_TASK_SCRIPT = async_redis_client.register_script(UPDATE_TASK_SCRIPT)
+
+# Count a download, bump the version and notify watchers in one round trip
+_RECORD_DOWNLOAD_SCRIPT = async_redis_client.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local count = redis.call('HINCRBY', KEYS[1], 'download_count', 1)
+redis.call('HSET', KEYS[1], 'last_downloaded_at', ARGV[1])
+local version = redis.call('HINCRBY', KEYS[1], 'version', 1)
+redis.call('PUBLISH', KEYS[2], cjson.encode({download_count = count, last_downloaded_at = ARGV[1], version = version}))
+return count
+""")
+
+class AsyncRedisTaskManager:
+    """Asyncio task manager using Redis for storage"""
+
+    @staticmethod
+    async def create_task(task_id: str, youtube_url: str, title=None, channel=None, thumbnail=None, video_id=None) -> None:
+        """
+        Create a new task in Redis
+
+        Args:
+            task_id: Unique task identifier
+            youtube_url: YouTube URL to process
+            title: Video title
+            channel: Channel name
+            thumbnail: Thumbnail URL
+            video_id: YouTube video ID
+        """
+        task_data = build_task_data(youtube_url, title=title, channel=channel, thumbnail=thumbnail, video_id=video_id)
+
+        # Store task, queue entry and expiration in a single round trip
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(f"task:{task_id}", mapping=task_data)
+            pipe.lpush("tasks:pending", task_id)
+            pipe.expire(f"task:{task_id}", TASK_TTL_SECONDS)
+            await pipe.execute()
+
+    @staticmethod
+    async def create_tasks(tasks: List[Dict[str, Any]]) -> None:
+        """
+        Create many tasks in Redis with a single pipelined round trip
+
+        Args:
+            tasks: Dicts with task_id, youtube_url and optional title, channel, thumbnail, video_id
+        """
+        if not tasks:
+            return
+
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for task in tasks:
+                task_id = task["task_id"]
+                task_data = build_task_data(
+                    task["youtube_url"],
+                    title=task.get("title"),
+                    channel=task.get("channel"),
+                    thumbnail=task.get("thumbnail"),
+                    video_id=task.get("video_id")
+                )
+                pipe.hset(f"task:{task_id}", mapping=task_data)
+                pipe.lpush("tasks:pending", task_id)
+                pipe.expire(f"task:{task_id}", TASK_TTL_SECONDS)
+            await pipe.execute()
+
+    @staticmethod
+    async def update_task(task_id: str, status=None, progress=None, message=None,
+                          file_path=None, error=None, file_metadata=None, download_count=None) -> None:
+        """
+        Update task status in Redis
+
+        Args:
+            task_id: Task identifier
+            status: New task status
+            progress: Progress percentage (0-100)
+            message: Status message
+            file_path: Path to the converted file
+            error: Error message if failed
+            file_metadata: Dictionary containing file metadata (size, format, etc)
+            download_count: Number of times the file has been downloaded
+        """
+        update_data = build_update_data(
+            status=status, progress=progress, message=message, file_path=file_path,
+            error=error, file_metadata=file_metadata, download_count=download_count
+        )
+
+        if not update_data:
+            return
+
+        # HSET, version bump and status stream notification (carrying the
+        # new version) in one atomic round trip
+        keys, args = build_update_args(task_id, update_data, status)
+        await _UPDATE_TASK_SCRIPT(keys=keys, args=args)
+
+    @staticmethod
+    async def record_download(task_id: str) -> int:
+        """
+        Atomically count a download of a task's file
+        
+        Args:
+            task_id: Task identifier
+            
+        Returns:
+            int: New download count, or -1 if the task no longer exists
+        """
+        return await _RECORD_DOWNLOAD_SCRIPT(
+            keys=[f"task:{task_id}", f"{TASK_EVENTS_PREFIX}{task_id}"],
+            args=[int(time.time())]
+        )
+
+    @staticmethod
+    async def get_task(task_id: str) -> Dict[str, Any]:
+        """
+        Get task data from Redis
+
+        Args:
+            task_id: Task identifier
+
+        Returns:
+            dict: Task data
+        """
+        task_data = await async_redis_client.hgetall(f"task:{task_id}")
+        return parse_task_data(task_data)
+
+    @staticmethod
+    async def get_tasks(task_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get several tasks from Redis with a single pipelined round trip
+
+        Args:
+            task_ids: Task identifiers
+
+        Returns:
+            list: Task data for each ID, in order (empty dict for missing tasks)
+        """
+        if not task_ids:
+            return []
+
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.hgetall(f"task:{task_id}")
+            results = await pipe.execute()
+
+        return [parse_task_data(task_data) for task_data in results]
+
+    @staticmethod
+    async def get_next_pending_task() -> Optional[str]:
+        """
+        Get the next pending task from the queue
+
+        Returns:
+            str: Task ID or None if no pending tasks
+        """
+        return await async_redis_client.rpop("tasks:pending")
+
+    @staticmethod
+    async def delete_task(task_id: str) -> None:
+        """
+        Delete a task from Redis
+
+        Args:
+            task_id: Task identifier
+        """
+        await async_redis_client.delete(f"task:{task_id}")
+
+async def check_redis_connection_async() -> bool:
+    """
+    Check if Redis connection is working
+
+    Returns:
+        bool: True if connection works, False otherwise
+    """
+    try:
+        return await async_redis_client.ping()
+    except (redis.ConnectionError, redis.TimeoutError):
+        return False
+
+async def close_async_redis() -> None:
+    """Close the async client and disconnect all pooled connections"""
+    await async_redis_client.close()
+    await async_redis_pool.disconnect()
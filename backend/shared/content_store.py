@@ -0,0 +1,140 @@
+"""
+Content-addressed output store.
+Finished MP3s are stored once under the SHA-256 of their content; tasks that
+produce byte-identical output share the blob. Each blob keeps the set of tasks
+referencing it in Redis (blob_refs:{digest}), and cleanup only deletes a blob
+once none of those tasks is still live.
+"""
+
+import os
+import hashlib
+import logging
+from typing import Optional
+
+from shared.redis_client import redis_client, TaskStatus
+from shared.storage_layout import BLOB_DIR, blob_key
+from shared.storage_backend import get_storage_backend, is_remote_location, S3StorageBackend, S3_PREFIX
+
+logger = logging.getLogger("content_store")
+
+BLOB_REFS_PREFIX = "blob_refs:"
+
+# Read size for hashing
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def hash_file(file_path: str) -> str:
+    """
+    Compute the SHA-256 of a file
+
+    Args:
+        file_path: Path to file
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ContentStore:
+    """Deduplicating blob store with Redis reference tracking"""
+
+    @staticmethod
+    def digest_for_path(file_path: Optional[str]) -> Optional[str]:
+        """
+        Get the content digest of a blob location
+
+        Args:
+            file_path: Location of an output file (local path or object store URI)
+
+        Returns:
+            str: Digest, or None if the location is not a blob
+        """
+        if not file_path:
+            return None
+        if is_remote_location(file_path):
+            _, key = S3StorageBackend.parse_location(file_path)
+            if not key.startswith(f"{S3_PREFIX}{os.path.basename(BLOB_DIR)}/"):
+                return None
+        elif not os.path.abspath(file_path).startswith(BLOB_DIR + os.sep):
+            return None
+        return os.path.splitext(os.path.basename(file_path))[0]
+
+    @staticmethod
+    def ingest(task_id: str, file_path: str, digest: Optional[str] = None) -> str:
+        """
+        Move a finished output into the store, deduplicating identical content
+
+        Args:
+            task_id: Task that produced the file
+            file_path: Local path to the finished output
+            digest: SHA-256 of the file if already known
+
+        Returns:
+            str: Location of the blob the task should point at
+        """
+        digest = digest or hash_file(file_path)
+        key = blob_key(digest, os.path.splitext(file_path)[1] or ".mp3")
+
+        # Reference first, so cleanup never sees the blob unreferenced
+        ContentStore.add_ref(digest, task_id)
+
+        # The backend keeps an existing copy and drops the duplicate
+        return get_storage_backend().put_file(file_path, key)
+
+    @staticmethod
+    def add_ref(digest: str, task_id: str) -> int:
+        """
+        Record that a task references a blob
+
+        Args:
+            digest: Blob digest
+            task_id: Task identifier
+
+        Returns:
+            int: Number of tasks referencing the blob
+        """
+        with redis_client.pipeline(transaction=False) as pipe:
+            pipe.sadd(f"{BLOB_REFS_PREFIX}{digest}", task_id)
+            pipe.scard(f"{BLOB_REFS_PREFIX}{digest}")
+            return pipe.execute()[1]
+
+    @staticmethod
+    def live_refs(digest: str) -> int:
+        """
+        Count the live tasks referencing a blob, pruning expired ones
+
+        Args:
+            digest: Blob digest
+
+        Returns:
+            int: Number of live referencing tasks
+        """
+        refs_key = f"{BLOB_REFS_PREFIX}{digest}"
+        task_ids = list(redis_client.smembers(refs_key))
+        if not task_ids:
+            return 0
+
+        with redis_client.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.hget(f"task:{task_id}", "status")
+            statuses = pipe.execute()
+
+        # A task is gone once its record has expired or it was marked expired
+        dead = [task_id for task_id, status in zip(task_ids, statuses)
+                if status is None or status == TaskStatus.EXPIRED.value]
+        if dead:
+            redis_client.srem(refs_key, *dead)
+        return len(task_ids) - len(dead)
+
+    @staticmethod
+    def drop(digest: str) -> None:
+        """
+        Forget the references of a deleted blob
+
+        Args:
+            digest: Blob digest
+        """
+        redis_client.delete(f"{BLOB_REFS_PREFIX}{digest}")
@@ -0,0 +1,125 @@
+"""
+Expiry index for temporary and output files.
+Every artifact is registered when it is created in a Redis sorted set scored
+by the time it becomes eligible for removal (expiry:temp for per-task
+directories under TEMP_DIR, expiry:outputs for stored outputs). Cleanup pops
+only the entries that are due, in bounded batches, instead of walking every
+file on each pass. A score is the earliest possible expiry: cleanup checks the
+popped artifact and schedules it again if it was used since.
+"""
+
+import os
+import time
+import logging
+from typing import List, Optional
+from dotenv import load_dotenv
+
+from shared.redis_client import redis_client
+
+# Load environment variables
+load_dotenv()
+
+# How long per-task download directories and stored outputs are kept
+TEMP_RETENTION_SECONDS = int(os.getenv("TEMP_RETENTION_SECONDS", str(24 * 3600)))
+OUTPUT_RETENTION_SECONDS = int(os.getenv("OUTPUT_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+EXPIRY_PREFIX = "expiry:"
+
+logger = logging.getLogger("expiry_index")
+
+# Take up to ARGV[2] members due by ARGV[1], so concurrent cleanups never share an entry
+_POP_DUE_SCRIPT = redis_client.register_script("""
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+""")
+
+class ExpiryIndex:
+    """Redis sorted sets of artifacts by expiry time"""
+
+    TEMP = "temp"
+    OUTPUTS = "outputs"
+
+    @staticmethod
+    def schedule(kind: str, member: str, expires_at: Optional[float] = None) -> None:
+        """
+        Register an artifact, or move its expiry later
+
+        Args:
+            kind: ExpiryIndex.TEMP or ExpiryIndex.OUTPUTS
+            member: Path or location of the artifact
+            expires_at: Unix time it becomes removable (default: now plus the kind's retention)
+        """
+        if expires_at is None:
+            retention = TEMP_RETENTION_SECONDS if kind == ExpiryIndex.TEMP else OUTPUT_RETENTION_SECONDS
+            expires_at = time.time() + retention
+        # GT: a reused artifact never has its expiry brought forward
+        redis_client.zadd(f"{EXPIRY_PREFIX}{kind}", {member: expires_at}, gt=True)
+
+    @staticmethod
+    def backfill(kind: str, member: str, expires_at: float) -> None:
+        """
+        Register an artifact found by a full sweep, keeping any existing entry
+
+        Args:
+            kind: ExpiryIndex.TEMP or ExpiryIndex.OUTPUTS
+            member: Path or location of the artifact
+            expires_at: Unix time it becomes removable
+        """
+        redis_client.zadd(f"{EXPIRY_PREFIX}{kind}", {member: expires_at}, nx=True)
+
+    @staticmethod
+    def expires_at(kind: str, member: str) -> Optional[float]:
+        """
+        Get when an artifact becomes removable
+
+        Args:
+            kind: ExpiryIndex.TEMP or ExpiryIndex.OUTPUTS
+            member: Path or location of the artifact
+
+        Returns:
+            float: Unix time, or None if the artifact is not in the index
+        """
+        return redis_client.zscore(f"{EXPIRY_PREFIX}{kind}", member)
+
+    @staticmethod
+    def cancel(kind: str, member: str) -> None:
+        """
+        Drop an artifact that was removed
+
+        Args:
+            kind: ExpiryIndex.TEMP or ExpiryIndex.OUTPUTS
+            member: Path or location of the artifact
+        """
+        redis_client.zrem(f"{EXPIRY_PREFIX}{kind}", member)
+
+    @staticmethod
+    def pop_due(kind: str, limit: int, now: Optional[float] = None) -> List[str]:
+        """
+        Take artifacts whose expiry has passed out of the index
+
+        Args:
+            kind: ExpiryIndex.TEMP or ExpiryIndex.OUTPUTS
+            limit: Maximum number of artifacts to take
+            now: Current Unix time
+
+        Returns:
+            list: Artifacts, soonest expiry first
+        """
+        now = time.time() if now is None else now
+        return _POP_DUE_SCRIPT(keys=[f"{EXPIRY_PREFIX}{kind}"], args=[now, limit])
+
+    @staticmethod
+    def pending(kind: str) -> int:
+        """
+        Count registered artifacts
+
+        Args:
+            kind: ExpiryIndex.TEMP or ExpiryIndex.OUTPUTS
+
+        Returns:
+            int: Number of artifacts in the index
+        """
+        return redis_client.zcard(f"{EXPIRY_PREFIX}{kind}")
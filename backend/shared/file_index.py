@@ -0,0 +1,126 @@
+"""
+Task to output file index.
+Maps each task to its MP3 and each MP3 back to the tasks that point at it, so
+the API can resolve a task's file and cleanup can expire the right tasks
+without scanning STORAGE_DIR. Kept current by the workers that produce files.
+"""
+
+import logging
+from typing import List, Optional
+
+from shared.redis_client import redis_client, TaskStatus, TASK_TTL_SECONDS
+from shared.async_redis_client import async_redis_client
+
+logger = logging.getLogger("file_index")
+
+TASK_FILE_PREFIX = "task_file:"
+FILE_TASKS_PREFIX = "file_tasks:"
+
+class TaskFileIndex:
+    """Redis-backed task <-> file index"""
+
+    @staticmethod
+    def record(task_id: str, file_path: str) -> None:
+        """
+        Record that a task's output lives at file_path
+
+        Args:
+            task_id: Task identifier
+            file_path: Path to the MP3
+        """
+        with redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(f"{TASK_FILE_PREFIX}{task_id}", file_path, ex=TASK_TTL_SECONDS)
+            pipe.sadd(f"{FILE_TASKS_PREFIX}{file_path}", task_id)
+            pipe.expire(f"{FILE_TASKS_PREFIX}{file_path}", TASK_TTL_SECONDS)
+            pipe.execute()
+
+    @staticmethod
+    def tasks_for_file(file_path: str) -> List[str]:
+        """
+        Get the tasks whose output is file_path
+
+        Args:
+            file_path: Path to the MP3
+
+        Returns:
+            list: Task identifiers
+        """
+        return list(redis_client.smembers(f"{FILE_TASKS_PREFIX}{file_path}"))
+
+    @staticmethod
+    def live_tasks_for_file(file_path: str) -> List[str]:
+        """
+        Get the tasks of a file whose records are still live
+
+        Args:
+            file_path: Path to the MP3
+
+        Returns:
+            list: Task identifiers that have not expired
+        """
+        task_ids = TaskFileIndex.tasks_for_file(file_path)
+        if not task_ids:
+            return []
+
+        with redis_client.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.hget(f"task:{task_id}", "status")
+            statuses = pipe.execute()
+
+        return [task_id for task_id, status in zip(task_ids, statuses)
+                if status is not None and status != TaskStatus.EXPIRED.value]
+
+    @staticmethod
+    def move_file(old_path: str, new_path: str) -> List[str]:
+        """
+        Point every task of a file at its new location
+
+        Args:
+            old_path: Previous path of the MP3
+            new_path: New path of the MP3
+
+        Returns:
+            list: Task identifiers that were re-pointed
+        """
+        task_ids = TaskFileIndex.tasks_for_file(old_path)
+        with redis_client.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.set(f"{TASK_FILE_PREFIX}{task_id}", new_path, ex=TASK_TTL_SECONDS)
+                pipe.sadd(f"{FILE_TASKS_PREFIX}{new_path}", task_id)
+            if task_ids:
+                pipe.expire(f"{FILE_TASKS_PREFIX}{new_path}", TASK_TTL_SECONDS)
+            pipe.delete(f"{FILE_TASKS_PREFIX}{old_path}")
+            pipe.execute()
+        return task_ids
+
+    @staticmethod
+    def forget_file(file_path: str) -> List[str]:
+        """
+        Drop a removed file from the index
+
+        Args:
+            file_path: Path to the removed MP3
+
+        Returns:
+            list: Task identifiers that pointed at the file
+        """
+        task_ids = TaskFileIndex.tasks_for_file(file_path)
+        with redis_client.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.delete(f"{TASK_FILE_PREFIX}{task_id}")
+            pipe.delete(f"{FILE_TASKS_PREFIX}{file_path}")
+            pipe.execute()
+        return task_ids
+
+    @staticmethod
+    async def lookup_async(task_id: str) -> Optional[str]:
+        """
+        Get the indexed output path for a task
+
+        Args:
+            task_id: Task identifier
+
+        Returns:
+            str: File path or None if the task has no indexed file
+        """
+        return await async_redis_client.get(f"{TASK_FILE_PREFIX}{task_id}")
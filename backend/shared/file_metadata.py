@@ -0,0 +1,117 @@
+"""
+File metadata helpers shared by the workers and the file service.
+Describes an output (size, audio properties) without pulling in the
+API-layer serving code.
+"""
+
+import os
+import json
+import logging
+import datetime
+import subprocess
+from typing import Dict, Any
+
+from shared.storage_backend import backend_for, is_remote_location
+
+logger = logging.getLogger("file_metadata")
+
+def get_file_metadata(file_path: str) -> Dict[str, Any]:
+    """
+    Get metadata for a file
+    
+    Args:
+        file_path: Path to file
+        
+    Returns:
+        dict: File metadata including size, creation time, etc.
+    """
+    if not file_path:
+        return {}
+    
+    try:
+        if is_remote_location(file_path):
+            # Object store outputs: one HEAD request
+            file_size = backend_for(file_path).size(file_path)
+            if file_size is None:
+                return {}
+            created_time = datetime.datetime.now()
+        elif not os.path.exists(file_path):
+            return {}
+        else:
+            stat_info = os.stat(file_path)
+            file_size = stat_info.st_size
+            created_time = datetime.datetime.fromtimestamp(stat_info.st_ctime)
+        
+        # Format file size for human readability
+        size_kb = file_size / 1024
+        size_mb = size_kb / 1024
+        
+        if size_mb >= 1:
+            size_str = f"{size_mb:.2f} MB"
+        else:
+            size_str = f"{size_kb:.2f} KB"
+        
+        metadata = {
+            "file_size": file_size,
+            "file_size_formatted": size_str,
+            "created_at": created_time.isoformat(),
+            "filename": os.path.basename(file_path),
+        }
+        
+        return metadata
+    except Exception as e:
+        logger.error(f"Error getting file metadata: {str(e)}")
+        return {}
+
+def probe_audio(file_path: str) -> Dict[str, Any]:
+    """
+    Read audio properties of a finished output with ffprobe.
+    
+    Args:
+        file_path: Path to the audio file
+        
+    Returns:
+        dict: duration (seconds), bitrate (bits/s), codec, sample_rate (Hz)
+              and channels; empty if ffprobe fails
+    """
+    probe_cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "format=duration,bit_rate:stream=codec_name,sample_rate,channels",
+        "-of", "json",
+        file_path
+    ]
+    
+    result = subprocess.run(
+        probe_cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    
+    if result.returncode != 0:
+        logger.warning(f"Could not probe {file_path}: {result.stderr}")
+        return {}
+    
+    try:
+        probe = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return {}
+    
+    file_format = probe.get("format", {})
+    stream = (probe.get("streams") or [{}])[0]
+    
+    def number(value, cast):
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            return None
+    
+    return {
+        "duration": number(file_format.get("duration"), float),
+        "bitrate": number(file_format.get("bit_rate"), int),
+        "codec": stream.get("codec_name"),
+        "sample_rate": number(stream.get("sample_rate"), int),
+        "channels": number(stream.get("channels"), int),
+    }
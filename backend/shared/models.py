@@ -10,7 +10,22 @@ class DownloadRequest(BaseModel):
 class DownloadResponse(BaseModel):
     taskId: str
     status: str
+
+class BatchDownloadRequest(BaseModel):
+    urls: List[str]
+
+class BatchDownloadItem(BaseModel):
+    url: str
+    taskId: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class BatchDownloadResponse(BaseModel):
+    tasks: List[BatchDownloadItem]
     
+class BulkStatusRequest(BaseModel):
+    ids: List[str]
+
 class TaskStatusResponse(BaseModel):
     taskId: str
     status: str
@@ -23,5 +38,10 @@ class TaskStatusResponse(BaseModel):
     thumbnail: Optional[str] = None
     fileSize: Optional[int] = None
     fileSizeFormatted: Optional[str] = None
+    duration: Optional[float] = None
+    bitrate: Optional[int] = None
+    codec: Optional[str] = None
+    sampleRate: Optional[int] = None
     downloadCount: Optional[int] = None
     expiresText: Optional[str] = None
+    version: Optional[int] = None
@@ -0,0 +1,115 @@
+"""
+Coalescing progress writer for pipeline stages.
+yt-dlp hooks and the ffmpeg loop report progress many times per second. A
+ProgressReporter keeps only the latest fields of its task and writes them in
+one pipelined task update (plus the Celery state, when a Celery task is
+attached) at most every PROGRESS_FLUSH_INTERVAL_MS, so Redis load per task
+stays constant however chatty the child process is. Status changes and
+explicitly forced updates are written immediately.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+from shared.redis_client import RedisTaskManager
+
+# Load environment variables
+load_dotenv()
+
+# Minimum time between two progress writes for one task
+PROGRESS_FLUSH_INTERVAL_MS = int(os.getenv("PROGRESS_FLUSH_INTERVAL_MS", "500"))
+
+logger = logging.getLogger("progress_reporter")
+
+class ProgressReporter:
+    """Buffers one task's progress and writes it at a bounded rate"""
+
+    def __init__(self, task_id: str, celery_task=None, interval_ms: int = PROGRESS_FLUSH_INTERVAL_MS):
+        self.task_id = task_id
+        self.celery_task = celery_task
+        self.interval = interval_ms / 1000
+        self._pending: Dict[str, Any] = {}
+        self._status: Optional[str] = None
+        # Highest progress reported for the current status
+        self._progress_status: Optional[str] = None
+        self._max_progress: Optional[float] = None
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def report(self, status: Optional[str] = None, progress: Optional[float] = None,
+               message: Optional[str] = None, error: Optional[str] = None, force: bool = False) -> bool:
+        """
+        Record a progress update, writing it now only if it is due
+
+        Args:
+            status: Task status
+            progress: Progress percentage (0-100)
+            message: Status message
+            error: Error message if failed
+            force: Write immediately (phase ends, completion)
+
+        Returns:
+            bool: True if the update was written
+        """
+        with self._lock:
+            if status is not None and status != self._progress_status:
+                # Progress counts per phase; a new status starts over
+                self._progress_status, self._max_progress = status, None
+            if progress is not None:
+                # Never move the bar backwards (e.g. a retry or a second format restarting at 0%)
+                if self._max_progress is not None and progress < self._max_progress:
+                    progress = self._max_progress
+                self._max_progress = progress
+
+            for field, value in (("status", status), ("progress", progress),
+                                 ("message", message), ("error", error)):
+                if value is not None:
+                    self._pending[field] = value
+
+            due = (
+                force
+                or (status is not None and status != self._status)
+                or time.monotonic() - self._last_flush >= self.interval
+            )
+            if not due:
+                return False
+            return self._flush_locked()
+
+    def flush(self) -> bool:
+        """
+        Write any buffered update now
+
+        Returns:
+            bool: True if there was something to write
+        """
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self) -> bool:
+        if not self._pending:
+            return False
+
+        update, self._pending = self._pending, {}
+        self._last_flush = time.monotonic()
+        if "status" in update:
+            self._status = update["status"]
+
+        # HSET, version bump and status stream notification in one round trip
+        RedisTaskManager.update_task(self.task_id, **update)
+
+        if self.celery_task:
+            try:
+                if "error" in update:
+                    self.celery_task.update_state(state='FAILURE', meta={'error': update["error"]})
+                elif "progress" in update:
+                    self.celery_task.update_state(
+                        state='PROGRESS',
+                        meta={'current': int(update["progress"]), 'total': 100, 'status': update.get("message", "")}
+                    )
+            except Exception as e:
+                logger.warning(f"Could not update Celery state for task {self.task_id}: {str(e)}")
+        return True
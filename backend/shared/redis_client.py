@@ -27,11 +27,148 @@ class TaskStatus(Enum):
     FAILED = "failed"
     EXPIRED = "expired"  # Added for expired files
 
+# Task hash TTL: 7 days + 1 hour for cleanup
+TASK_TTL_SECONDS = 7 * 24 * 3600 + 3600
+
+# Pub/sub channel prefix for task state changes (task_updates:{task_id})
+TASK_EVENTS_PREFIX = "task_updates:"
+
+# Apply an update, bump the version and publish the update with the new version.
+# KEYS: task hash, update channel; ARGV: update JSON, TTL to reset (0 keeps it), field/value pairs
+UPDATE_TASK_SCRIPT = """
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+local version = redis.call('HINCRBY', KEYS[1], 'version', 1)
+if tonumber(ARGV[2]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+local update = cjson.decode(ARGV[1])
+update['version'] = version
+redis.call('PUBLISH', KEYS[2], cjson.encode(update))
+return version
+"""
+_UPDATE_TASK_SCRIPT = redis_client.register_script(UPDATE_TASK_SCRIPT)
+
+def build_task_data(youtube_url: str, title=None, channel=None, thumbnail=None, video_id=None) -> Dict[str, Any]:
+    """
+    Build the initial hash fields for a new task
+    
+    Args:
+        youtube_url: YouTube URL to process
+        title: Video title
+        channel: Channel name
+        thumbnail: Thumbnail URL
+        video_id: YouTube video ID
+    
+    Returns:
+        dict: Task fields ready for HSET
+    """
+    task_data = {
+        "youtube_url": youtube_url,
+        "status": TaskStatus.PENDING.value,
+        "progress": 0,
+        "message": "Task queued for processing",
+        "created_at": int(time.time()),  # Unix timestamp
+        "download_count": 0,
+        "version": 1  # Bumped on every update, used for ETags and long-polling
+    }
+    
+    # Add metadata if provided
+    if title:
+        task_data["title"] = title
+    if channel:
+        task_data["channel"] = channel
+    if thumbnail:
+        task_data["thumbnail"] = thumbnail
+    if video_id:
+        task_data["video_id"] = video_id
+    
+    return task_data
+
+def build_update_data(status=None, progress=None, message=None, file_path=None,
+                      error=None, file_metadata=None, download_count=None) -> Dict[str, Any]:
+    """
+    Build the hash fields for a task update, skipping fields that were not provided
+    
+    Returns:
+        dict: Task fields ready for HSET (may be empty)
+    """
+    update_data = {}
+    
+    # Only update provided fields
+    if status is not None:
+        update_data["status"] = status
+    if progress is not None:
+        update_data["progress"] = progress
+    if message is not None:
+        update_data["message"] = message
+    if file_path is not None:
+        update_data["file_path"] = file_path
+    if error is not None:
+        update_data["error"] = error
+    if download_count is not None:
+        update_data["download_count"] = download_count
+        
+    # Handle file metadata as a separate JSON field
+    if file_metadata is not None:
+        update_data["file_metadata"] = json.dumps(file_metadata)
+    
+    return update_data
+
+def build_update_args(task_id: str, update_data: Dict[str, Any], status=None):
+    """
+    Build the keys and arguments of UPDATE_TASK_SCRIPT for an update
+    
+    Args:
+        task_id: Task identifier
+        update_data: Fields from build_update_data
+        status: New task status (completed tasks get their expiration reset)
+    
+    Returns:
+        tuple: (keys, args)
+    """
+    # Reset expiration time when task is completed (7 days + 1 hour)
+    ttl = TASK_TTL_SECONDS if status == TaskStatus.COMPLETED.value else 0
+    args = [json.dumps(update_data), ttl]
+    for field, value in update_data.items():
+        args.extend((field, value))
+    return [f"task:{task_id}", f"{TASK_EVENTS_PREFIX}{task_id}"], args
+
+def parse_task_data(task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert raw task hash values from Redis into their Python types
+    
+    Args:
+        task_data: Raw HGETALL result
+    
+    Returns:
+        dict: Task data
+    """
+    # Convert progress to float if exists
+    if "progress" in task_data:
+        task_data["progress"] = float(task_data["progress"])
+    
+    # Convert download_count and version to integers if they exist
+    for field in ("download_count", "version"):
+        if field in task_data:
+            try:
+                task_data[field] = int(task_data[field])
+            except (TypeError, ValueError):
+                task_data[field] = 0
+            
+    # Parse file_metadata from JSON if it exists
+    if "file_metadata" in task_data:
+        try:
+            task_data["file_metadata"] = json.loads(task_data["file_metadata"])
+        except json.JSONDecodeError:
+            task_data["file_metadata"] = {}
+        
+    return task_data
+
 class RedisTaskManager:
     """Task manager using Redis for storage"""
     
     @staticmethod
-    def create_task(task_id: str, youtube_url: str, title=None, channel=None, thumbnail=None) -> None:
+    def create_task(task_id: str, youtube_url: str, title=None, channel=None, thumbnail=None, video_id=None) -> None:
         """
         Create a new task in Redis
         
@@ -41,23 +178,9 @@ class RedisTaskManager:
             title: Video title
             channel: Channel name
             thumbnail: Thumbnail URL
+            video_id: YouTube video ID
         """
-        task_data = {
-            "youtube_url": youtube_url,
-            "status": TaskStatus.PENDING.value,
-            "progress": 0,
-            "message": "Task queued for processing",
-            "created_at": int(time.time()),  # Unix timestamp
-            "download_count": 0
-        }
-        
-        # Add metadata if provided
-        if title:
-            task_data["title"] = title
-        if channel:
-            task_data["channel"] = channel
-        if thumbnail:
-            task_data["thumbnail"] = thumbnail
+        task_data = build_task_data(youtube_url, title=title, channel=channel, thumbnail=thumbnail, video_id=video_id)
         
         # Store task data in Redis
         redis_client.hset(f"task:{task_id}", mapping=task_data)
@@ -66,7 +189,7 @@ class RedisTaskManager:
         redis_client.lpush("tasks:pending", task_id)
         
         # Set expiration (7 days + 1 hour for cleanup)
-        redis_client.expire(f"task:{task_id}", 7 * 24 * 3600 + 3600)
+        redis_client.expire(f"task:{task_id}", TASK_TTL_SECONDS)
     
     @staticmethod
     def update_task(task_id: str, status=None, progress=None, message=None, 
@@ -84,32 +207,16 @@ class RedisTaskManager:
             file_metadata: Dictionary containing file metadata (size, format, etc)
             download_count: Number of times the file has been downloaded
         """
-        update_data = {}
-        
-        # Only update provided fields
-        if status is not None:
-            update_data["status"] = status
-        if progress is not None:
-            update_data["progress"] = progress
-        if message is not None:
-            update_data["message"] = message
-        if file_path is not None:
-            update_data["file_path"] = file_path
-        if error is not None:
-            update_data["error"] = error
-        if download_count is not None:
-            update_data["download_count"] = download_count
-            
-        # Handle file metadata as a separate JSON field
-        if file_metadata is not None:
-            update_data["file_metadata"] = json.dumps(file_metadata)
+        update_data = build_update_data(
+            status=status, progress=progress, message=message, file_path=file_path,
+            error=error, file_metadata=file_metadata, download_count=download_count
+        )
             
         if update_data:
-            redis_client.hset(f"task:{task_id}", mapping=update_data)
-            
-            # Reset expiration time when task is updated (7 days + 1 hour)
-            if status == TaskStatus.COMPLETED.value:
-                redis_client.expire(f"task:{task_id}", 7 * 24 * 3600 + 3600)
+            # HSET, version bump and status stream notification (carrying the
+            # new version) in one atomic round trip
+            keys, args = build_update_args(task_id, update_data, status)
+            _UPDATE_TASK_SCRIPT(keys=keys, args=args)
     
     @staticmethod
     def get_task(task_id: str) -> Dict[str, Any]:
@@ -123,26 +230,7 @@ class RedisTaskManager:
             dict: Task data
         """
         task_data = redis_client.hgetall(f"task:{task_id}")
-        
-        # Convert progress to float if exists
-        if "progress" in task_data:
-            task_data["progress"] = float(task_data["progress"])
-        
-        # Convert download_count to integer if exists
-        if "download_count" in task_data:
-            try:
-                task_data["download_count"] = int(task_data["download_count"])
-            except (TypeError, ValueError):
-                task_data["download_count"] = 0
-                
-        # Parse file_metadata from JSON if it exists
-        if "file_metadata" in task_data:
-            try:
-                task_data["file_metadata"] = json.loads(task_data["file_metadata"])
-            except json.JSONDecodeError:
-                task_data["file_metadata"] = {}
-            
-        return task_data
+        return parse_task_data(task_data)
     
     @staticmethod
     def get_next_pending_task() -> Optional[str]:
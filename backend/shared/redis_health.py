@@ -0,0 +1,159 @@
+"""
+Background Redis health monitor with a circuit breaker for the API gateway.
+Handlers read the cached health state instead of sending a PING per request,
+and fail fast while Redis is known to be down instead of stacking timeouts.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from enum import Enum
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+
+from shared.async_redis_client import check_redis_connection_async
+
+# Load environment variables
+load_dotenv()
+
+# Monitor and breaker settings
+REDIS_HEALTH_INTERVAL = float(os.getenv("REDIS_HEALTH_INTERVAL", "5"))  # seconds between PINGs
+REDIS_BREAKER_THRESHOLD = int(os.getenv("REDIS_BREAKER_THRESHOLD", "3"))  # failures before opening
+REDIS_BREAKER_RESET_TIMEOUT = float(os.getenv("REDIS_BREAKER_RESET_TIMEOUT", "10"))  # seconds before a trial request
+
+logger = logging.getLogger("redis_health")
+
+class CircuitState(Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"        # Redis healthy, requests flow
+    OPEN = "open"            # Redis down, requests fail fast
+    HALF_OPEN = "half_open"  # Trial request allowed to test recovery
+
+class RedisHealthMonitor:
+    """Tracks Redis reachability in the background and gates requests with a circuit breaker"""
+
+    def __init__(self, interval: float = REDIS_HEALTH_INTERVAL,
+                 failure_threshold: int = REDIS_BREAKER_THRESHOLD,
+                 reset_timeout: float = REDIS_BREAKER_RESET_TIMEOUT):
+        self.interval = interval
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_started_at: Optional[float] = None
+        self.last_check = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_healthy(self) -> bool:
+        """Whether the last known Redis state is reachable"""
+        return self.state == CircuitState.CLOSED
+
+    def allow_request(self) -> bool:
+        """
+        Decide whether a request may use Redis
+
+        Returns:
+            bool: False while the circuit is open and the reset timeout has not
+                  elapsed, or while a trial request is already in flight
+        """
+        now = time.monotonic()
+        if self.state == CircuitState.OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            # Let one request through to test whether Redis has recovered
+            self.state = CircuitState.HALF_OPEN
+            self.trial_started_at = now
+            return True
+        if self.state == CircuitState.HALF_OPEN:
+            # One trial at a time; a trial that never reported back (e.g. it
+            # failed validation before touching Redis) frees the slot after the reset timeout
+            if self.trial_started_at is not None and now - self.trial_started_at < self.reset_timeout:
+                return False
+            self.trial_started_at = now
+            return True
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful Redis operation and close the circuit"""
+        if self.state != CircuitState.CLOSED:
+            logger.info("Redis reachable again, closing circuit")
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.trial_started_at = None
+
+    def record_failure(self) -> None:
+        """Record a failed Redis operation, opening the circuit past the threshold"""
+        self.consecutive_failures += 1
+        self.trial_started_at = None
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                logger.warning(f"Redis unreachable after {self.consecutive_failures} failures, opening circuit")
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    async def check_now(self) -> bool:
+        """
+        PING Redis once and update the breaker
+
+        Returns:
+            bool: True if Redis answered
+        """
+        try:
+            healthy = await check_redis_connection_async()
+        except Exception as e:
+            logger.error(f"Redis health check error: {str(e)}")
+            healthy = False
+
+        self.last_check = time.time()
+        if healthy:
+            self.record_success()
+        else:
+            self.record_failure()
+        return healthy
+
+    async def _run(self) -> None:
+        """Background loop that keeps the cached health state current"""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check_now()
+
+    async def start(self) -> bool:
+        """
+        Run an initial check and start the background loop
+
+        Returns:
+            bool: Result of the initial check
+        """
+        healthy = await self.check_now()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return healthy
+
+    async def stop(self) -> None:
+        """Stop the background loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current health state for diagnostics
+
+        Returns:
+            dict: Breaker state, failure count and last check time
+        """
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "last_check": int(self.last_check),
+        }
+
+# Process-wide monitor shared by the gateway handlers
+redis_health = RedisHealthMonitor()
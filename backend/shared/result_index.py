@@ -0,0 +1,287 @@
+"""
+Video-level result index for reusing finished MP3s across tasks.
+Maps (video ID, output profile) to an existing output file and coordinates
+single-flight processing: the first task for a video becomes the leader and
+does the download and conversion, later tasks for the same video attach to it
+as waiters and complete when the leader does.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, Any, Optional, List, Tuple
+from dotenv import load_dotenv
+
+from shared.redis_client import redis_client, RedisTaskManager, TaskStatus
+from shared.async_redis_client import async_redis_client
+from shared.file_index import TaskFileIndex
+from shared.content_store import ContentStore
+from shared.storage_layout import resolve_output_path
+from shared.storage_backend import backend_for, is_remote_location
+from shared.file_metadata import get_file_metadata
+
+# Load environment variables
+load_dotenv()
+
+# Identifies the converter settings; change it whenever the output format changes
+OUTPUT_PROFILE = os.getenv("OUTPUT_PROFILE", "mp3-lame-vbr2")
+
+# How long a finished result stays reusable (outputs are cleaned up after 7 days)
+RESULT_INDEX_TTL = int(os.getenv("RESULT_INDEX_TTL", str(6 * 24 * 3600)))
+
+# Upper bound on a leader's download + conversion before its claim lapses
+INFLIGHT_TTL = int(os.getenv("DOWNLOAD_TIMEOUT", "600")) + int(os.getenv("MAX_CONVERSION_TIME", "900"))
+
+logger = logging.getLogger("result_index")
+
+# Return the finished result, become the leader, or join the waiters - atomically
+_CLAIM_SCRIPT = redis_client.register_script("""
+local result = redis.call('GET', KEYS[1])
+if result then
+    return {'done', result}
+end
+if redis.call('SET', KEYS[2], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    return {'leader', ''}
+end
+local leader = redis.call('GET', KEYS[2])
+if leader == ARGV[1] then
+    return {'leader', ''}
+end
+redis.call('SADD', KEYS[3], ARGV[1])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+return {'follower', leader}
+""")
+
+# Record the result, release the leader's claim and hand back the waiters
+_PUBLISH_SCRIPT = redis_client.register_script("""
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+if redis.call('GET', KEYS[2]) == ARGV[1] then
+    redis.call('DEL', KEYS[2])
+end
+local waiters = redis.call('SMEMBERS', KEYS[3])
+redis.call('DEL', KEYS[3])
+return waiters
+""")
+
+# Release a failed leader's claim and hand back the waiters
+_ABANDON_SCRIPT = redis_client.register_script("""
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return {}
+end
+redis.call('DEL', KEYS[1])
+local waiters = redis.call('SMEMBERS', KEYS[2])
+redis.call('DEL', KEYS[2])
+return waiters
+""")
+
+def _keys(video_id: str, profile: str) -> Tuple[str, str, str]:
+    """Result, in-flight claim and waiter set keys for a video"""
+    suffix = f"{video_id}:{profile}"
+    return f"video_result:{suffix}", f"video_inflight:{suffix}", f"video_waiters:{suffix}"
+
+class VideoResultIndex:
+    """Result index and single-flight coordination keyed by video ID and output profile"""
+
+    @staticmethod
+    def claim(video_id: str, task_id: str, profile: str = OUTPUT_PROFILE) -> Tuple[str, Optional[str]]:
+        """
+        Decide how a task should process a video
+
+        Args:
+            video_id: YouTube video ID
+            task_id: Task identifier
+            profile: Output profile
+
+        Returns:
+            tuple: ("done", file_path) if a finished file can be reused,
+                   ("leader", None) if this task must do the work,
+                   ("follower", leader_task_id) if it was attached to a running job
+        """
+        result_key, inflight_key, waiters_key = _keys(video_id, profile)
+
+        # A second pass covers results whose file has since been removed
+        for _ in range(2):
+            role, value = _CLAIM_SCRIPT(keys=[result_key, inflight_key, waiters_key],
+                                        args=[task_id, INFLIGHT_TTL])
+            if role != "done":
+                return role, value or None
+
+            try:
+                file_path = json.loads(value).get("file_path")
+            except json.JSONDecodeError:
+                file_path = None
+
+            if is_remote_location(file_path):
+                if backend_for(file_path).exists(file_path):
+                    return "done", file_path
+                file_path = None
+
+            # Outputs may have been re-sharded since the result was indexed
+            file_path = resolve_output_path(file_path)
+            if file_path:
+                # Refresh the file's age so cleanup keeps it while it is being reused
+                try:
+                    # Keep mtime (the download ETag) and bump atime/ctime instead
+                    os.utime(file_path, ns=(time.time_ns(), os.stat(file_path).st_mtime_ns))
+                except OSError:
+                    pass
+                return "done", file_path
+
+            logger.info(f"Indexed result for video {video_id} is gone, dropping it")
+            redis_client.delete(result_key)
+
+        return "leader", None
+
+    @staticmethod
+    def publish(video_id: str, task_id: str, file_path: str, profile: str = OUTPUT_PROFILE) -> List[str]:
+        """
+        Record a finished output and release the leader's claim
+
+        Args:
+            video_id: YouTube video ID
+            task_id: Leader task identifier
+            file_path: Path to the finished MP3
+            profile: Output profile
+
+        Returns:
+            list: Task IDs that were waiting on this job
+        """
+        result_key, inflight_key, waiters_key = _keys(video_id, profile)
+        result = json.dumps({"file_path": file_path, "task_id": task_id, "created_at": int(time.time())})
+        return _PUBLISH_SCRIPT(keys=[result_key, inflight_key, waiters_key],
+                               args=[task_id, result, RESULT_INDEX_TTL])
+
+    @staticmethod
+    def abandon(video_id: str, task_id: str, profile: str = OUTPUT_PROFILE) -> List[str]:
+        """
+        Release a failed leader's claim
+
+        Args:
+            video_id: YouTube video ID
+            task_id: Leader task identifier
+            profile: Output profile
+
+        Returns:
+            list: Task IDs that were waiting on this job (empty if task_id was not the leader)
+        """
+        _, inflight_key, waiters_key = _keys(video_id, profile)
+        return _ABANDON_SCRIPT(keys=[inflight_key, waiters_key], args=[task_id])
+
+    @staticmethod
+    def inflight_claim(video_id: str, profile: str = OUTPUT_PROFILE) -> Tuple[Optional[str], int]:
+        """
+        Get the task currently doing the work for a video and how long its claim lasts
+
+        Args:
+            video_id: YouTube video ID
+            profile: Output profile
+
+        Returns:
+            tuple: (leader task identifier or None if no job is running, seconds until the claim lapses)
+        """
+        _, inflight_key, _ = _keys(video_id, profile)
+        with redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(inflight_key)
+            pipe.ttl(inflight_key)
+            leader, ttl = pipe.execute()
+        return leader, max(ttl, 0)
+
+    @staticmethod
+    async def inflight_leader_async(video_id: str, profile: str = OUTPUT_PROFILE) -> Optional[str]:
+        """
+        Get the task currently doing the work for a video
+
+        Args:
+            video_id: YouTube video ID
+            profile: Output profile
+
+        Returns:
+            str: Leader task identifier, or None if no job is running
+        """
+        _, inflight_key, _ = _keys(video_id, profile)
+        return await async_redis_client.get(inflight_key)
+
+def video_id_for_task(task_id: str) -> Optional[str]:
+    """
+    Get the video ID recorded for a task
+
+    Args:
+        task_id: Task identifier
+
+    Returns:
+        str: Video ID or None if unknown
+    """
+    task_data = RedisTaskManager.get_task(task_id)
+    video_id = task_data.get("video_id")
+    if not video_id and task_data.get("youtube_url"):
+        # Older task records only carry the URL
+        from shared.youtube_api import extract_video_id
+        video_id = extract_video_id(task_data["youtube_url"])
+    return video_id
+
+def complete_reused_task(task_id: str, file_path: str, message: str,
+                         file_metadata: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Mark a task completed against an existing output file
+
+    Args:
+        task_id: Task identifier
+        file_path: Path to the shared MP3
+        message: Status message
+        file_metadata: Metadata of the shared MP3 (read from disk if not given)
+    """
+    if file_metadata is None:
+        file_metadata = get_file_metadata(file_path)
+
+    RedisTaskManager.update_task(
+        task_id,
+        status=TaskStatus.COMPLETED.value,
+        progress=100,
+        message=message,
+        file_path=file_path,
+        file_metadata=file_metadata or None
+    )
+    TaskFileIndex.record(task_id, file_path)
+
+    # Shared blobs stay on disk while any task still references them
+    digest = ContentStore.digest_for_path(file_path)
+    if digest:
+        ContentStore.add_ref(digest, task_id)
+
+def finish_leader(task_id: str, file_path: str, file_metadata: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Publish a leader's output and complete every task waiting on it
+
+    Args:
+        task_id: Leader task identifier
+        file_path: Path to the finished MP3
+        file_metadata: Metadata of the finished MP3, shared with the waiters
+    """
+    video_id = video_id_for_task(task_id)
+    if not video_id:
+        return
+
+    for waiter_id in VideoResultIndex.publish(video_id, task_id, file_path):
+        logger.info(f"Completing task {waiter_id} with output of {task_id}")
+        complete_reused_task(waiter_id, file_path, "Conversion completed successfully!", file_metadata)
+
+def fail_leader(task_id: str, error: str) -> None:
+    """
+    Release a failed leader's claim and fail every task waiting on it
+
+    Args:
+        task_id: Leader task identifier
+        error: Error message passed on to the waiters
+    """
+    video_id = video_id_for_task(task_id)
+    if not video_id:
+        return
+
+    for waiter_id in VideoResultIndex.abandon(video_id, task_id):
+        logger.info(f"Failing task {waiter_id} after {task_id} failed")
+        RedisTaskManager.update_task(
+            waiter_id,
+            status=TaskStatus.FAILED.value,
+            error=error
+        )
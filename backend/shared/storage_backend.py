@@ -0,0 +1,285 @@
+"""
+Storage backends for finished outputs.
+Workers hand finished files to the configured backend, which stores them
+under a key and returns a location that is saved on the task as file_path:
+a filesystem path for the local backend, or s3://bucket/key for an
+S3-compatible object store (AWS S3, MinIO, ...). Readers pick the backend
+from the location itself, so tasks recorded under either backend keep
+working while STORAGE_BACKEND is switched.
+"""
+
+import os
+import time
+import shutil
+import logging
+import urllib.parse
+from abc import ABC, abstractmethod
+from typing import Iterator, NamedTuple, Optional
+from dotenv import load_dotenv
+
+from shared.storage_layout import STORAGE_DIR, resolve_output_path, iter_output_files
+
+# boto3 is only needed for the S3 backend
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+# Load environment variables
+load_dotenv()
+
+# "local" or "s3"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+
+# S3-compatible object store settings (S3_ENDPOINT_URL points at MinIO when set)
+S3_BUCKET = os.getenv("S3_BUCKET", "yt-mp3")
+S3_PREFIX = os.getenv("S3_PREFIX", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_PUBLIC_ENDPOINT_URL = os.getenv("S3_PUBLIC_ENDPOINT_URL") or S3_ENDPOINT_URL
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID") or None
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY") or None
+S3_PRESIGN_TTL = int(os.getenv("S3_PRESIGN_TTL", "300"))  # seconds a download link stays valid
+S3_MULTIPART_CHUNK_SIZE = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+
+S3_SCHEME = "s3://"
+
+logger = logging.getLogger("storage_backend")
+
+class StoredFile(NamedTuple):
+    """A stored output as seen by cleanup"""
+    location: str
+    size: int
+    last_access: float
+
+class StorageBackend(ABC):
+    """Where finished outputs are kept"""
+
+    @abstractmethod
+    def put_file(self, local_path: str, key: str, content_type: str = "audio/mpeg") -> str:
+        """
+        Store a finished local file under key, consuming the local file.
+        Storing a key that already exists keeps the stored copy.
+
+        Args:
+            local_path: Path to the finished file
+            key: Storage key relative to the store root
+            content_type: MIME type of the file
+
+        Returns:
+            str: Location of the stored file
+        """
+
+    @abstractmethod
+    def exists(self, location: str) -> bool:
+        """Whether a stored file is still present"""
+
+    @abstractmethod
+    def size(self, location: str) -> Optional[int]:
+        """Size of a stored file in bytes, or None if it is missing"""
+
+    @abstractmethod
+    def stat(self, location: str) -> Optional[StoredFile]:
+        """Size and last access of a stored file, or None if it is missing"""
+
+    @abstractmethod
+    def delete(self, location: str) -> None:
+        """Remove a stored file"""
+
+    @abstractmethod
+    def iter_files(self) -> Iterator[StoredFile]:
+        """Yield every stored file"""
+
+    def presigned_url(self, location: str, filename: str, content_type: str = "audio/mpeg") -> Optional[str]:
+        """
+        Get a short-lived URL that serves the file directly
+
+        Args:
+            location: Location of the stored file
+            filename: Download filename for Content-Disposition
+            content_type: MIME type of the file
+
+        Returns:
+            str: URL, or None if the backend can only be served by the API
+        """
+        return None
+
+class LocalStorageBackend(StorageBackend):
+    """Files on a filesystem shared by the API and all workers"""
+
+    def put_file(self, local_path: str, key: str, content_type: str = "audio/mpeg") -> str:
+        target = os.path.join(STORAGE_DIR, key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+
+        if os.path.exists(target):
+            # Refresh the stored copy's age so the current cleanup pass keeps it
+            os.utime(target, ns=(time.time_ns(), os.stat(target).st_mtime_ns))
+            os.remove(local_path)
+        else:
+            shutil.move(local_path, target)
+        return target
+
+    def exists(self, location: str) -> bool:
+        return resolve_output_path(location) is not None
+
+    def size(self, location: str) -> Optional[int]:
+        path = resolve_output_path(location)
+        return os.path.getsize(path) if path else None
+
+    def stat(self, location: str) -> Optional[StoredFile]:
+        try:
+            stat_info = os.stat(location)
+        except FileNotFoundError:
+            return None
+        return StoredFile(location, stat_info.st_size, max(stat_info.st_ctime, stat_info.st_mtime))
+
+    def delete(self, location: str) -> None:
+        os.remove(location)
+
+    def iter_files(self) -> Iterator[StoredFile]:
+        for entry in iter_output_files():
+            stat_info = entry.stat(follow_symlinks=False)
+            yield StoredFile(entry.path, stat_info.st_size, max(stat_info.st_ctime, stat_info.st_mtime))
+
+class S3StorageBackend(StorageBackend):
+    """Files in an S3-compatible object store"""
+
+    def __init__(self):
+        if not BOTO3_AVAILABLE:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+
+        session = boto3.session.Session(
+            aws_access_key_id=S3_ACCESS_KEY_ID,
+            aws_secret_access_key=S3_SECRET_ACCESS_KEY,
+            region_name=S3_REGION
+        )
+        config = BotoConfig(signature_version="s3v4", s3={"addressing_style": "path"})
+        self.client = session.client("s3", endpoint_url=S3_ENDPOINT_URL, config=config)
+        # Presigned URLs are opened by browsers, so sign them for the public endpoint
+        self.presign_client = session.client("s3", endpoint_url=S3_PUBLIC_ENDPOINT_URL, config=config)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=S3_MULTIPART_CHUNK_SIZE
+        )
+
+    @staticmethod
+    def parse_location(location: str):
+        """Split s3://bucket/key into (bucket, key)"""
+        bucket, _, key = location[len(S3_SCHEME):].partition("/")
+        return bucket, key
+
+    def _head(self, location: str) -> Optional[dict]:
+        bucket, key = self.parse_location(location)
+        try:
+            return self.client.head_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def put_file(self, local_path: str, key: str, content_type: str = "audio/mpeg") -> str:
+        key = f"{S3_PREFIX}{key}"
+        location = f"{S3_SCHEME}{S3_BUCKET}/{key}"
+
+        if self._head(location) is None:
+            # Streamed (multipart for large files) upload, never read whole into memory
+            with open(local_path, "rb") as f:
+                self.client.upload_fileobj(
+                    f, S3_BUCKET, key,
+                    ExtraArgs={"ContentType": content_type},
+                    Config=self.transfer_config
+                )
+        else:
+            logger.info(f"{location} already stored, keeping the existing object")
+
+        os.remove(local_path)
+        return location
+
+    def exists(self, location: str) -> bool:
+        return self._head(location) is not None
+
+    def size(self, location: str) -> Optional[int]:
+        head = self._head(location)
+        return head["ContentLength"] if head else None
+
+    def stat(self, location: str) -> Optional[StoredFile]:
+        head = self._head(location)
+        if head is None:
+            return None
+        return StoredFile(location, head["ContentLength"], head["LastModified"].timestamp())
+
+    def delete(self, location: str) -> None:
+        bucket, key = self.parse_location(location)
+        self.client.delete_object(Bucket=bucket, Key=key)
+
+    def iter_files(self) -> Iterator[StoredFile]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=S3_PREFIX):
+            for obj in page.get("Contents", []):
+                yield StoredFile(
+                    f"{S3_SCHEME}{S3_BUCKET}/{obj['Key']}",
+                    obj["Size"],
+                    obj["LastModified"].timestamp()
+                )
+
+    def presigned_url(self, location: str, filename: str, content_type: str = "audio/mpeg") -> Optional[str]:
+        bucket, key = self.parse_location(location)
+        encoded_filename = urllib.parse.quote(filename)
+        return self.presign_client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": bucket,
+                "Key": key,
+                "ResponseContentType": content_type,
+                "ResponseContentDisposition": f"attachment; filename=\"{encoded_filename}\"; filename*=UTF-8''{encoded_filename}",
+            },
+            ExpiresIn=S3_PRESIGN_TTL
+        )
+
+_backends = {}
+
+def _get(name: str) -> StorageBackend:
+    """Create backends lazily, so the S3 client is only built when used"""
+    if name not in _backends:
+        _backends[name] = S3StorageBackend() if name == "s3" else LocalStorageBackend()
+    return _backends[name]
+
+def get_storage_backend() -> StorageBackend:
+    """
+    Get the backend new outputs are written to
+
+    Returns:
+        StorageBackend: Backend selected by STORAGE_BACKEND
+    """
+    return _get(STORAGE_BACKEND)
+
+def is_remote_location(location: Optional[str]) -> bool:
+    """Whether a stored location lives in the object store"""
+    return bool(location) and location.startswith(S3_SCHEME)
+
+def backend_for(location: str) -> StorageBackend:
+    """
+    Get the backend that holds a stored location
+
+    Args:
+        location: Location saved as a task's file_path
+
+    Returns:
+        StorageBackend: Backend for the location
+    """
+    return _get("s3" if is_remote_location(location) else "local")
+
+def iter_stored_files() -> Iterator[StoredFile]:
+    """
+    Yield every stored output across the backends in use
+
+    Yields:
+        StoredFile: Local outputs, then object store outputs when STORAGE_BACKEND=s3
+    """
+    yield from _get("local").iter_files()
+    if STORAGE_BACKEND == "s3":
+        yield from _get("s3").iter_files()
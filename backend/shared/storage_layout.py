@@ -0,0 +1,124 @@
+"""
+Output storage layout.
+Outputs live in two-level hash-prefix subdirectories of STORAGE_DIR
+(STORAGE_DIR/ab/cd/<name>) so no single directory grows to hundreds of
+thousands of entries. Older outputs may still sit flat in STORAGE_DIR until
+file_service.migrate_storage moves them, so readers resolve both layouts.
+"""
+
+import os
+import hashlib
+from typing import Iterator, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+STORAGE_DIR = os.getenv("STORAGE_DIR", "/tmp/yt-mp3/output")
+
+# Number of two-hex-digit directory levels (0 keeps the flat layout)
+STORAGE_SHARD_DEPTH = int(os.getenv("STORAGE_SHARD_DEPTH", "2"))
+
+# Content-addressed outputs, stored as BLOB_DIR/ab/cd/<sha256>.mp3
+BLOB_DIR = os.path.join(STORAGE_DIR, "blobs")
+
+# Outputs being written, on the same filesystem so they can be renamed into BLOB_DIR
+INCOMING_DIR = os.path.join(STORAGE_DIR, "incoming")
+
+def shard_dir(name: str, depth: int = STORAGE_SHARD_DEPTH) -> str:
+    """
+    Get the shard directory for a file name
+
+    Args:
+        name: File name (or content hash)
+        depth: Number of directory levels
+
+    Returns:
+        str: Directory under STORAGE_DIR
+    """
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+    return os.path.join(STORAGE_DIR, *(digest[i * 2:i * 2 + 2] for i in range(depth)))
+
+def sharded_path(name: str) -> str:
+    """
+    Get the sharded location for an output file, creating its directory
+
+    Args:
+        name: File name
+
+    Returns:
+        str: Full path of the file in the sharded layout
+    """
+    directory = shard_dir(name)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+def blob_key(digest: str, extension: str = ".mp3") -> str:
+    """
+    Get the storage key of a content-addressed output
+
+    Args:
+        digest: SHA-256 hex digest of the file content
+        extension: File extension
+
+    Returns:
+        str: Key relative to the store root (blobs/ab/cd/<digest>.mp3)
+    """
+    # The digest is already uniformly distributed, so shard on its own prefix
+    shards = [digest[i * 2:i * 2 + 2] for i in range(STORAGE_SHARD_DEPTH)]
+    return "/".join([os.path.basename(BLOB_DIR), *shards, f"{digest}{extension}"])
+
+def incoming_path(task_id: str, extension: str = ".mp3") -> str:
+    """
+    Get the staging location for a task's output while it is being written
+    (writers create INCOMING_DIR themselves)
+
+    Args:
+        task_id: Task identifier
+        extension: File extension
+
+    Returns:
+        str: Full path of the staging file
+    """
+    return os.path.join(INCOMING_DIR, f"{task_id}{extension}")
+
+def resolve_output_path(file_path: Optional[str]) -> Optional[str]:
+    """
+    Find an output file in either layout
+
+    Args:
+        file_path: Recorded path of the file (flat or sharded)
+
+    Returns:
+        str: Existing path of the file, or None if it is in neither layout
+    """
+    if not file_path:
+        return None
+    if os.path.exists(file_path):
+        return file_path
+
+    name = os.path.basename(file_path)
+    for candidate in (os.path.join(shard_dir(name), name), os.path.join(STORAGE_DIR, name)):
+        if candidate != file_path and os.path.exists(candidate):
+            return candidate
+    return None
+
+def iter_output_files(root: str = STORAGE_DIR) -> Iterator[os.DirEntry]:
+    """
+    Yield every output file in both layouts without listing one huge directory at once
+
+    Args:
+        root: Directory to walk
+
+    Yields:
+        os.DirEntry: Regular files under root
+    """
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from iter_output_files(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+    except FileNotFoundError:
+        return
@@ -0,0 +1,145 @@
+"""
+Task update fan-out for streaming status endpoints.
+RedisTaskManager.update_task publishes every change on task_updates:{task_id};
+each API process holds one pattern subscription and dispatches messages to the
+in-process queues of clients watching that task.
+"""
+
+import os
+import json
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Set
+import redis
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+
+from shared.redis_client import TASK_EVENTS_PREFIX
+
+# Load environment variables
+load_dotenv()
+
+redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+# Updates buffered per watcher before they are replaced by a resync
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "100"))
+
+logger = logging.getLogger("task_events")
+
+class TaskEventHub:
+    """Single pub/sub subscription per process, fanned out to per-task watcher queues"""
+
+    def __init__(self):
+        self._watchers: Dict[str, Set[asyncio.Queue]] = {}
+        self._client: Optional[aioredis.Redis] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        """
+        Start receiving updates for a task
+
+        Args:
+            task_id: Task identifier
+
+        Returns:
+            asyncio.Queue: Receives update dicts, or None when the caller should re-read the task
+        """
+        queue = asyncio.Queue(maxsize=TASK_EVENTS_QUEUE_SIZE)
+        self._watchers.setdefault(task_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue) -> None:
+        """
+        Stop receiving updates for a task
+
+        Args:
+            task_id: Task identifier
+            queue: Queue returned by subscribe()
+        """
+        watchers = self._watchers.get(task_id)
+        if watchers is None:
+            return
+        watchers.discard(queue)
+        if not watchers:
+            del self._watchers[task_id]
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, item: Optional[Dict[str, Any]]) -> None:
+        """Enqueue without blocking; slow watchers get a resync instead of partial updates"""
+        if queue.full():
+            # Dropping a partial update would lose its fields, so replace
+            # everything queued with one request to re-read the task
+            while not queue.empty():
+                queue.get_nowait()
+            item = None
+        queue.put_nowait(item)
+
+    def _dispatch(self, channel: str, data: str) -> None:
+        """Deliver one published update to the watchers of its task"""
+        task_id = channel[len(TASK_EVENTS_PREFIX):]
+        watchers = self._watchers.get(task_id)
+        if not watchers:
+            return
+        try:
+            update = json.loads(data)
+        except json.JSONDecodeError:
+            update = None
+        for queue in list(watchers):
+            self._offer(queue, update)
+
+    def _resync_all(self) -> None:
+        """Ask every watcher to re-read its task after updates may have been missed"""
+        for watchers in self._watchers.values():
+            for queue in list(watchers):
+                self._offer(queue, None)
+
+    async def _run(self) -> None:
+        """Listen for task updates, reconnecting when the subscription drops"""
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.psubscribe(f"{TASK_EVENTS_PREFIX}*")
+                # Anything published while we were disconnected is lost
+                self._resync_all()
+                async for message in pubsub.listen():
+                    if message.get("type") == "pmessage":
+                        self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                logger.warning(f"Task update subscription lost: {str(e)}, reconnecting")
+                await asyncio.sleep(1)
+            except Exception as e:
+                logger.error(f"Task update subscription error: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+    async def start(self) -> None:
+        """Open the dedicated pub/sub connection and start dispatching"""
+        if self._task is not None and not self._task.done():
+            return
+        # Dedicated connection, outside the bounded request pool
+        self._client = aioredis.Redis.from_url(redis_url, decode_responses=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop dispatching and close the pub/sub connection"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+# Process-wide hub shared by the streaming handlers
+task_events = TaskEventHub()
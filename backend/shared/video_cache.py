@@ -0,0 +1,220 @@
+"""
+Two-tier cache for YouTube video metadata keyed by video ID.
+An in-process LRU with TTL sits in front of a shared Redis cache so repeat
+submissions of the same video skip the Data API round trip. Deterministic
+rejections (not found, private, not embeddable) are cached with a short TTL.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List
+import redis
+from dotenv import load_dotenv
+
+from shared.redis_client import redis_client
+
+# Load environment variables
+load_dotenv()
+
+# Cache settings
+VIDEO_CACHE_TTL = int(os.getenv("VIDEO_CACHE_TTL", str(6 * 3600)))  # shared cache, valid videos
+VIDEO_CACHE_NEGATIVE_TTL = int(os.getenv("VIDEO_CACHE_NEGATIVE_TTL", "300"))  # shared cache, rejected videos
+VIDEO_CACHE_LOCAL_TTL = int(os.getenv("VIDEO_CACHE_LOCAL_TTL", "600"))  # in-process cache
+VIDEO_CACHE_LOCAL_SIZE = int(os.getenv("VIDEO_CACHE_LOCAL_SIZE", "2048"))  # in-process entries
+
+logger = logging.getLogger("video_cache")
+
+class LocalTTLCache:
+    """Thread-safe in-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get an entry if present and not expired
+
+        Args:
+            key: Cache key
+
+        Returns:
+            dict: Cached value or None
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: int) -> None:
+        """
+        Store an entry, evicting the least recently used one when full
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live in seconds
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+class VideoMetadataCache:
+    """
+    Cache of validation results keyed by video ID.
+
+    Entries have the shape {"valid": bool, "error": str|None, "metadata": dict|None}.
+    """
+
+    def __init__(self):
+        self.local = LocalTTLCache(VIDEO_CACHE_LOCAL_SIZE)
+
+    @staticmethod
+    def _key(video_id: str) -> str:
+        return f"video:{video_id}"
+
+    def get_local(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the in-process tier only (safe to call from the event loop)
+
+        Args:
+            video_id: YouTube video ID
+
+        Returns:
+            dict: Cached validation result or None
+        """
+        return self.local.get(video_id)
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the in-process tier, then the shared Redis tier
+
+        Args:
+            video_id: YouTube video ID
+
+        Returns:
+            dict: Cached validation result or None
+        """
+        entry = self.local.get(video_id)
+        if entry is not None:
+            return entry
+
+        try:
+            raw = redis_client.get(self._key(video_id))
+        except redis.RedisError as e:
+            logger.warning(f"Video cache lookup failed for {video_id}: {str(e)}")
+            return None
+
+        if not raw:
+            return None
+
+        try:
+            entry = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+
+        # Promote to the local tier, never outliving the shared entry's TTL class
+        ttl = VIDEO_CACHE_LOCAL_TTL if entry.get("valid") else min(VIDEO_CACHE_LOCAL_TTL, VIDEO_CACHE_NEGATIVE_TTL)
+        self.local.set(video_id, entry, ttl)
+        return entry
+
+    def set(self, video_id: str, valid: bool, error: Optional[str] = None,
+            metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Store a validation result in both tiers
+
+        Args:
+            video_id: YouTube video ID
+            valid: Whether the video passed validation
+            error: Rejection reason for invalid videos
+            metadata: Video metadata for valid videos
+        """
+        entry = {"valid": valid, "error": error, "metadata": metadata}
+        shared_ttl = VIDEO_CACHE_TTL if valid else VIDEO_CACHE_NEGATIVE_TTL
+        local_ttl = min(VIDEO_CACHE_LOCAL_TTL, shared_ttl)
+
+        self.local.set(video_id, entry, local_ttl)
+
+        try:
+            redis_client.set(self._key(video_id), json.dumps(entry), ex=shared_ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Video cache store failed for {video_id}: {str(e)}")
+
+    def get_many(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up several videos, reading all local misses with a single MGET
+
+        Args:
+            video_ids: YouTube video IDs
+
+        Returns:
+            dict: Cached validation results by video ID (misses are omitted)
+        """
+        found = {}
+        missing = []
+        for video_id in video_ids:
+            entry = self.local.get(video_id)
+            if entry is not None:
+                found[video_id] = entry
+            else:
+                missing.append(video_id)
+
+        if not missing:
+            return found
+
+        try:
+            raw_entries = redis_client.mget([self._key(video_id) for video_id in missing])
+        except redis.RedisError as e:
+            logger.warning(f"Video cache batch lookup failed: {str(e)}")
+            return found
+
+        for video_id, raw in zip(missing, raw_entries):
+            if not raw:
+                continue
+            try:
+                entry = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            ttl = VIDEO_CACHE_LOCAL_TTL if entry.get("valid") else min(VIDEO_CACHE_LOCAL_TTL, VIDEO_CACHE_NEGATIVE_TTL)
+            self.local.set(video_id, entry, ttl)
+            found[video_id] = entry
+
+        return found
+
+    def set_many(self, results: Dict[str, tuple]) -> None:
+        """
+        Store several validation results, writing the shared tier in one pipeline
+
+        Args:
+            results: Mapping of video ID to (valid, error, metadata)
+        """
+        if not results:
+            return
+
+        pipe = redis_client.pipeline(transaction=False)
+        for video_id, (valid, error, metadata) in results.items():
+            entry = {"valid": valid, "error": error, "metadata": metadata}
+            shared_ttl = VIDEO_CACHE_TTL if valid else VIDEO_CACHE_NEGATIVE_TTL
+            self.local.set(video_id, entry, min(VIDEO_CACHE_LOCAL_TTL, shared_ttl))
+            pipe.set(self._key(video_id), json.dumps(entry), ex=shared_ttl)
+
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Video cache batch store failed: {str(e)}")
+
+# Process-wide cache
+video_cache = VideoMetadataCache()
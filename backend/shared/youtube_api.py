@@ -4,10 +4,17 @@ YouTube Data API integration for URL validation and metadata retrieval.
 
 import os
 import re
-from typing import Optional, Dict, Any, Tuple
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple, List
 from urllib.parse import parse_qs, urlparse
+import httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from shared.video_cache import video_cache
 
 try:
     from dotenv import load_dotenv
@@ -21,9 +28,51 @@ except ImportError:
 # Get API key from environment
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
 
+# Socket timeout for Data API calls (seconds)
+YOUTUBE_API_TIMEOUT = float(os.getenv('YOUTUBE_API_TIMEOUT', '10'))
+
+# Maximum concurrent outbound Data API calls per process
+YOUTUBE_API_CONCURRENCY = int(os.getenv('YOUTUBE_API_CONCURRENCY', '8'))
+
+# Overall deadline for an async validation, including time queued for a worker thread
+YOUTUBE_VALIDATION_TIMEOUT = float(os.getenv('YOUTUBE_VALIDATION_TIMEOUT', '15'))
+
+# Bounded pool that runs blocking Data API calls off the event loop
+_api_executor = ThreadPoolExecutor(max_workers=YOUTUBE_API_CONCURRENCY, thread_name_prefix='youtube-api')
+
+# videos.list accepts at most 50 IDs per call
+YOUTUBE_API_MAX_IDS = 50
+
+# Process-wide client, built once on first use
+_youtube_client = None
+_youtube_client_lock = threading.Lock()
+
+# httplib2.Http is not thread-safe, so each thread keeps its own keep-alive connection
+_thread_local = threading.local()
+
+def _get_thread_http() -> httplib2.Http:
+    """
+    Get the keep-alive HTTP object for the current thread.
+    
+    Returns:
+        httplib2.Http: HTTP object reused for all Data API calls on this thread
+    """
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = httplib2.Http(timeout=YOUTUBE_API_TIMEOUT)
+        _thread_local.http = http
+    return http
+
+def _build_request(http, *args, **kwargs) -> HttpRequest:
+    """Request builder that routes every call through the calling thread's pooled connection"""
+    return HttpRequest(_get_thread_http(), *args, **kwargs)
+
 def get_youtube_client():
     """
-    Create and return a YouTube API client.
+    Get the shared YouTube API client, building it on first use.
+    
+    The client is built from the discovery document bundled with
+    google-api-python-client, so no network call is made at build time.
     
     Returns:
         googleapiclient.discovery.Resource: YouTube API client
@@ -31,13 +80,28 @@ def get_youtube_client():
     Raises:
         ValueError: If YouTube API key is not configured
     """
+    global _youtube_client
+    
     if not YOUTUBE_API_KEY:
         raise ValueError("YouTube API key not found. Please set the YOUTUBE_API_KEY environment variable.")
     
-    try:
-        return build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
-    except Exception as e:
-        raise ValueError(f"Failed to create YouTube API client: {str(e)}")
+    if _youtube_client is not None:
+        return _youtube_client
+    
+    with _youtube_client_lock:
+        if _youtube_client is None:
+            try:
+                _youtube_client = build(
+                    'youtube', 'v3',
+                    developerKey=YOUTUBE_API_KEY,
+                    requestBuilder=_build_request,
+                    static_discovery=True,
+                    cache_discovery=False
+                )
+            except Exception as e:
+                raise ValueError(f"Failed to create YouTube API client: {str(e)}")
+    
+    return _youtube_client
 
 def extract_video_id(url: str) -> Optional[str]:
     """
@@ -68,31 +132,90 @@ def extract_video_id(url: str) -> Optional[str]:
     
     return None
 
-def validate_youtube_url(url: str) -> Tuple[bool, Optional[str], Optional[Dict[str, Any]]]:
+def parse_video_item(video_id: str, video: Optional[Dict[str, Any]]) -> Tuple[bool, Optional[str], Optional[Dict[str, Any]]]:
     """
-    Validate a YouTube URL using the YouTube Data API.
+    Turn a videos.list item into a validation result.
     
     Args:
-        url: YouTube URL to validate
+        video_id: YouTube video ID
+        video: Item from a videos.list response, or None if the video was not returned
         
     Returns:
         tuple: (is_valid, error_message, video_data)
     """
+    # Check if the video exists
+    if not video:
+        return False, "Video not found or is unavailable", None
+    
+    # Check if video is embeddable
+    if not video['status'].get('embeddable'):
+        return False, "This video does not allow embedding", None
+    
+    # Check if video is playable (not private)
+    if video['status'].get('privacyStatus') == 'private':
+        return False, "This video is private", None
+        
+    # Get metadata for the video
+    metadata = {
+        'title': video['snippet'].get('title'),
+        'channel': video['snippet'].get('channelTitle'),
+        'duration': video['contentDetails'].get('duration'),
+        'id': video_id,
+        'thumbnail': video['snippet'].get('thumbnails', {}).get('medium', {}).get('url')
+    }
+    
+    return True, None, metadata
+
+def precheck_youtube_url(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Check a URL's format and extract its video ID without calling the API.
+    
+    Args:
+        url: YouTube URL to check
+        
+    Returns:
+        tuple: (video_id, error_message) - exactly one of them is set
+    """
     # Basic URL format validation
     if not url or not isinstance(url, str):
-        return False, "URL must be a non-empty string", None
+        return None, "URL must be a non-empty string"
     
     if not ('youtube.com' in url or 'youtu.be' in url):
-        return False, "Not a valid YouTube URL", None
+        return None, "Not a valid YouTube URL"
     
     # Extract video ID
     video_id = extract_video_id(url)
     
     if not video_id:
-        return False, "Could not extract video ID from URL", None
+        return None, "Could not extract video ID from URL"
+    
+    return video_id, None
+
+def validate_youtube_url(url: str) -> Tuple[bool, Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Validate a YouTube URL using the YouTube Data API.
+    
+    Results are cached per video ID (see shared.video_cache), including
+    short-lived negative entries for missing, private and non-embeddable videos.
+    
+    Args:
+        url: YouTube URL to validate
+        
+    Returns:
+        tuple: (is_valid, error_message, video_data)
+    """
+    video_id, error_message = precheck_youtube_url(url)
+    
+    if not video_id:
+        return False, error_message, None
+    
+    # Serve repeat submissions from the metadata cache
+    cached = video_cache.get(video_id)
+    if cached is not None:
+        return cached['valid'], cached['error'], cached['metadata']
     
     try:
-        # Create YouTube API client
+        # Get the shared YouTube API client
         youtube = get_youtube_client()
         
         # Request video details from API
@@ -101,30 +224,13 @@ def validate_youtube_url(url: str) -> Tuple[bool, Optional[str], Optional[Dict[s
             id=video_id
         ).execute()
         
-        # Check if the video exists
-        if not response.get('items'):
-            return False, "Video not found or is unavailable", None
+        items = response.get('items') or []
+        is_valid, error_message, metadata = parse_video_item(video_id, items[0] if items else None)
         
-        video = response['items'][0]
+        # Cache valid videos and deterministic rejections alike
+        video_cache.set(video_id, is_valid, error_message, metadata)
         
-        # Check if video is embeddable
-        if not video['status'].get('embeddable'):
-            return False, "This video does not allow embedding", None
-        
-        # Check if video is playable (not private)
-        if video['status'].get('privacyStatus') == 'private':
-            return False, "This video is private", None
-            
-        # Get metadata for the video
-        metadata = {
-            'title': video['snippet'].get('title'),
-            'channel': video['snippet'].get('channelTitle'),
-            'duration': video['contentDetails'].get('duration'),
-            'id': video_id,
-            'thumbnail': video['snippet'].get('thumbnails', {}).get('medium', {}).get('url')
-        }
-        
-        return True, None, metadata
+        return is_valid, error_message, metadata
             
     except HttpError as e:
         error_message = f"YouTube API error: {str(e)}"
@@ -133,3 +239,115 @@ def validate_youtube_url(url: str) -> Tuple[bool, Optional[str], Optional[Dict[s
     except Exception as e:
         error_message = f"Error validating YouTube URL: {str(e)}"
         return False, error_message, None
+
+async def validate_youtube_url_async(url: str) -> Tuple[bool, Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Validate a YouTube URL without blocking the event loop.
+    
+    The blocking Data API call runs on a bounded thread pool, so at most
+    YOUTUBE_API_CONCURRENCY calls are in flight per process.
+    
+    Args:
+        url: YouTube URL to validate
+        
+    Returns:
+        tuple: (is_valid, error_message, video_data)
+    """
+    # Answer from the in-process cache without a thread hop when possible
+    video_id = extract_video_id(url) if url and isinstance(url, str) else None
+    if video_id:
+        cached = video_cache.get_local(video_id)
+        if cached is not None:
+            return cached['valid'], cached['error'], cached['metadata']
+    
+    loop = asyncio.get_running_loop()
+    
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(_api_executor, validate_youtube_url, url),
+            timeout=YOUTUBE_VALIDATION_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        # The worker thread finishes on its own once the socket timeout fires
+        return False, "Timed out validating YouTube URL, please try again", None
+
+def fetch_video_results(video_ids: List[str]) -> Dict[str, Tuple[bool, Optional[str], Optional[Dict[str, Any]]]]:
+    """
+    Validate several video IDs, coalescing cache misses into videos.list
+    calls of up to 50 IDs each.
+    
+    Args:
+        video_ids: Unique YouTube video IDs
+        
+    Returns:
+        dict: (is_valid, error_message, video_data) by video ID
+    """
+    results = {
+        video_id: (entry['valid'], entry['error'], entry['metadata'])
+        for video_id, entry in video_cache.get_many(video_ids).items()
+    }
+    missing = [video_id for video_id in video_ids if video_id not in results]
+    
+    for i in range(0, len(missing), YOUTUBE_API_MAX_IDS):
+        chunk = missing[i:i + YOUTUBE_API_MAX_IDS]
+        
+        try:
+            youtube = get_youtube_client()
+            response = youtube.videos().list(
+                part='snippet,contentDetails,status',
+                id=','.join(chunk)  # at most YOUTUBE_API_MAX_IDS, which also caps the page
+            ).execute()
+        except HttpError as e:
+            for video_id in chunk:
+                results[video_id] = (False, f"YouTube API error: {str(e)}", None)
+            continue
+        except Exception as e:
+            for video_id in chunk:
+                results[video_id] = (False, f"Error validating YouTube URL: {str(e)}", None)
+            continue
+        
+        items = {item.get('id'): item for item in response.get('items') or []}
+        fetched = {video_id: parse_video_item(video_id, items.get(video_id)) for video_id in chunk}
+        
+        # Cache valid videos and deterministic rejections alike
+        video_cache.set_many(fetched)
+        results.update(fetched)
+    
+    return results
+
+async def validate_youtube_urls_async(urls: List[str]) -> List[Tuple[bool, Optional[str], Optional[Dict[str, Any]]]]:
+    """
+    Validate a batch of YouTube URLs without blocking the event loop.
+    
+    Duplicate video IDs are looked up once and each chunk of up to 50
+    uncached IDs costs a single videos.list call on the bounded thread pool.
+    
+    Args:
+        urls: YouTube URLs to validate
+        
+    Returns:
+        list: (is_valid, error_message, video_data) for each URL, in order
+    """
+    prechecked = [precheck_youtube_url(url) for url in urls]
+    video_ids = list(dict.fromkeys(video_id for video_id, _ in prechecked if video_id))
+    
+    loop = asyncio.get_running_loop()
+    chunks = [video_ids[i:i + YOUTUBE_API_MAX_IDS] for i in range(0, len(video_ids), YOUTUBE_API_MAX_IDS)]
+    
+    async def fetch_chunk(chunk: List[str]):
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(_api_executor, fetch_video_results, chunk),
+                timeout=YOUTUBE_VALIDATION_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            return {video_id: (False, "Timed out validating YouTube URL, please try again", None) for video_id in chunk}
+    
+    results = {}
+    for chunk_results in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+        results.update(chunk_results)
+    
+    return [
+        results[video_id] if video_id else (False, error_message, None)
+        for video_id, error_message in prechecked
+    ]
@@ -0,0 +1,9 @@
+"""
+Test configuration: make the backend packages importable without installing them.
+Importing the modules under test does not connect to Redis.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
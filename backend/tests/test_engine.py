@@ -0,0 +1,45 @@
+"""Tests for yt-dlp CLI progress parsing and fallback decisions"""
+
+import json
+
+from download_service.engine import CLI_PROGRESS_PREFIX, _parse_progress_line, is_library_error
+
+
+def test_progress_line_becomes_hook_dict():
+    line = CLI_PROGRESS_PREFIX + json.dumps({
+        "status": "downloading",
+        "downloaded_bytes": 1024,
+        "total_bytes": 4096,
+        "total_bytes_estimate": None,
+        "speed": 512.5,
+        "eta": 6,
+    })
+    assert _parse_progress_line(line) == {
+        "status": "downloading",
+        "downloaded_bytes": 1024,
+        "total_bytes": 4096,
+        "speed": 512.5,
+        "eta": 6,
+    }
+
+
+def test_other_output_is_not_progress():
+    assert _parse_progress_line("[youtube] abc: Downloading webpage") is None
+
+
+def test_malformed_progress_is_ignored():
+    assert _parse_progress_line(CLI_PROGRESS_PREFIX + "{not json") is None
+    assert _parse_progress_line(CLI_PROGRESS_PREFIX + "[1, 2]") is None
+    assert _parse_progress_line(CLI_PROGRESS_PREFIX + json.dumps({"downloaded_bytes": 1})) is None
+
+
+def test_library_errors_trigger_cli_fallback():
+    assert is_library_error("ERROR: [youtube] abc: Precondition check failed")
+    assert is_library_error("ERROR: [youtube] abc: Signature extraction failed: Some formats may be missing")
+    assert is_library_error("WARNING: [youtube] abc: nsig extraction failed: You may experience throttling")
+
+
+def test_other_errors_do_not_trigger_cli_fallback():
+    assert not is_library_error(None)
+    assert not is_library_error("ERROR: [youtube] abc: Private video")
+    assert not is_library_error("ERROR: [youtube] abc: Sign in to confirm you're not a bot")
@@ -0,0 +1,62 @@
+"""Tests for Range header parsing"""
+
+from file_service.responses import MAX_RANGES, parse_range_header
+
+
+def test_single_range():
+    assert parse_range_header("bytes=0-99", 1000) == [(0, 99)]
+
+
+def test_end_past_file_size_is_clamped():
+    assert parse_range_header("bytes=900-5000", 1000) == [(900, 999)]
+
+
+def test_open_ended_range():
+    assert parse_range_header("bytes=500-", 1000) == [(500, 999)]
+
+
+def test_suffix_range():
+    assert parse_range_header("bytes=-100", 1000) == [(900, 999)]
+
+
+def test_suffix_longer_than_file():
+    assert parse_range_header("bytes=-5000", 1000) == [(0, 999)]
+
+
+def test_overlapping_and_adjacent_ranges_are_merged():
+    assert parse_range_header("bytes=0-99, 50-149, 150-199", 1000) == [(0, 199)]
+
+
+def test_ranges_are_sorted_and_disjoint_ones_kept():
+    assert parse_range_header("bytes=500-599,0-9", 1000) == [(0, 9), (500, 599)]
+
+
+def test_unsatisfiable_range():
+    assert parse_range_header("bytes=1000-1099", 1000) == []
+
+
+def test_zero_length_suffix_is_unsatisfiable():
+    assert parse_range_header("bytes=-0", 1000) == []
+
+
+def test_unsatisfiable_parts_are_dropped():
+    assert parse_range_header("bytes=2000-2999,0-9", 1000) == [(0, 9)]
+
+
+def test_other_units_are_ignored():
+    assert parse_range_header("items=0-9", 1000) is None
+
+
+def test_malformed_ranges_are_ignored():
+    assert parse_range_header("bytes=abc-def", 1000) is None
+    assert parse_range_header("bytes=10", 1000) is None
+    assert parse_range_header("bytes=", 1000) is None
+
+
+def test_reversed_range_is_ignored():
+    assert parse_range_header("bytes=100-50", 1000) is None
+
+
+def test_too_many_ranges_are_ignored():
+    header = "bytes=" + ",".join(f"{i * 10}-{i * 10 + 1}" for i in range(MAX_RANGES + 1))
+    assert parse_range_header(header, 10000) is None
@@ -0,0 +1,121 @@
+"""Tests for download strategy scoring and ordering"""
+
+import pytest
+
+from download_service import strategy_stats
+from download_service.strategy_stats import (
+    STRATEGY_SKIP_AFTER,
+    STRATEGY_STATS_HALF_LIFE,
+    is_video_error,
+    order_strategies,
+    strategy_score,
+)
+
+NOW = 1_000_000.0
+
+STRATEGIES = [{"name": "ios"}, {"name": "tv"}, {"name": "android"}]
+
+
+def names(strategies):
+    return [strategy["name"] for strategy in strategies]
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    """Serve strategy statistics from a dict instead of Redis"""
+    data = {}
+    claimed = []
+
+    def load(requested):
+        return {name: data.get(name, {}) for name in requested}
+
+    def claim_probe(name):
+        if name in claimed:
+            return False
+        claimed.append(name)
+        return True
+
+    monkeypatch.setattr(strategy_stats.StrategyStats, "load", staticmethod(load))
+    monkeypatch.setattr(strategy_stats, "_claim_probe", claim_probe)
+    monkeypatch.setattr(strategy_stats.time, "time", lambda: NOW)
+    return data
+
+
+def test_untried_strategy_scores_half_over_default_latency():
+    assert strategy_score({}, NOW) == pytest.approx(0.5 / strategy_stats.DEFAULT_ATTEMPT_SECONDS)
+
+
+def test_successes_raise_the_score():
+    good = {"success": 8.0, "failure": 0.0, "latency": 10.0, "updated_at": NOW}
+    bad = {"success": 0.0, "failure": 8.0, "latency": 10.0, "updated_at": NOW}
+    assert strategy_score(good, NOW) > strategy_score({}, NOW) > strategy_score(bad, NOW)
+
+
+def test_faster_strategy_scores_higher():
+    fast = {"success": 5.0, "failure": 5.0, "latency": 5.0, "updated_at": NOW}
+    slow = {"success": 5.0, "failure": 5.0, "latency": 50.0, "updated_at": NOW}
+    assert strategy_score(fast, NOW) == pytest.approx(10 * strategy_score(slow, NOW))
+
+
+def test_old_outcomes_decay_toward_untried():
+    failing = {"success": 0.0, "failure": 10.0, "latency": 30.0, "updated_at": NOW}
+    later = NOW + 20 * STRATEGY_STATS_HALF_LIFE
+    assert strategy_score(failing, later) == pytest.approx(strategy_score({}, later), rel=1e-3)
+
+
+def test_latency_floor():
+    instant = {"success": 1.0, "failure": 0.0, "latency": 0.01, "updated_at": NOW}
+    assert strategy_score(instant, NOW) == pytest.approx(2 / 3)
+
+
+def test_order_without_stats_keeps_configured_order(stats):
+    assert names(order_strategies(STRATEGIES)) == ["ios", "tv", "android"]
+
+
+def test_order_ranks_by_score(stats):
+    stats["android"] = {"success": 10.0, "failure": 0.0, "latency": 5.0, "updated_at": NOW}
+    stats["ios"] = {"success": 0.0, "failure": 2.0, "latency": 30.0, "updated_at": NOW}
+    assert names(order_strategies(STRATEGIES)) == ["android", "tv", "ios"]
+
+
+def test_failing_strategy_is_probed_first_once_then_skipped(stats):
+    stats["ios"] = {"failure": 5.0, "consecutive_failures": float(STRATEGY_SKIP_AFTER), "updated_at": NOW}
+    assert names(order_strategies(STRATEGIES)) == ["ios", "tv", "android"]
+    # The probe slot is taken until the probe interval passes
+    assert names(order_strategies(STRATEGIES)) == ["tv", "android"]
+
+
+def test_all_failing_falls_back_to_configured_order(stats):
+    for strategy in STRATEGIES:
+        stats[strategy["name"]] = {"consecutive_failures": float(STRATEGY_SKIP_AFTER), "updated_at": NOW}
+        strategy_stats._claim_probe(strategy["name"])
+    assert names(order_strategies(STRATEGIES)) == ["ios", "tv", "android"]
+
+
+def test_redis_errors_fall_back_to_configured_order(monkeypatch):
+    def unavailable(requested):
+        raise ConnectionError("Redis down")
+
+    monkeypatch.setattr(strategy_stats.StrategyStats, "load", staticmethod(unavailable))
+    assert names(order_strategies(STRATEGIES)) == ["ios", "tv", "android"]
+
+
+@pytest.mark.parametrize("error", [
+    "ERROR: [youtube] abc: Private video. Sign in if you've been granted access to this video",
+    "ERROR: [youtube] abc: Video unavailable",
+    "ERROR: [youtube] abc: Sign in to confirm your age. This video may be inappropriate for some users.",
+    "ERROR: [youtube] abc: The uploader has not made this video available in your country",
+])
+def test_video_errors(error):
+    assert is_video_error(error)
+
+
+@pytest.mark.parametrize("error", [
+    None,
+    "",
+    "ERROR: [youtube] abc: Sign in to confirm you're not a bot",
+    "ERROR: [youtube] abc: Precondition check failed",
+    "Strategy 1 timed out after 5 minutes",
+])
+def test_strategy_errors(error):
+    assert not is_video_error(error)
@@ -81,7 +81,7 @@ def process_task(task_id: str) -> bool:
         logger.info(f"Download complete: {audio_file}")
         
         # Step 2: Convert audio to MP3
-        success, mp3_file, error = convert_to_mp3(task_id, audio_file)
+        success, mp3_file, error, _ = convert_to_mp3(task_id, audio_file)
         
         if not success or not mp3_file:
             logger.error(f"Conversion failed: {error}")
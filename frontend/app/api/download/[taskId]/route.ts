@@ -16,11 +16,46 @@ export async function GET(
       );
     }
 
-    // Forward the request to the backend
-    const backendResponse = await fetch(`${BACKEND_URL}/api/download/${taskId}`, {
+    // Forward the request to the backend, passing through range and conditional headers
+    const forwardedHeaders: Record<string, string> = {};
+    for (const name of ['range', 'if-range', 'if-none-match', 'if-modified-since']) {
+      const value = request.headers.get(name);
+      if (value) {
+        forwardedHeaders[name] = value;
+      }
+    }
+
+    // Progressive mode (?stream=1) streams a task that is still converting
+    const stream = request.nextUrl.searchParams.get('stream');
+    const query = stream ? `?stream=${encodeURIComponent(stream)}` : '';
+
+    const backendResponse = await fetch(`${BACKEND_URL}/api/download/${taskId}${query}`, {
       method: 'GET',
+      headers: forwardedHeaders,
+      redirect: 'manual',
     });
 
+    // Object storage downloads: send the browser straight to the presigned URL
+    const location = backendResponse.headers.get('location');
+    if (backendResponse.status >= 300 && backendResponse.status < 400 && location) {
+      return new Response(null, {
+        status: backendResponse.status,
+        headers: { 'Location': location, 'Cache-Control': 'no-store' },
+      });
+    }
+
+    // 304 Not Modified and 416 Range Not Satisfiable carry no file body
+    if (backendResponse.status === 304 || backendResponse.status === 416) {
+      const headers: Record<string, string> = {};
+      for (const name of ['etag', 'last-modified', 'content-range', 'accept-ranges']) {
+        const value = backendResponse.headers.get(name);
+        if (value) {
+          headers[name] = value;
+        }
+      }
+      return new Response(null, { status: backendResponse.status, headers });
+    }
+
     if (!backendResponse.ok) {
       const errorText = await backendResponse.text();
       console.error('Backend error:', errorText);
@@ -30,19 +65,24 @@ export async function GET(
       );
     }
 
-    // Get the file stream from backend
-    const fileBuffer = await backendResponse.arrayBuffer();
     const contentType = backendResponse.headers.get('content-type') || 'audio/mpeg';
     const filename = backendResponse.headers.get('content-disposition')?.split('filename=')[1]?.replace(/"/g, '') || `${taskId}.mp3`;
 
-    // Return the file with proper headers
-    return new Response(fileBuffer, {
-      status: 200,
-      headers: {
-        'Content-Type': contentType,
-        'Content-Disposition': `attachment; filename="${filename}"`,
-        'Content-Length': fileBuffer.byteLength.toString(),
-      },
+    // Stream the file (or requested ranges) through instead of buffering it
+    const headers: Record<string, string> = {
+      'Content-Type': contentType,
+      'Content-Disposition': `attachment; filename="${filename}"`,
+    };
+    for (const name of ['content-length', 'content-range', 'accept-ranges', 'etag', 'last-modified', 'cache-control']) {
+      const value = backendResponse.headers.get(name);
+      if (value) {
+        headers[name] = value;
+      }
+    }
+
+    return new Response(backendResponse.body, {
+      status: backendResponse.status,
+      headers,
     });
     
   } catch (error) {
@@ -16,14 +16,28 @@ export async function GET(
       );
     }
 
-    // Forward the request to the backend
-    const backendResponse = await fetch(`${BACKEND_URL}/api/status/${taskId}`, {
+    // Forward the request to the backend, passing through long-poll and conditional headers
+    const wait = request.nextUrl.searchParams.get('wait');
+    const ifNoneMatch = request.headers.get('if-none-match');
+    const query = wait ? `?wait=${encodeURIComponent(wait)}` : '';
+    
+    const backendResponse = await fetch(`${BACKEND_URL}/api/status/${taskId}${query}`, {
       method: 'GET',
       headers: {
         'Content-Type': 'application/json',
+        ...(ifNoneMatch ? { 'If-None-Match': ifNoneMatch } : {}),
       },
+      cache: 'no-store',
     });
 
+    // Client already has the latest version
+    if (backendResponse.status === 304) {
+      return new NextResponse(null, {
+        status: 304,
+        headers: { 'ETag': backendResponse.headers.get('etag') || '' },
+      });
+    }
+
     if (!backendResponse.ok) {
       const errorText = await backendResponse.text();
       console.error('Backend error:', errorText);
@@ -34,7 +48,13 @@ export async function GET(
     }
 
     const data = await backendResponse.json();
-    return NextResponse.json(data);
+    const etag = backendResponse.headers.get('etag');
+    return NextResponse.json(data, {
+      headers: {
+        'Cache-Control': 'no-cache',
+        ...(etag ? { 'ETag': etag } : {}),
+      },
+    });
     
   } catch (error) {
     console.error('API route error:', error);
@@ -0,0 +1,58 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+const BACKEND_URL = process.env.BACKEND_URL || 'http://backend:8000';
+
+// Never cache or buffer the event stream
+export const dynamic = 'force-dynamic';
+
+export async function GET(
+  request: NextRequest,
+  context: { params: Promise<{ taskId: string }> }
+) {
+  try {
+    const { taskId } = await context.params;
+    
+    if (!taskId) {
+      return NextResponse.json(
+        { error: 'Task ID is required' },
+        { status: 400 }
+      );
+    }
+
+    // Forward the stream request to the backend
+    const backendResponse = await fetch(`${BACKEND_URL}/api/status/${taskId}/stream`, {
+      method: 'GET',
+      headers: {
+        'Accept': 'text/event-stream',
+      },
+      cache: 'no-store',
+      signal: request.signal,
+    });
+
+    if (!backendResponse.ok || !backendResponse.body) {
+      const errorText = await backendResponse.text();
+      console.error('Backend error:', errorText);
+      return NextResponse.json(
+        { error: 'Backend request failed', details: errorText },
+        { status: backendResponse.status }
+      );
+    }
+
+    // Pipe the backend event stream straight through to the browser
+    return new Response(backendResponse.body, {
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache, no-transform',
+        'Connection': 'keep-alive',
+        'X-Accel-Buffering': 'no',
+      },
+    });
+    
+  } catch (error) {
+    console.error('API route error:', error);
+    return NextResponse.json(
+      { error: 'Internal server error', details: error instanceof Error ? error.message : 'Unknown error' },
+      { status: 500 }
+    );
+  }
+}
@@ -61,6 +61,7 @@ export default function HomePage() {
     const [error, setError] = useState('');
     const [retryCount, setRetryCount] = useState(0);
     const [pollingInterval, setPollingInterval] = useState<NodeJS.Timeout | null>(null);
+    const [statusStream, setStatusStream] = useState<EventSource | null>(null);
     
     // Download history (using localStorage)
     const [downloadHistory, setDownloadHistory] = useState<DownloadHistoryItem[]>([]);
@@ -84,6 +85,116 @@ export default function HomePage() {
         };
     }, [pollingInterval]);
     
+    // Close status stream on unmount
+    useEffect(() => {
+        return () => {
+            if (statusStream) {
+                statusStream.close();
+            }
+        };
+    }, [statusStream]);
+    
+    // Apply a status update from the stream or a poll; returns true once the task is finished
+    const handleStatusUpdate = (taskId: string, data: Partial<TaskData>): boolean => {
+        // Create updated task data
+        const updatedTaskData: TaskData = {
+            taskId: taskId,
+            status: data.status as TaskStatus,
+            progress: data.progress || 0,
+            message: data.message || 'Processing...',
+            title: data.title || taskData?.title,
+            channel: data.channel || taskData?.channel,
+            thumbnail: data.thumbnail || taskData?.thumbnail,
+            error: data.error,
+            fileSize: data.fileSize,
+            fileSizeFormatted: data.fileSizeFormatted,
+            downloadUrl: data.status === 'completed' ? `/api/download/${taskId}` : undefined,
+            downloadCount: data.downloadCount || 0,
+            expiresText: data.expiresText
+        };
+        
+        // Update task data
+        setTaskData(updatedTaskData);
+        
+        // Check status
+        if (data.status === 'completed') {
+            // Task completed, show download link
+            setIsLoading(false);
+            
+            // Add to download history
+            const historyItem: DownloadHistoryItem = {
+                taskId: updatedTaskData.taskId,
+                title: updatedTaskData.title,
+                channel: updatedTaskData.channel,
+                thumbnail: updatedTaskData.thumbnail,
+                fileSizeFormatted: updatedTaskData.fileSizeFormatted,
+                downloadUrl: updatedTaskData.downloadUrl,
+                completedAt: new Date().toISOString(),
+                downloadCount: updatedTaskData.downloadCount || 0
+            };
+            
+            downloadHistoryUtils.addToHistory(historyItem);
+            setDownloadHistory(downloadHistoryUtils.getHistory());
+            
+            // Show success toast
+            toast({
+                title: "Download Ready!",
+                description: `${updatedTaskData.title || 'Your file'} has been converted successfully.`,
+            });
+            
+            return true;
+        } else if (data.status === 'failed') {
+            // Task failed
+            setIsLoading(false);
+            setError(data.error || 'Conversion failed');
+            
+            // Show error toast
+            toast({
+                variant: "destructive",
+                title: "Conversion Failed",
+                description: data.error || 'The conversion process failed. Please try again.',
+            });
+            
+            return true;
+        }
+        
+        return false;
+    };
+    
+    // Stream task status over Server-Sent Events, falling back to polling
+    const watchTaskStatus = (taskId: string) => {
+        if (typeof EventSource === 'undefined') {
+            pollTaskStatus(taskId);
+            return;
+        }
+        
+        const source = new EventSource(`/api/status/${taskId}/stream`);
+        let finished = false;
+        
+        source.onmessage = (event) => {
+            try {
+                if (handleStatusUpdate(taskId, JSON.parse(event.data))) {
+                    finished = true;
+                    source.close();
+                    setStatusStream(null);
+                }
+            } catch (err) {
+                console.error('Status stream error:', err);
+            }
+        };
+        
+        source.onerror = () => {
+            if (finished) return;
+            
+            // Stream unavailable or dropped, fall back to polling
+            source.close();
+            setStatusStream(null);
+            pollTaskStatus(taskId);
+        };
+        
+        setStatusStream(source);
+    };
+    
     // Poll task status
     const pollTaskStatus = async (taskId: string) => {
         try {
@@ -120,69 +231,10 @@ export default function HomePage() {
                         return;
                     }
                     
-                    // Create updated task data
-                    const updatedTaskData: TaskData = {
-                        taskId: taskId,
-                        status: data.status as TaskStatus,
-                        progress: data.progress || 0,
-                        message: data.message || 'Processing...',
-                        title: data.title || taskData?.title,
-                        channel: data.channel || taskData?.channel,
-                        thumbnail: data.thumbnail || taskData?.thumbnail,
-                        error: data.error,
-                        fileSize: data.fileSize,
-                        fileSizeFormatted: data.fileSizeFormatted,
-                        downloadUrl: data.status === 'completed' ? `/api/download/${taskId}` : undefined,
-                        downloadCount: data.downloadCount || 0,
-                        expiresText: data.expiresText
-                    };
-                    
-                    // Update task data
-                    setTaskData(updatedTaskData);
-                    
-                    // Check status
-                    if (data.status === 'completed') {
-                        // Task completed, show download link
-                        clearInterval(interval);
-                        setIsLoading(false);
-                        setPollingInterval(null);
-                        
-                        // Add to download history
-                        const historyItem: DownloadHistoryItem = {
-                            taskId: updatedTaskData.taskId,
-                            title: updatedTaskData.title,
-                            channel: updatedTaskData.channel,
-                            thumbnail: updatedTaskData.thumbnail,
-                            fileSizeFormatted: updatedTaskData.fileSizeFormatted,
-                            downloadUrl: updatedTaskData.downloadUrl,
-                            completedAt: new Date().toISOString(),
-                            downloadCount: updatedTaskData.downloadCount || 0
-                        };
-                        
-                        downloadHistoryUtils.addToHistory(historyItem);
-                        setDownloadHistory(downloadHistoryUtils.getHistory());
-                        
-                        // Show success toast
-                        toast({
-                            title: "Download Ready!",
-                            description: `${updatedTaskData.title || 'Your file'} has been converted successfully.`,
-                        });
-                        
-                        return;
-                    } else if (data.status === 'failed') {
-                        // Task failed
+                    // Apply update and stop polling once the task is finished
+                    if (handleStatusUpdate(taskId, data)) {
                         clearInterval(interval);
-                        setIsLoading(false);
                         setPollingInterval(null);
-                        setError(data.error || 'Conversion failed');
-                        
-                        // Show error toast
-                        toast({
-                            variant: "destructive",
-                            title: "Conversion Failed",
-                            description: data.error || 'The conversion process failed. Please try again.',
-                        });
-                        
                         return;
                     }
                     
@@ -236,6 +288,10 @@ export default function HomePage() {
             clearInterval(pollingInterval);
             setPollingInterval(null);
         }
+        if (statusStream) {
+            statusStream.close();
+            setStatusStream(null);
+        }
     };
 
     // Handle form submission
@@ -288,8 +344,8 @@ export default function HomePage() {
             
             setTaskData(initialTaskData);
             
-            // Begin polling for status
-            await pollTaskStatus(data.taskId);
+            // Begin watching status (streams when possible, polls otherwise)
+            watchTaskStatus(data.taskId);
             
         } catch (err) {
             console.error('Error:', err);